@@ -0,0 +1,38 @@
+"""Сравнение числовых бэкендов rpn_calculator: float, int и decimal.
+
+Запуск из корня проекта: python -m benchmarks.bench_backends
+"""
+import timeit
+
+from src.rpn_calculator.backends import get_backend
+from src.rpn_calculator.calculator import rpn_calculator
+
+EXPRESSIONS = {
+    "целые": "17 23 * 5 + 1000 % 7 // 3 ^",
+    "большие целые": "123456789 987654321 * 10 20 ^ + 3 //",
+    "дробные": "1.5 2.25 * 0.1 + 3.3 - 2 ^",
+    "функции": "2 sqrt 3 ln + 0.5 sin *",
+    "переменные": "a b * c + a -",
+}
+BACKENDS = ("float", "int", "decimal", "decimal:50")
+
+
+def main():
+    env = {"a": 3, "b": 4.5, "c": 12}
+    repeat = 20000
+    print(f"{'выражение':<16}" + "".join(f"{name:>14}" for name in BACKENDS))
+    for label, expression in EXPRESSIONS.items():
+        row = f"{label:<16}"
+        for name in BACKENDS:
+            backend = get_backend(name)
+            seconds = min(timeit.repeat(lambda: rpn_calculator(expression, env, backend=backend),
+                                        number=repeat, repeat=3)) / repeat
+            row += f"{seconds * 1e6:11.2f} мкс"
+        print(row)
+    print()
+    for name in BACKENDS:
+        print(f"{name:<12} большие целые = {rpn_calculator(EXPRESSIONS['большие целые'], backend=get_backend(name))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""Замер матричных операторов на размерах от 10x10 до 2000x2000.
+
+Без NumPy используется чистый Python (метод Гаусса), поэтому размеры
+больше PURE_PYTHON_MAX_SIZE пропускаются.
+
+Запуск из корня проекта: python -m benchmarks.bench_matrix
+"""
+import random
+import timeit
+
+from src.rpn_calculator.calculator import rpn_calculator
+from src.rpn_calculator.matrix import Matrix, np
+
+SIZES = (10, 50, 200, 500, 1000, 2000)
+PURE_PYTHON_MAX_SIZE = 200
+
+
+def random_matrix(n, rng):
+    # Диагональное преобладание - матрица гарантированно невырождена
+    return Matrix([[rng.random() + (n if i == j else 0) for j in range(n)] for i in range(n)])
+
+
+def bench(label, stmt, repeat):
+    seconds = min(timeit.repeat(stmt, number=repeat, repeat=3)) / repeat
+    print(f"  {label:<14} {seconds * 1e3:12.2f} мс")
+
+
+def main():
+    rng = random.Random(0)
+    print(f"Бэкенд: {'NumPy (BLAS/LAPACK)' if np is not None else 'чистый Python'}")
+    for n in SIZES:
+        if np is None and n > PURE_PYTHON_MAX_SIZE:
+            print(f"n = {n}: пропущено (нужен NumPy)")
+            continue
+        env = {"A": random_matrix(n, rng), "B": random_matrix(n, rng), "b": [rng.random() for _ in range(n)]}
+        repeat = max(1, 200 // n)
+        print(f"n = {n}")
+        bench("A B matmul", lambda: rpn_calculator("A B matmul", env), repeat)
+        bench("A b solve", lambda: rpn_calculator("A b solve", env), repeat)
+        bench("A det", lambda: rpn_calculator("A det", env), repeat)
+        bench("A inv", lambda: rpn_calculator("A inv", env), repeat)
+
+
+if __name__ == "__main__":
+    main()
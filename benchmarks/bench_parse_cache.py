@@ -0,0 +1,65 @@
+"""Холодный и тёплый старт пакетной задачи: разбор библиотеки формул без кэша и через ParseCache.
+
+Запуск из корня проекта: python -m benchmarks.bench_parse_cache [число формул]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.rpn_calculator.parse_cache import ParseCache
+from src.rpn_calculator.parser import parse_str_infix
+
+OPERATORS = ("+", "-", "*", "//", "^")
+FUNCTIONS = ("sin", "cos", "sqrt", "abs", "ln")
+
+
+def make_formulas(count: int, seed: int = 1) -> list[str]:
+    rng = random.Random(seed)
+    formulas = []
+    for i in range(count):
+        terms = [f"{rng.choice(FUNCTIONS)}(x{rng.randrange(50)} {rng.choice(OPERATORS)} {i % 997})",
+                 f"(a{rng.randrange(20)} {rng.choice(OPERATORS)} b{rng.randrange(20)})",
+                 f"{rng.randrange(1, 100)}.5"]
+        rng.shuffle(terms)
+        formulas.append(f" {rng.choice(OPERATORS)} ".join(terms))
+    return formulas
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<36}{(time.perf_counter() - start) * 1000:10.1f} мс")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    formulas = make_formulas(count)
+    print(f"Формул: {count}")
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "formulas.rpnc")
+        cold = timed("холодный старт (parse_str_infix)", lambda: [parse_str_infix(f) for f in formulas])
+
+        def build():
+            with ParseCache(path) as cache:
+                for formula in formulas:
+                    cache.rpn(formula)
+                cache.save()
+
+        timed("первый запуск с кэшем (разбор + save)", build)
+        print(f"{'размер файла':<36}{os.path.getsize(path) / 2 ** 20:10.1f} МБ")
+
+        def warm_start():
+            with ParseCache(path) as cache:
+                result = [cache.rpn(f) for f in formulas]
+                assert cache.misses == 0
+                return result
+
+        warm = timed("тёплый старт (mmap)", warm_start)
+        assert warm == cold
+
+
+if __name__ == "__main__":
+    main()
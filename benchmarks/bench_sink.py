@@ -0,0 +1,74 @@
+"""Вывод результатов пакета: текст '= {result}' против столбцового двоичного файла.
+
+Запуск из корня проекта: python -m benchmarks.bench_sink [число результатов]
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from src.rpn_calculator.sink import ResultReader, ResultWriter
+
+
+def make_results(count: int, seed: int = 1) -> list:
+    rng = random.Random(seed)
+    results = []
+    for i in range(count):
+        choice = i % 10
+        if choice < 6:
+            results.append(rng.random() * 1000)
+        elif choice < 9:
+            results.append(rng.randrange(-10 ** 9, 10 ** 9))
+        else:
+            results.append([rng.random() for _ in range(4)])
+    return results
+
+
+def timed(label: str, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<40}{(time.perf_counter() - start) * 1000:10.1f} мс")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1000000
+    results = make_results(count)
+    print(f"Результатов: {count}")
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "results.txt")
+        binary_path = os.path.join(directory, "results.rpnr")
+
+        def write_text():
+            with open(text_path, "w", encoding="utf-8") as f:
+                for result in results:
+                    f.write(f"= {result}\n")
+
+        def write_binary():
+            with ResultWriter(binary_path) as sink:
+                for result in results:
+                    sink.append(result)
+
+        def read_text():
+            values = []
+            with open(text_path, encoding="utf-8") as f:
+                for line in f:
+                    body = line[2:]
+                    if body.startswith("["):
+                        values.append([float(x) for x in body.strip("[]\n").split(",")])
+                    else:
+                        values.append(float(body))
+            return values
+
+        timed("запись текста", write_text)
+        timed("запись ResultWriter", write_binary)
+        print(f"{'размер: текст / двоичный':<40}{os.path.getsize(text_path) / 2 ** 20:8.1f} / "
+              f"{os.path.getsize(binary_path) / 2 ** 20:.1f} МБ")
+        timed("чтение текста с разбором чисел", read_text)
+        timed("чтение ResultReader.columns", ResultReader(binary_path).columns)
+        timed("чтение ResultReader по строкам", lambda: list(ResultReader(binary_path)))
+
+
+if __name__ == "__main__":
+    main()
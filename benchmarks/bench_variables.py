@@ -0,0 +1,36 @@
+"""Выражения с большим числом переменных: интерпретатор, компилятор со словарём и со слотами.
+
+Запуск из корня проекта: python -m benchmarks.bench_variables
+"""
+import timeit
+
+from src.rpn_calculator.calculator import rpn_calculator
+from src.rpn_calculator.compiler import compile_rpn
+from src.rpn_calculator.parser import parse_str_infix
+
+EXPRESSION = parse_str_infix("a * b + c - d * e + f * g + h * i + j * k - a * b")
+NAMES = "abcdefghijk"
+
+
+def main():
+    compiled = compile_rpn(EXPRESSION)
+    env = {name: float(i + 1) for i, name in enumerate(NAMES)}
+    changing = [{name: float(i + j) for j, name in enumerate(NAMES)} for i in range(64)]
+    values = [compiled.bind(e) for e in changing]
+    counter = iter(range(10 ** 9))
+
+    cases = {
+        "rpn_calculator (словарь)": lambda: rpn_calculator(EXPRESSION, env),
+        "compiled.evaluate, новые значения": lambda: compiled.evaluate(changing[next(counter) % 64]),
+        "compiled.run_slots, новые значения": lambda: compiled.run_slots(values[next(counter) % 64]),
+        "compiled.evaluate, то же окружение": lambda: compiled.evaluate(env),
+    }
+    repeat = 20000
+    print(f"{EXPRESSION!r}, переменных: {len(compiled.slots)}")
+    for label, function in cases.items():
+        seconds = min(timeit.repeat(function, number=repeat, repeat=3)) / repeat
+        print(f"{label:<40}{seconds * 1e6:8.2f} мкс")
+
+
+if __name__ == "__main__":
+    main()
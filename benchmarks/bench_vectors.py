@@ -0,0 +1,44 @@
+"""Сравнение векторных операторов с эквивалентными скалярными выражениями.
+
+Запуск из корня проекта: python -m benchmarks.bench_vectors
+"""
+import timeit
+
+from src.rpn_calculator.calculator import rpn_calculator
+
+
+def scalar_sum_expression(n):
+    return " ".join(["x0"] + [f"x{i} +" for i in range(1, n)])
+
+
+def scalar_dot_expression(n):
+    return " ".join(["x0 y0 *"] + [f"x{i} y{i} * +" for i in range(1, n)])
+
+
+def bench(label, stmt, repeat):
+    seconds = min(timeit.repeat(stmt, number=repeat, repeat=3)) / repeat
+    print(f"  {label:<28} {seconds * 1e6:12.1f} мкс")
+    return seconds
+
+
+def main():
+    for n in (10, 100, 1000, 10000):
+        v = [float(i) for i in range(n)]
+        w = [float(n - i) for i in range(n)]
+        scalars = {f"x{i}": v[i] for i in range(n)}
+        scalars.update({f"y{i}": w[i] for i in range(n)})
+        sum_expr, dot_expr = scalar_sum_expression(n), scalar_dot_expression(n)
+        repeat = max(1, 20000 // n)
+
+        print(f"n = {n}")
+        vector_sum = bench("v sum", lambda: rpn_calculator("v sum", {"v": v}), repeat)
+        scalar_sum = bench("x0 x1 + ... (скаляры)", lambda: rpn_calculator(sum_expr, scalars), repeat)
+        vector_dot = bench("v w dot", lambda: rpn_calculator("v w dot", {"v": v, "w": w}), repeat)
+        scalar_dot = bench("x0 y0 * ... (скаляры)", lambda: rpn_calculator(dot_expr, scalars), repeat)
+        bench("v w * (поэлементно)", lambda: rpn_calculator("v w *", {"v": v, "w": w}), repeat)
+        bench("v sqrt (поэлементно)", lambda: rpn_calculator("v sqrt", {"v": v}), repeat)
+        print(f"  ускорение sum: {scalar_sum / vector_sum:.0f}x, dot: {scalar_dot / vector_dot:.0f}x")
+
+
+if __name__ == "__main__":
+    main()
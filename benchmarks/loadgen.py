@@ -0,0 +1,45 @@
+"""Генератор нагрузки: воспроизведение корпуса выражений с перцентилями задержек.
+
+Запуск из корня проекта:
+    python -m benchmarks.loadgen CORPUS [--concurrency N] [--rate R] [--duration S] [--requests N]
+                                        [--connect HOST:PORT]
+
+CORPUS - стенограмма --cli, история GUI или файл с выражением в каждой строке.
+Без --rate - замкнутый цикл из N потоков, с --rate - открытый цикл R запросов
+в секунду. Без --connect вычисления идут в этом процессе, с --connect - на
+сервере python src/main.py --serve PORT.
+"""
+import argparse
+
+from src.rpn_calculator.loadgen import InProcessTarget, TcpTarget, format_report, load_corpus, run_load
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Генератор нагрузки для rpn_calculator")
+    parser.add_argument("corpus")
+    parser.add_argument("--concurrency", type=int, default=1)
+    parser.add_argument("--rate", type=float)
+    parser.add_argument("--duration", type=float)
+    parser.add_argument("--requests", type=int)
+    parser.add_argument("--connect", metavar="HOST:PORT")
+    args = parser.parse_args()
+    if args.duration is None and args.requests is None:
+        args.duration = 10.0
+
+    corpus = load_corpus(args.corpus)
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        target = TcpTarget(host or "127.0.0.1", int(port))
+    else:
+        target = InProcessTarget()
+    mode = f"открытый цикл, {args.rate:g} в секунду" if args.rate else "замкнутый цикл"
+    print(f"Строк в корпусе: {len(corpus)}; {mode}, потоков: {args.concurrency}")
+    try:
+        report = run_load(corpus, target, args.concurrency, args.rate, args.duration, args.requests)
+    finally:
+        target.close()
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    main()
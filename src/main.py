@@ -1,19 +1,75 @@
+import time
+
+STARTED_AT = time.perf_counter()
+
 from rpn_calculator.parser import parse_str_infix, is_infix, parse_str_postfix
-from rpn_calculator.calculator import rpn_calculator
-from qui import run_gui
+from rpn_calculator.calculator import rpn_calculator, split_assignment
+from rpn_calculator.pipeline import evaluate_csv
+from rpn_calculator.incremental import IncrementalProgram
+from rpn_calculator.solver import run_solver_command, format_solver_result
+from rpn_calculator.functions import define_function
+from rpn_calculator.backends import get_backend
+from rpn_calculator.parse_cache import ParseCache
+from rpn_calculator.sink import ResultWriter, write_program
+from rpn_calculator.server import CalculatorServer
+import contextlib
+import os
 import sys
 
 
+def backend_from_args(argv):
+    """Числовой бэкенд из --backend NAME (float, int, decimal[:точность])"""
+    if '--backend' not in argv:
+        return None
+    position = argv.index('--backend')
+    if position + 1 >= len(argv):
+        raise ValueError("После --backend нужно имя бэкенда")
+    return get_backend(argv[position + 1])
+
+
+def split_cache_option(args):
+    """Аргументы без --cache FILE и путь FILE (None без --cache)"""
+    if '--cache' not in args:
+        return args, None
+    position = args.index('--cache')
+    if position + 1 >= len(args):
+        raise ValueError("После --cache нужно имя файла")
+    return args[:position] + args[position + 2:], args[position + 1]
+
+
+def open_parse_cache(cache_path):
+    """ParseCache для with; без пути - None"""
+    return ParseCache(cache_path) if cache_path else contextlib.nullcontext()
+
+
 def main():
     """Интерактивный режим для калькулятора"""
+    try:
+        backend = backend_from_args(sys.argv)
+        args, cache_path = split_cache_option(sys.argv[2:])
+    except ValueError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(2)
+
     if len(sys.argv) > 1 and sys.argv[1] == '--cli':
-        run_cli()
+        run_cli(backend)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--csv':
+        run_csv(args, cache_path)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--batch' and len(args) > 1:
+        run_batch(args[0], args[1], backend, cache_path)
+    elif len(sys.argv) > 1 and sys.argv[1] == '--watch' and args:
+        run_watch(args[0], cache_path=cache_path)
+    elif len(sys.argv) > 2 and sys.argv[1] == '--serve':
+        run_server(sys.argv[2])
     else:
-        run_gui()
+        # GUI импортируется только здесь, чтобы консольные режимы не требовали PySide6
+        from qui import run_gui
+        run_gui(reduced_effects=True if '--reduced-effects' in sys.argv else None,
+                startup_profile='--startup-profile' in sys.argv, started_at=STARTED_AT, backend=backend)
 
 
-def run_cli():
-    """Консольный режим"""
+def run_cli(backend=None):
+    """Консольный режим (backend - числовой бэкенд, по умолчанию float)"""
     print("RPN/Infix Calculator. Введите 'exit' для выхода.")
     env = {}
     while True:
@@ -25,17 +81,20 @@ def run_cli():
             if not line:
                 continue
 
-            var_name = None
-            expression = line
-            if '=' in line:
-                parts = line.split('=', 1)
-                var_name = parts[0].strip()
-                expression = parts[1].strip()
-                if not var_name.isidentifier():
-                    raise ValueError(f"Недопустимое имя переменной: {var_name}")
+            solved = run_solver_command(line, env)
+            if solved is not None:
+                print(format_solver_result(line, solved))
+                continue
+
+            function = define_function(line, env)
+            if function is not None:
+                print(f"Определена функция {function}")
+                continue
+
+            var_name, expression = split_assignment(line)
 
             rpn_expr = parse_str_infix(expression) if is_infix(expression) else parse_str_postfix(expression)
-            result = rpn_calculator(rpn_expr, env)
+            result = rpn_calculator(rpn_expr, env, backend=backend)
 
             if var_name:
                 env[var_name] = result
@@ -43,12 +102,128 @@ def run_cli():
             else:
                 print(f"= {result}")
 
-        except (ValueError, TypeError, ZeroDivisionError) as e:
+        except (ValueError, TypeError, ArithmeticError) as e:
             print(f"Ошибка: {e}")
         except KeyboardInterrupt:
             print("\nЗавершение работы.")
             break
 
 
+def run_csv(args, cache_path=None):
+    """Пакетный режим: main.py --csv INPUT OUTPUT "F = a + b" [...] [--cache FILE]
+
+    С --cache разобранные выражения сохраняются в FILE и при следующих
+    запусках берутся из него без повторного разбора.
+    """
+    if len(args) < 3:
+        print('Использование: main.py --csv INPUT OUTPUT "name = expr" [...] [--cache FILE]')
+        sys.exit(2)
+    source, target, expressions = args[0], args[1], args[2:]
+    try:
+        with open_parse_cache(cache_path) as cache:
+            report = evaluate_csv(source, target, expressions, cache=cache)
+            if cache is not None:
+                cache.save()
+    except (OSError, ValueError) as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+
+    print(f"Обработано строк: {report['rows']}, с ошибками: {report['errors']}")
+    for row_number, message in report["error_samples"]:
+        print(f"  строка {row_number}: {message}")
+
+
+def run_batch(source, target, backend=None, cache_path=None):
+    """Пакетный режим: main.py --batch PROGRAM RESULTS [--cache FILE]
+
+    Каждая строка PROGRAM - выражение, присваивание или определение функции;
+    результат каждой непустой строки (текст ошибки, запись определения)
+    записывается в столбцовый двоичный файл RESULTS (rpn_calculator.sink.ResultReader читает его).
+    С --cache разобранные выражения берутся из FILE и дописываются в него.
+    """
+    try:
+        with open(source, encoding='utf-8') as src, ResultWriter(target) as sink, \
+                open_parse_cache(cache_path) as cache:
+            write_program(src, sink, backend=backend, cache=cache)
+            if cache is not None:
+                cache.save()
+    except OSError as e:
+        print(f"Ошибка: {e}")
+        sys.exit(1)
+    print(f"Записано результатов: {sink.rows}")
+
+
+def run_server(address):
+    """Режим сервера: main.py --serve [HOST:]PORT, по строке запроса - строка ответа"""
+    host, _, port = address.rpartition(':')
+    if not port.isdigit():
+        print("Использование: main.py --serve [HOST:]PORT")
+        sys.exit(2)
+    with CalculatorServer((host or '127.0.0.1', int(port))) as server:
+        print(f"Сервер слушает {server.server_address[0]}:{server.server_address[1]}. Ctrl+C для выхода.")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            print("\nЗавершение работы.")
+
+
+def _file_signature(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+def run_watch(path, interval=0.3, cache_path=None):
+    """Режим наблюдения: main.py --watch FILE [--cache FILE]
+
+    Файл программы перечитывается при изменении (проверка stat раз в interval
+    секунд); пересчитываются только затронутые правкой строки. С --cache
+    новые разборы сохраняются в кэш после каждого пересчёта.
+    """
+    with open_parse_cache(cache_path) as cache:
+        watch_program(path, IncrementalProgram(cache), interval)
+
+
+def watch_program(path, program, interval):
+    signature = None
+    print(f"Наблюдение за {path}. Ctrl+C для выхода.")
+    try:
+        while True:
+            try:
+                current = _file_signature(path)
+            except OSError as e:
+                if signature is not False:
+                    print(f"Ошибка: {e}")
+                signature = False
+                time.sleep(interval)
+                continue
+
+            if current != signature:
+                signature = current
+                with open(path, encoding='utf-8') as f:
+                    report = program.run(f.read().splitlines())
+                print_watch_report(report)
+                if program.cache is not None:
+                    program.cache.save()
+            time.sleep(interval)
+    except KeyboardInterrupt:
+        print("\nЗавершение работы.")
+
+
+def print_watch_report(report):
+    stamp = time.strftime("%H:%M:%S")
+    if report["error"]:
+        print(f"[{stamp}] Ошибка: {report['error']}")
+        return
+    print(f"[{stamp}] пересчитано строк: {len(report['evaluated'])}, "
+          f"переиспользовано: {len(report['reused'])}, {report['elapsed'] * 1000:.2f} мс")
+    for name, value in report["changed"].items():
+        print(f"  {name} = {value}")
+    for name in report["removed"]:
+        print(f"  {name} удалена")
+    slowest = sorted(report["timings"].items(), key=lambda item: item[1], reverse=True)[:3]
+    for number, seconds in slowest:
+        print(f"  строка {number}: {seconds * 1000:.3f} мс")
+
+
 if __name__ == "__main__":
     main()
@@ -2,79 +2,757 @@ from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                                QHBoxLayout, QLineEdit, QPushButton, QLabel,
                                QTextEdit, QListWidget, QGridLayout, QGroupBox,
                                QSplitter, QMessageBox, QListWidgetItem, QStatusBar,
-                               QMenuBar, QMenu, QGraphicsDropShadowEffect, QCompleter)
-from PySide6.QtCore import Qt, QPropertyAnimation, QEasingCurve, Signal, QRect, QTimer, QStringListModel
-from PySide6.QtGui import QFont, QFontDatabase, QPalette, QColor, QKeySequence, QShortcut, QAction
+                               QMenuBar, QMenu, QGraphicsDropShadowEffect, QCompleter, QDockWidget,
+                               QTableWidget, QTableWidgetItem, QDialog, QFileDialog, QHeaderView)
+from PySide6.QtCore import (Qt, QPropertyAnimation, QEasingCurve, Signal, QRect, QTimer, QStringListModel,
+                            QObject, QElapsedTimer, QPointF)
+from PySide6.QtGui import (QFont, QFontDatabase, QPalette, QColor, QKeySequence, QShortcut, QAction,
+                           QPainter, QPen, QPainterPath)
+import os
 import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from rpn_calculator.parser import parse_str_infix, is_infix, parse_str_postfix
-from rpn_calculator.calculator import rpn_calculator
+from rpn_calculator.calculator import rpn_calculator, split_assignment
+from rpn_calculator.sampling import FunctionSampler
+from rpn_calculator.cells import CellSheet
+from rpn_calculator.tracer import StepTracer
+from rpn_calculator.solver import run_solver_command, format_solver_result
+from rpn_calculator.functions import define_function, UserFunction
+from rpn_calculator.history import HistoryIndex
+
+# Сколько записей хранит панель истории
+HISTORY_LIMIT = 200000
+# Пауза после нажатия клавиши в поиске по истории до фильтрации, мс
+HISTORY_FILTER_DELAY_MS = 150
+
+
+def detect_remote_session() -> bool:
+    """Эвристика удалённого сеанса (RDP, X2Go, SSH с пробросом X11)"""
+    if os.environ.get("SESSIONNAME", "").upper().startswith("RDP-"):
+        return True
+    if os.environ.get("XRDP_SESSION") or os.environ.get("X2GO_SESSION"):
+        return True
+    return bool(os.environ.get("SSH_CONNECTION") and os.environ.get("DISPLAY"))
+
+
+def reduced_effects_requested() -> bool:
+    """Режим упрощённых эффектов: RPN_REDUCED_EFFECTS=1/0 или автоопределение"""
+    value = os.environ.get("RPN_REDUCED_EFFECTS")
+    if value is not None:
+        return value.strip().lower() not in ("", "0", "false", "no")
+    return detect_remote_session()
+
+
+# Стили разбиты по панелям: при старте разбирается только то, что видно сразу,
+# остальное применяется к панелям и меню при их создании
+MAIN_STYLE = """
+QMainWindow {
+    background-color: #1a1a1a;
+}
+
+QGroupBox {
+    font-size: 14px;
+    font-weight: bold;
+    color: #ffffff;
+    border: 2px solid #444444;
+    border-radius: 12px;
+    margin-top: 15px;
+    padding-top: 15px;
+    background-color: #252525;
+}
+
+QGroupBox::title {
+    subcontrol-origin: margin;
+    subcontrol-position: top center;
+    padding: 5px 20px;
+    background-color: #333333;
+    border-radius: 6px;
+    letter-spacing: 1px;
+}
+
+QLineEdit {
+    background-color: #2d2d2d;
+    border: 2px solid #3a3a3a;
+    border-radius: 8px;
+    padding: 10px;
+    color: #ffffff;
+    font-size: 15px;
+    selection-background-color: #4fc3f7;
+}
+
+QLineEdit:focus {
+    border-color: #4fc3f7;
+    background-color: #333333;
+}
+
+QLineEdit[readOnly="true"] {
+    color: #4fc3f7;
+    background-color: #2d2d2d;
+    border: 2px solid #3a3a3a;
+    border-radius: 8px;
+    padding: 10px;
+}
+
+QPushButton {
+    background-color: #3a3a3a;
+    border: none;
+    border-radius: 8px;
+    color: white;
+    padding: 10px;
+    font-weight: bold;
+    min-height: 25px;
+}
+
+QPushButton:hover {
+    background-color: #4a4a4a;
+}
+
+QPushButton:pressed {
+    background-color: #2a2a2a;
+    padding: 11px 9px 9px 11px;
+}
+
+QPushButton[button_type="number"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #4a4a4a, stop: 1 #3a3a3a);
+}
+
+QPushButton[button_type="number"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #5a5a5a, stop: 1 #4a4a4a);
+}
+
+QPushButton[button_type="operator"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #ff7b45, stop: 1 #ff5b25);
+}
+
+QPushButton[button_type="operator"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #ff9b65, stop: 1 #ff7b45);
+}
+
+QPushButton[button_type="function"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #8c5dff, stop: 1 #6c3dff);
+}
+
+QPushButton[button_type="function"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #ac7dff, stop: 1 #8c5dff);
+}
+
+QPushButton[button_type="equals"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #10d863, stop: 1 #00b843);
+    font-size: 18px;
+}
+
+QPushButton[button_type="equals"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #30f883, stop: 1 #10d863);
+}
+
+QPushButton[button_type="clear"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #ff4848, stop: 1 #ff2828);
+}
+
+QPushButton[button_type="clear"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #ff6868, stop: 1 #ff4848);
+}
+
+QPushButton[button_type="constant"] {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #31a6f3, stop: 1 #1186d3);
+}
+
+QPushButton[button_type="constant"]:hover {
+    background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
+                                stop: 0 #51c6f3, stop: 1 #31a6f3);
+}
+
+QSplitter::handle {
+    background-color: #3a3a3a;
+    width: 3px;
+    border-radius: 1px;
+}
+
+QSplitter::handle:hover {
+    background-color: #4fc3f7;
+}
+
+QStatusBar {
+    background-color: #242424;
+    color: #a0a0a0;
+    border-top: 1px solid #3a3a3a;
+    font-size: 12px;
+}
+
+QMenuBar {
+    background-color: #242424;
+    color: #e0e0e0;
+    border-bottom: 1px solid #3a3a3a;
+}
+
+QMenuBar::item:selected {
+    background-color: #3a3a3a;
+}
+
+QMessageBox {
+    background-color: #2d2d2d;
+    color: #e0e0e0;
+}
+"""
+
+INFO_PANEL_STYLE = """
+QListWidget {
+    background-color: #2d2d2d;
+    border: 2px solid #3a3a3a;
+    border-radius: 8px;
+    color: #e0e0e0;
+    padding: 8px;
+    outline: none;
+}
+
+QListWidget::item {
+    padding: 8px;
+    border-bottom: 1px solid #3a3a3a;
+    border-radius: 4px;
+    margin: 2px;
+}
+
+QListWidget::item:hover {
+    background-color: #3a3a3a;
+}
+
+QListWidget::item:selected {
+    background-color: #4fc3f7;
+    color: #1a1a1a;
+}
+
+QTextEdit {
+    background-color: #2d2d2d;
+    border: 2px solid #3a3a3a;
+    border-radius: 8px;
+    color: #e0e0e0;
+    padding: 8px;
+    font-family: Consolas, monospace;
+}
+"""
+
+MENU_STYLE = """
+QMenu {
+    background-color: #2d2d2d;
+    color: #e0e0e0;
+    border: 1px solid #3a3a3a;
+    border-radius: 4px;
+}
+
+QMenu::item:selected {
+    background-color: #4fc3f7;
+    color: #1a1a1a;
+}
+"""
+
+
+class AnimationDriver(QObject):
+    """Единый на всё приложение таймер анимаций кнопок.
+
+    Таймер работает, только пока анимируется хотя бы одна кнопка.
+    Прогресс считается по реальному времени, поэтому пропущенные кадры
+    не растягивают анимацию.
+    """
+
+    FRAME_INTERVAL = 33
+    PULSE_DURATION = 500
+
+    _instance = None
+
+    @classmethod
+    def instance(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+
+    def __init__(self):
+        super().__init__()
+        self.reduced_effects = reduced_effects_requested()
+        self._animations = {}
+        self._clock = QElapsedTimer()
+        self._clock.start()
+        self._timer = QTimer(self)
+        self._timer.setTimerType(Qt.CoarseTimer)
+        self._timer.timeout.connect(self._tick)
+
+    def start(self, button):
+        self._animations[button] = self._clock.elapsed()
+        if not self._timer.isActive():
+            self._timer.start(self.FRAME_INTERVAL)
+
+    def stop(self, button):
+        self._animations.pop(button, None)
+        if not self._animations:
+            self._timer.stop()
+
+    def is_active(self) -> bool:
+        return self._timer.isActive()
+
+    def _tick(self):
+        now = self._clock.elapsed()
+        for button, started in list(self._animations.items()):
+            progress = (now - started) / self.PULSE_DURATION
+            try:
+                if progress >= 1:
+                    del self._animations[button]
+                    button.finish_pulse()
+                else:
+                    button.update_pulse(progress)
+            except RuntimeError:
+                # Кнопка уже удалена вместе с окном
+                self._animations.pop(button, None)
+        if not self._animations:
+            self._timer.stop()
+
+    def set_reduced_effects(self, enabled: bool):
+        self.reduced_effects = enabled
+        for button in list(self._animations):
+            self.stop(button)
+            button.finish_pulse()
 
 
 class AnimatedButton(QPushButton):
-    """Кнопка с улучшенной анимацией"""
+    """Кнопка с улучшенной анимацией.
+
+    Тень создаётся только на время наведения или пульсации: кнопки в покое
+    рисуются без offscreen-эффекта. Анимации ведёт общий AnimationDriver.
+    """
 
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
         self.default_style = ""
         self.hover_style = ""
-        self._animation_timer = QTimer()
-        self._animation_timer.timeout.connect(self._animate_pulse)
-        self.pulse_count = 0
+        self.shadow = None
+        self._hovered = False
+        self._pulsing = False
+
+    def _ensure_shadow(self):
+        if AnimationDriver.instance().reduced_effects:
+            return None
+        if self.shadow is None:
+            self.shadow = QGraphicsDropShadowEffect()
+            self.shadow.setColor(QColor(0, 0, 0, 80))
+            self.setGraphicsEffect(self.shadow)
+        return self.shadow
 
-        # Эффект тени
-        self.shadow = QGraphicsDropShadowEffect()
-        self.shadow.setBlurRadius(10)
-        self.shadow.setColor(QColor(0, 0, 0, 80))
-        self.shadow.setOffset(0, 2)
-        self.setGraphicsEffect(self.shadow)
+    def _set_shadow(self, blur, offset):
+        shadow = self._ensure_shadow()
+        if shadow is not None:
+            shadow.setBlurRadius(blur)
+            shadow.setOffset(0, offset)
+
+    def _release_shadow(self):
+        if self.shadow is not None and not self._hovered and not self._pulsing:
+            # Qt удаляет старый эффект сам
+            self.setGraphicsEffect(None)
+            self.shadow = None
 
     def enterEvent(self, event):
         # Увеличиваем тень при наведении
-        self.shadow.setBlurRadius(15)
-        self.shadow.setOffset(0, 4)
+        self._hovered = True
+        self._set_shadow(15, 4)
         super().enterEvent(event)
 
     def leaveEvent(self, event):
-        # Возвращаем тень к исходному состоянию
-        self.shadow.setBlurRadius(10)
-        self.shadow.setOffset(0, 2)
+        # Убираем тень, если кнопка не пульсирует
+        self._hovered = False
+        if self._pulsing:
+            self._set_shadow(10, 2)
+        self._release_shadow()
         super().leaveEvent(event)
 
     def mousePressEvent(self, event):
-        # Убираем тень при нажатии
-        self.shadow.setBlurRadius(5)
-        self.shadow.setOffset(0, 1)
+        # Уменьшаем тень при нажатии
+        self._set_shadow(5, 1)
         super().mousePressEvent(event)
 
     def mouseReleaseEvent(self, event):
-        # Возвращаем тень после отпускания
-        self.shadow.setBlurRadius(10)
-        self.shadow.setOffset(0, 2)
-        # Запускаем анимацию пульсации
-        self.pulse_count = 0
-        self._animation_timer.start(50)
+        # Возвращаем тень после отпускания и запускаем пульсацию
+        self._set_shadow(10, 2)
+        driver = AnimationDriver.instance()
+        if not driver.reduced_effects:
+            self._pulsing = True
+            driver.start(self)
         super().mouseReleaseEvent(event)
 
-    def _animate_pulse(self):
-        """Анимация пульсации после клика"""
-        self.pulse_count += 1
-        if self.pulse_count > 10:
-            self._animation_timer.stop()
+    def update_pulse(self, progress):
+        """Кадр пульсации после клика, progress в [0, 1)"""
+        shadow = self._ensure_shadow()
+        if shadow is not None:
+            alpha = 80 + 20 * (1 - progress)
+            shadow.setColor(QColor(100, 200, 255, int(alpha)))
+
+    def finish_pulse(self):
+        self._pulsing = False
+        if self.shadow is not None:
             self.shadow.setColor(QColor(0, 0, 0, 80))
+        self._release_shadow()
+
+
+class PlotWidget(QWidget):
+    """Область графика: колесо мыши - масштаб, перетаскивание - сдвиг.
+
+    Точки берутся из FunctionSampler, который не пересчитывает уже
+    посчитанные абсциссы, поэтому сдвиг и масштаб почти ничего не вычисляют.
+    """
+
+    resampled = Signal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumSize(420, 300)
+        self.sampler = None
+        self.x_min, self.x_max = -10.0, 10.0
+        self.points = []
+        self._drag_x = None
+        self._resample_timer = QTimer(self)
+        self._resample_timer.setSingleShot(True)
+        self._resample_timer.timeout.connect(self.resample)
+
+    def set_sampler(self, sampler, x_min, x_max):
+        self.sampler = sampler
+        self.x_min, self.x_max = x_min, x_max
+        self.resample()
+
+    def resample(self):
+        if self.sampler is None:
+            return
+        self.points = self.sampler.sample(self.x_min, self.x_max, initial=max(32, self.width() // 4))
+        self.update()
+        self.resampled.emit()
+
+    def _schedule_resample(self):
+        # Серию событий колеса/мыши сводим к одному пересчёту на кадр
+        self.update()
+        self._resample_timer.start(16)
+
+    def _to_x(self, px):
+        return self.x_min + (self.x_max - self.x_min) * px / max(self.width(), 1)
+
+    def wheelEvent(self, event):
+        factor = 0.8 if event.angleDelta().y() > 0 else 1.25
+        anchor = self._to_x(event.position().x())
+        self.x_min = anchor - (anchor - self.x_min) * factor
+        self.x_max = anchor + (self.x_max - anchor) * factor
+        self._schedule_resample()
+
+    def mousePressEvent(self, event):
+        self._drag_x = event.position().x()
+
+    def mouseMoveEvent(self, event):
+        if self._drag_x is None:
+            return
+        dx = (event.position().x() - self._drag_x) * (self.x_max - self.x_min) / max(self.width(), 1)
+        self._drag_x = event.position().x()
+        self.x_min -= dx
+        self.x_max -= dx
+        self._schedule_resample()
+
+    def mouseReleaseEvent(self, event):
+        self._drag_x = None
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.fillRect(self.rect(), QColor(45, 45, 45))
+
+        visible = [(x, y) for x, y in self.points if self.x_min <= x <= self.x_max]
+        finite = [y for _, y in visible if y is not None]
+        if not finite:
+            painter.setPen(QColor(160, 160, 160))
+            painter.drawText(self.rect(), Qt.AlignCenter, "Нет точек для отображения")
             return
 
-        # Изменяем цвет тени для эффекта пульсации
-        alpha = 80 + (20 * (1 - self.pulse_count / 10))
-        self.shadow.setColor(QColor(100, 200, 255, int(alpha)))
+        y_min, y_max = min(finite), max(finite)
+        if y_max - y_min < 1e-12:
+            y_min, y_max = y_min - 1, y_max + 1
+        margin = (y_max - y_min) * 0.05
+        y_min, y_max = y_min - margin, y_max + margin
+        width, height = self.width(), self.height()
+
+        def to_px(x, y):
+            return QPointF((x - self.x_min) / (self.x_max - self.x_min) * width,
+                           height - (y - y_min) / (y_max - y_min) * height)
+
+        # Оси
+        painter.setPen(QPen(QColor(90, 90, 90), 1))
+        if self.x_min <= 0 <= self.x_max:
+            painter.drawLine(to_px(0, y_min), to_px(0, y_max))
+        if y_min <= 0 <= y_max:
+            painter.drawLine(to_px(self.x_min, 0), to_px(self.x_max, 0))
+
+        # Кривая разрывается там, где функция не определена
+        path = QPainterPath()
+        pen_down = False
+        for x, y in visible:
+            if y is None:
+                pen_down = False
+            elif pen_down:
+                path.lineTo(to_px(x, y))
+            else:
+                path.moveTo(to_px(x, y))
+                pen_down = True
+        painter.setPen(QPen(QColor(79, 195, 247), 2))
+        painter.drawPath(path)
+
+        painter.setPen(QColor(160, 160, 160))
+        painter.drawText(6, 16, f"y: [{y_min:.4g}, {y_max:.4g}]")
+        painter.drawText(6, height - 6, f"x: [{self.x_min:.4g}, {self.x_max:.4g}]")
+
+
+class PlotPanel(QWidget):
+    """Панель построения графика выражения от одной переменной"""
+
+    def __init__(self, env_provider, parent=None):
+        super().__init__(parent)
+        self.env_provider = env_provider
+        layout = QVBoxLayout(self)
+
+        controls = QHBoxLayout()
+        self.expression_field = QLineEdit()
+        self.expression_field.setPlaceholderText("Выражение от x, например sin(x) * x")
+        self.expression_field.returnPressed.connect(self.plot)
+        self.from_field = QLineEdit("-10")
+        self.to_field = QLineEdit("10")
+        for field in (self.from_field, self.to_field):
+            field.setMaximumWidth(80)
+            field.returnPressed.connect(self.plot)
+        plot_btn = QPushButton("Построить")
+        plot_btn.clicked.connect(self.plot)
+        controls.addWidget(self.expression_field, 1)
+        controls.addWidget(QLabel("от"))
+        controls.addWidget(self.from_field)
+        controls.addWidget(QLabel("до"))
+        controls.addWidget(self.to_field)
+        controls.addWidget(plot_btn)
+        layout.addLayout(controls)
+
+        self.plot_widget = PlotWidget()
+        self.plot_widget.resampled.connect(self.update_info)
+        layout.addWidget(self.plot_widget, 1)
+
+        self.info_label = QLabel("")
+        layout.addWidget(self.info_label)
+
+    def plot(self):
+        """Построение графика по введённому выражению"""
+        expression = self.expression_field.text().strip()
+        if not expression:
+            return
+        try:
+            x_min, x_max = float(self.from_field.text()), float(self.to_field.text())
+            sampler = FunctionSampler(expression, "x", self.env_provider())
+            self.plot_widget.set_sampler(sampler, x_min, x_max)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            self.info_label.setText(f"Ошибка: {e}")
+
+    def update_info(self):
+        sampler = self.plot_widget.sampler
+        if sampler is not None:
+            self.info_label.setText(f"Точек на экране: {len(self.plot_widget.points)}, "
+                                    f"всего вычислено: {sampler.evaluated}")
+
+
+class SheetPanel(QWidget):
+    """Таблица ячеек-формул с пересчётом зависимых ячеек в рабочем потоке.
+
+    Все операции с CellSheet выполняются в единственном рабочем потоке,
+    результаты возвращаются в GUI через сигналы неизменяемыми снимками
+    изменённых ячеек: поток GUI сам CellSheet не читает.
+    """
+
+    ROWS = 20
+    COLUMNS = "ABCDEFGH"
+
+    recalculated = Signal(object, float)
+    failed = Signal(str)
+
+    def __init__(self, status_callback, globals_env=None, parent=None):
+        super().__init__(parent)
+        self.status_callback = status_callback
+        self.sheet = CellSheet(globals_env)
+        # Формулы для поля ввода - копия, которую ведёт поток GUI
+        self.formulas = {}
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.recalculated.connect(self.apply_results)
+        self.failed.connect(self.show_error)
+
+        layout = QVBoxLayout(self)
+        formula_layout = QHBoxLayout()
+        self.cell_label = QLabel("A1")
+        self.cell_label.setMinimumWidth(40)
+        self.formula_field = QLineEdit()
+        self.formula_field.setPlaceholderText("Формула, например A1 * 2 + B1")
+        self.formula_field.returnPressed.connect(self.commit_formula)
+        formula_layout.addWidget(self.cell_label)
+        formula_layout.addWidget(self.formula_field, 1)
+        layout.addLayout(formula_layout)
+
+        self.table = QTableWidget(self.ROWS, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(list(self.COLUMNS))
+        self.table.setVerticalHeaderLabels([str(row + 1) for row in range(self.ROWS)])
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.currentCellChanged.connect(self.on_current_cell_changed)
+        layout.addWidget(self.table, 1)
+
+    def cell_name(self, row, column):
+        return f"{self.COLUMNS[column]}{row + 1}"
+
+    def cell_position(self, name):
+        column = self.COLUMNS.find(name[:1])
+        if column < 0 or not name[1:].isdigit() or not 1 <= int(name[1:]) <= self.ROWS:
+            return None
+        return int(name[1:]) - 1, column
+
+    def on_current_cell_changed(self, row, column, *_):
+        if row < 0 or column < 0:
+            return
+        name = self.cell_name(row, column)
+        self.cell_label.setText(name)
+        self.formula_field.setText(self.formulas.get(name, ""))
+
+    def commit_formula(self):
+        """Отправка формулы текущей ячейки на пересчёт"""
+        row, column = self.table.currentRow(), self.table.currentColumn()
+        if row < 0 or column < 0:
+            row, column = 0, 0
+        name, formula = self.cell_name(row, column), self.formula_field.text()
+        self.executor.submit(self._run, self.sheet.set_cell, name, formula)
+
+    def update_globals(self, env):
+        """Переменные калькулятора изменились - пересчитываем ячейки"""
+        self.executor.submit(self._run, self.sheet.set_globals, dict(env))
+
+    def _run(self, operation, *args):
+        # Выполняется в рабочем потоке
+        try:
+            changed = operation(*args)
+        except (ValueError, TypeError, ArithmeticError) as e:
+            self.failed.emit(str(e))
+            return
+        self.recalculated.emit(self._snapshot(changed), self.sheet.last_elapsed)
+
+    def _snapshot(self, changed):
+        """Кортеж (имя, формула, текст, подсказка) для каждой изменённой ячейки; строится в рабочем потоке."""
+        cells = []
+        for name in changed:
+            formula = self.sheet.formulas.get(name, "")
+            if name in self.sheet.errors:
+                text, tooltip = "#ОШИБКА", self.sheet.errors[name]
+            elif name in self.sheet.values:
+                text, tooltip = str(self.sheet.values[name]), formula
+            else:
+                text, tooltip = "", ""
+            cells.append((name, formula, text, tooltip))
+        return tuple(cells)
+
+    def apply_results(self, cells, elapsed):
+        for name, formula, text, tooltip in cells:
+            if formula:
+                self.formulas[name] = formula
+            else:
+                self.formulas.pop(name, None)
+            position = self.cell_position(name)
+            if position is None:
+                continue
+            item = QTableWidgetItem(text)
+            item.setToolTip(tooltip)
+            self.table.setItem(*position, item)
+        self.status_callback(f"Пересчитано ячеек: {len(cells)} за {elapsed * 1000:.2f} мс")
+
+    def show_error(self, message):
+        self.status_callback(f"Ошибка в формуле: {message}")
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+class TraceDialog(QDialog):
+    """Таблица шагов последнего вычисления с пошаговым переходом"""
+
+    HEADERS = ["#", "Токен", "Операнды", "Результат", "Глубина"]
+
+    def __init__(self, tracer, parent=None):
+        super().__init__(parent)
+        self.tracer = tracer
+        self.setWindowTitle("Трассировка вычисления")
+        self.resize(640, 420)
+        layout = QVBoxLayout(self)
+
+        self.expression_label = QLabel("")
+        layout.addWidget(self.expression_label)
+
+        self.table = QTableWidget(0, len(self.HEADERS))
+        self.table.setHorizontalHeaderLabels(self.HEADERS)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableWidget.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        layout.addWidget(self.table, 1)
+
+        buttons = QHBoxLayout()
+        for text, slot in (("◀ Назад", lambda: self.step(-1)), ("Вперёд ▶", lambda: self.step(1)),
+                           ("Экспорт JSON", self.export_json)):
+            button = QPushButton(text)
+            button.clicked.connect(slot)
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+    def refresh(self):
+        steps = list(self.tracer)
+        dropped = f" (ранние шаги вытеснены: {self.tracer.dropped})" if self.tracer.dropped else ""
+        self.expression_label.setText(f"RPN: {self.tracer.expression or '-'}{dropped}")
+        self.table.setRowCount(len(steps))
+        for row, step in enumerate(steps):
+            cells = [step.index, step.token, ", ".join(map(str, step.operands)), step.result, step.depth]
+            for column, value in enumerate(cells):
+                self.table.setItem(row, column, QTableWidgetItem(str(value)))
+        if steps:
+            self.table.selectRow(0)
+
+    def step(self, delta):
+        row = max(0, min(self.table.rowCount() - 1, self.table.currentRow() + delta))
+        self.table.selectRow(row)
+
+    def export_json(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Экспорт трассировки", "trace.json", "JSON (*.json)")
+        if path:
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(self.tracer.to_json(indent=2))
 
 
 class CalculatorGUI(QMainWindow):
-    def __init__(self):
+    def __init__(self, startup_profiler=None, backend=None):
         super().__init__()
+        self.backend = backend
         self.env = {}
-        self.history = []
+        # Новые записи слева: добавление и вытеснение за O(1)
+        self.history = deque()
+        self.history_index = HistoryIndex()
+        self.history_query = ""
+        # Номера записей, показанных фильтром (None - фильтра нет, видны все)
+        self.history_shown = None
         self.last_result = None
         self.history_visible = True
+        self.info_panel_built = False
+        self.info_panel_scheduled = False
+        self.plot_dock = None
+        self.tracer = StepTracer(capacity=2000)
+        self.trace_dialog = None
+        self.sheet_dock = None
+        self.startup_profiler = startup_profiler
         self.init_ui()
         self.apply_styles()
         self.create_menu_bar()
@@ -97,8 +775,10 @@ class CalculatorGUI(QMainWindow):
         # Левая панель с калькулятором
         left_panel = self.create_calculator_panel()
 
-        # Правая панель с историей и переменными
-        self.right_panel = self.create_info_panel()
+        # Правая панель с историей и переменными строится после первой отрисовки
+        self.right_panel = QWidget()
+        self.right_panel_layout = QVBoxLayout(self.right_panel)
+        self.right_panel_layout.setContentsMargins(0, 0, 0, 0)
 
         # Splitter для изменения размеров панелей
         self.splitter = QSplitter(Qt.Horizontal)
@@ -113,39 +793,51 @@ class CalculatorGUI(QMainWindow):
         self.setup_shortcuts()
 
     def create_menu_bar(self):
-        """Создание меню"""
+        """Создание меню: содержимое каждого меню строится при первом открытии"""
         menubar = self.menuBar()
-
-        # Меню Файл
-        file_menu = menubar.addMenu("Файл")
-
-        clear_action = QAction("Очистить все", self)
-        clear_action.setShortcut("Ctrl+Shift+C")
-        clear_action.triggered.connect(self.clear_all)
-        file_menu.addAction(clear_action)
-
+        for title, populate in (("Файл", self.populate_file_menu),
+                                ("Правка", self.populate_edit_menu),
+                                ("Вид", self.populate_view_menu)):
+            menu = menubar.addMenu(title)
+            menu.aboutToShow.connect(lambda m=menu, fill=populate: self.populate_menu(m, fill))
+
+    def populate_menu(self, menu, populate):
+        """Однократное заполнение меню перед первым показом"""
+        if menu.property("populated"):
+            return
+        menu.setProperty("populated", True)
+        menu.setStyleSheet(MENU_STYLE)
+        populate(menu)
+
+    def menu_action(self, text, shortcut, slot):
+        # Сочетание клавиш только подписывается в меню: само оно задано в setup_shortcuts,
+        # чтобы работать до первого открытия меню
+        action = QAction(f"{text}\t{shortcut}", self)
+        action.triggered.connect(slot)
+        return action
+
+    def populate_file_menu(self, file_menu):
+        file_menu.addAction(self.menu_action("Очистить все", "Ctrl+Shift+C", self.clear_all))
         file_menu.addSeparator()
+        file_menu.addAction(self.menu_action("Выход", "Ctrl+Q", self.close))
 
-        exit_action = QAction("Выход", self)
-        exit_action.setShortcut("Ctrl+Q")
-        exit_action.triggered.connect(self.close)
-        file_menu.addAction(exit_action)
-
-        # Меню Правка
-        edit_menu = menubar.addMenu("Правка")
+    def populate_edit_menu(self, edit_menu):
+        edit_menu.addAction(self.menu_action("Копировать результат", "Ctrl+R", self.copy_result))
 
-        copy_result_action = QAction("Копировать результат", self)
-        copy_result_action.setShortcut("Ctrl+R")
-        copy_result_action.triggered.connect(self.copy_result)
-        edit_menu.addAction(copy_result_action)
+    def populate_view_menu(self, view_menu):
+        self.toggle_history_action = self.menu_action("Показать/скрыть историю", "Ctrl+H", self.toggle_history)
+        view_menu.addAction(self.toggle_history_action)
 
-        # Меню Вид
-        view_menu = menubar.addMenu("Вид")
+        self.reduced_effects_action = QAction("Упрощённые эффекты", self)
+        self.reduced_effects_action.setCheckable(True)
+        self.reduced_effects_action.setChecked(AnimationDriver.instance().reduced_effects)
+        self.reduced_effects_action.toggled.connect(self.set_reduced_effects)
+        view_menu.addAction(self.reduced_effects_action)
 
-        self.toggle_history_action = QAction("Показать/скрыть историю", self)
-        self.toggle_history_action.setShortcut("Ctrl+H")
-        self.toggle_history_action.triggered.connect(self.toggle_history)
-        view_menu.addAction(self.toggle_history_action)
+        view_menu.addSeparator()
+        view_menu.addAction(self.menu_action("График функции", "Ctrl+G", self.show_plot))
+        view_menu.addAction(self.menu_action("Таблица ячеек", "Ctrl+T", self.show_sheet))
+        view_menu.addAction(self.menu_action("Трассировка вычисления", "Ctrl+J", self.show_trace))
 
     def create_status_bar(self):
         """Создание статус-бара"""
@@ -246,6 +938,35 @@ class CalculatorGUI(QMainWindow):
 
         return panel
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.info_panel_built and not self.info_panel_scheduled:
+            # Первая отрисовка состоялась - достраиваем остальное на следующей итерации цикла
+            self.info_panel_scheduled = True
+            if self.startup_profiler is not None:
+                self.startup_profiler.mark("first_paint")
+            QTimer.singleShot(0, self.ensure_info_panel)
+
+    def ensure_info_panel(self):
+        """Построение панели истории и переменных при первом обращении"""
+        if self.info_panel_built:
+            return
+        self.info_panel_built = True
+
+        panel = self.create_info_panel()
+        panel.setStyleSheet(INFO_PANEL_STYLE)
+        self.right_panel_layout.addWidget(panel)
+
+        for item in reversed(self.history):
+            self.history_list.insertItem(0, QListWidgetItem(item))
+        if not self.history_visible:
+            self.history_group.hide()
+        self.update_variables_display()
+
+        if self.startup_profiler is not None:
+            # Окно интерактивно, когда очередь событий опустела после достройки
+            QTimer.singleShot(0, lambda: self.startup_profiler.mark("interactive"))
+
     def create_info_panel(self):
         """Создание информационной панели"""
         panel = QWidget()
@@ -256,8 +977,19 @@ class CalculatorGUI(QMainWindow):
         self.history_group = QGroupBox("ИСТОРИЯ ВЫЧИСЛЕНИЙ")
         history_layout = QVBoxLayout()
 
+        self.history_search = QLineEdit()
+        self.history_search.setPlaceholderText("Поиск по истории...")
+        self.history_search.setClearButtonEnabled(True)
+        self.history_filter_timer = QTimer(self)
+        self.history_filter_timer.setSingleShot(True)
+        self.history_filter_timer.setInterval(HISTORY_FILTER_DELAY_MS)
+        self.history_filter_timer.timeout.connect(self.filter_history)
+        self.history_search.textChanged.connect(lambda _: self.history_filter_timer.start())
+        history_layout.addWidget(self.history_search)
+
         self.history_list = QListWidget()
         self.history_list.setFont(QFont("Consolas", 11))
+        self.history_list.setUniformItemSizes(True)
         self.history_list.itemDoubleClicked.connect(self.use_history_item)
         history_layout.addWidget(self.history_list)
 
@@ -297,6 +1029,13 @@ class CalculatorGUI(QMainWindow):
         QShortcut(QKeySequence("Ctrl+L"), self, self.clear_input)
         # Escape - очистить
         QShortcut(QKeySequence("Escape"), self, self.clear_input)
+        # Сочетания пунктов меню (меню строятся лениво)
+        QShortcut(QKeySequence("Ctrl+Shift+C"), self, self.clear_all)
+        QShortcut(QKeySequence("Ctrl+Q"), self, self.close)
+        QShortcut(QKeySequence("Ctrl+R"), self, self.copy_result)
+        QShortcut(QKeySequence("Ctrl+G"), self, self.show_plot)
+        QShortcut(QKeySequence("Ctrl+T"), self, self.show_sheet)
+        QShortcut(QKeySequence("Ctrl+J"), self, self.show_trace)
 
     def on_input_changed(self, text):
         """Обновление автодополнения при изменении текста"""
@@ -340,18 +1079,33 @@ class CalculatorGUI(QMainWindow):
             return
 
         try:
+            # Команды solve/minimize численного решателя
+            solved = run_solver_command(expression, self.env)
+            if solved is not None:
+                self.last_result = solved.x
+                text = format_solver_result(expression, solved)
+                self.result_label.setText(text)
+                self.add_to_history(f"{expression}: {text}")
+                self.animate_result(success=True)
+                self.status_bar.showMessage("Решение найдено", 3000)
+                return
+
+            # Определение пользовательской функции: f(x, y) = тело
+            function = define_function(expression, self.env)
+            if function is not None:
+                self.result_label.setText(f"Функция {function.name} определена")
+                self.add_to_history(str(function))
+                self.on_env_changed()
+                self.animate_result(success=True)
+                self.status_bar.showMessage("Функция определена", 3000)
+                return
+
             # Проверка на присваивание
-            var_name = None
-            if '=' in expression:
-                parts = expression.split('=', 1)
-                var_name = parts[0].strip()
-                expression = parts[1].strip()
-                if not var_name.isidentifier():
-                    raise ValueError(f"Недопустимое имя переменной: {var_name}")
+            var_name, expression = split_assignment(expression)
 
             # Парсинг и вычисление
             rpn_expr = parse_str_infix(expression) if is_infix(expression) else parse_str_postfix(expression)
-            result = rpn_calculator(rpn_expr, self.env)
+            result = rpn_calculator(rpn_expr, self.env, tracer=self.tracer, backend=self.backend)
             self.last_result = result
 
             # Обновление интерфейса
@@ -359,7 +1113,7 @@ class CalculatorGUI(QMainWindow):
                 self.env[var_name] = result
                 self.result_label.setText(f"{var_name} = {result}")
                 self.add_to_history(f"{var_name} = {expression} = {result}")
-                self.update_variables_display()
+                self.on_env_changed()
             else:
                 self.result_label.setText(f"= {result}")
                 self.add_to_history(f"{expression} = {result}")
@@ -378,15 +1132,49 @@ class CalculatorGUI(QMainWindow):
 
     def add_to_history(self, item):
         """Добавление в историю"""
+        self.ensure_info_panel()
+        entry_id = self.history_index.add(item)
         list_item = QListWidgetItem(item)
+        list_item.setData(Qt.UserRole, entry_id)
         self.history_list.insertItem(0, list_item)
-        self.history.insert(0, item)
+        self.history.appendleft(item)
+        if self.history_shown is not None:
+            if self.history_index.matches(entry_id, self.history_query):
+                self.history_shown.add(entry_id)
+            else:
+                self.history_list.setRowHidden(0, True)
 
         # Ограничение истории
-        while self.history_list.count() > 100:
-            self.history_list.takeItem(100)
+        while self.history_list.count() > HISTORY_LIMIT:
+            oldest = self.history_list.takeItem(HISTORY_LIMIT)
+            self.history_index.remove(oldest.data(Qt.UserRole))
+            if self.history_shown is not None:
+                self.history_shown.discard(oldest.data(Qt.UserRole))
             self.history.pop()
 
+    def filter_history(self):
+        """ Фильтрация истории по индексу (после паузы в наборе запроса).
+
+        Строки только скрываются, виджеты не пересоздаются; переключаются
+        лишь строки, чья видимость изменилась по сравнению с прошлым запросом.
+        """
+        self.history_query = self.history_search.text().strip()
+        shown = set(self.history_index.search(self.history_query)) if self.history_query else None
+        previous = self.history_shown
+        self.history_shown = shown
+        if shown is None and previous is None:
+            return
+        if shown is None or previous is None:
+            changed = self.history_index.ids() - (shown if shown is not None else previous)
+        else:
+            changed = shown ^ previous
+        last_id = self.history_index.last_id
+        for entry_id in changed:
+            # Новые записи вставляются сверху, поэтому номер записи однозначно задаёт строку
+            self.history_list.setRowHidden(last_id - entry_id, shown is not None and entry_id not in shown)
+        if shown is not None:
+            self.status_bar.showMessage(f"Найдено записей: {len(shown)}", 3000)
+
     def use_history_item(self, item):
         """Использование элемента истории"""
         text = item.text()
@@ -398,10 +1186,12 @@ class CalculatorGUI(QMainWindow):
 
     def update_variables_display(self):
         """Обновление отображения переменных"""
+        self.ensure_info_panel()
         if not self.env:
             self.vars_text.setText("Нет сохраненных переменных")
         else:
-            vars_text = "\n".join([f"{k} = {v}" for k, v in sorted(self.env.items())])
+            vars_text = "\n".join([str(v) if isinstance(v, UserFunction) else f"{k} = {v}"
+                                   for k, v in sorted(self.env.items())])
             self.vars_text.setText(vars_text)
 
     def clear_variables(self):
@@ -414,11 +1204,12 @@ class CalculatorGUI(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.env.clear()
-            self.update_variables_display()
+            self.on_env_changed()
             self.status_bar.showMessage("Все переменные очищены", 3000)
 
     def clear_history(self):
         """Очистка истории"""
+        self.ensure_info_panel()
         if self.history_list.count() == 0:
             return
 
@@ -428,6 +1219,8 @@ class CalculatorGUI(QMainWindow):
         if reply == QMessageBox.Yes:
             self.history_list.clear()
             self.history.clear()
+            self.history_index.clear()
+            self.history_shown = set() if self.history_shown is not None else None
             self.status_bar.showMessage("История очищена", 3000)
 
     def clear_input(self):
@@ -444,10 +1237,13 @@ class CalculatorGUI(QMainWindow):
                                      QMessageBox.Yes | QMessageBox.No)
         if reply == QMessageBox.Yes:
             self.clear_input()
+            self.ensure_info_panel()
             self.history_list.clear()
             self.history.clear()
+            self.history_index.clear()
+            self.history_shown = set() if self.history_shown is not None else None
             self.env.clear()
-            self.update_variables_display()
+            self.on_env_changed()
             self.status_bar.showMessage("Все данные очищены", 3000)
 
     def copy_result(self):
@@ -458,6 +1254,7 @@ class CalculatorGUI(QMainWindow):
 
     def toggle_history(self):
         """Переключение видимости истории"""
+        self.ensure_info_panel()
         if self.history_visible:
             # Скрываем историю
             self.history_group.hide()
@@ -475,8 +1272,56 @@ class CalculatorGUI(QMainWindow):
             total = sum(self.splitter.sizes())
             self.splitter.setSizes([total * 2 // 3, total // 3])
 
+    def show_plot(self):
+        """Показ панели графика (создаётся при первом вызове)"""
+        if self.plot_dock is None:
+            self.plot_dock = QDockWidget("ГРАФИК", self)
+            self.plot_dock.setWidget(PlotPanel(lambda: dict(self.env)))
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.plot_dock)
+        self.plot_dock.show()
+        self.plot_dock.raise_()
+        self.plot_dock.widget().expression_field.setFocus()
+
+    def show_sheet(self):
+        """Показ таблицы ячеек (создаётся при первом вызове)"""
+        if self.sheet_dock is None:
+            self.sheet_dock = QDockWidget("ТАБЛИЦА", self)
+            self.sheet_dock.setWidget(SheetPanel(lambda message: self.status_bar.showMessage(message, 5000),
+                                                 self.env))
+            self.addDockWidget(Qt.BottomDockWidgetArea, self.sheet_dock)
+        self.sheet_dock.show()
+        self.sheet_dock.raise_()
+        self.sheet_dock.widget().formula_field.setFocus()
+
+    def show_trace(self):
+        """Пошаговый просмотр последнего вычисления"""
+        if self.trace_dialog is None:
+            self.trace_dialog = TraceDialog(self.tracer, self)
+        self.trace_dialog.refresh()
+        self.trace_dialog.show()
+        self.trace_dialog.raise_()
+
+    def on_env_changed(self):
+        """Уведомление зависимых представлений об изменении переменных"""
+        self.update_variables_display()
+        if self.sheet_dock is not None:
+            self.sheet_dock.widget().update_globals(self.env)
+
+    def closeEvent(self, event):
+        if self.sheet_dock is not None:
+            self.sheet_dock.widget().shutdown()
+        super().closeEvent(event)
+
+    def set_reduced_effects(self, enabled):
+        """Включение/выключение теней и пульсации (для удалённых сеансов)"""
+        AnimationDriver.instance().set_reduced_effects(enabled)
+        self.status_bar.showMessage("Упрощённые эффекты включены" if enabled else "Эффекты включены", 2000)
+
     def animate_result(self, success=True):
         """Анимация результата"""
+        if AnimationDriver.instance().reduced_effects:
+            return
+
         # Создаем эффект свечения для результата
         glow = QGraphicsDropShadowEffect()
         glow.setBlurRadius(20)
@@ -493,243 +1338,76 @@ class CalculatorGUI(QMainWindow):
         QTimer.singleShot(1000, lambda: self.result_label.setGraphicsEffect(None))
 
     def apply_styles(self):
-        """Применение стилей"""
-        style = """
-        QMainWindow {
-            background-color: #1a1a1a;
-        }
-
-        QGroupBox {
-            font-size: 14px;
-            font-weight: bold;
-            color: #ffffff;
-            border: 2px solid #444444;
-            border-radius: 12px;
-            margin-top: 15px;
-            padding-top: 15px;
-            background-color: #252525;
-        }
-
-        QGroupBox::title {
-            subcontrol-origin: margin;
-            subcontrol-position: top center;
-            padding: 5px 20px;
-            background-color: #333333;
-            border-radius: 6px;
-            letter-spacing: 1px;
-        }
-
-        QLineEdit {
-            background-color: #2d2d2d;
-            border: 2px solid #3a3a3a;
-            border-radius: 8px;
-            padding: 10px;
-            color: #ffffff;
-            font-size: 15px;
-            selection-background-color: #4fc3f7;
-        }
-
-        QLineEdit:focus {
-            border-color: #4fc3f7;
-            background-color: #333333;
-        }
-
-        QLineEdit[readOnly="true"] {
-            color: #4fc3f7;
-            background-color: #2d2d2d;
-            border: 2px solid #3a3a3a;
-            border-radius: 8px;
-            padding: 10px;
-        }
-
-        QPushButton {
-            background-color: #3a3a3a;
-            border: none;
-            border-radius: 8px;
-            color: white;
-            padding: 10px;
-            font-weight: bold;
-            min-height: 25px;
-        }
-
-        QPushButton:hover {
-            background-color: #4a4a4a;
-        }
-
-        QPushButton:pressed {
-            background-color: #2a2a2a;
-            padding: 11px 9px 9px 11px;
-        }
-
-        QPushButton[button_type="number"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #4a4a4a, stop: 1 #3a3a3a);
-        }
-
-        QPushButton[button_type="number"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #5a5a5a, stop: 1 #4a4a4a);
-        }
-
-        QPushButton[button_type="operator"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #ff7b45, stop: 1 #ff5b25);
-        }
-
-        QPushButton[button_type="operator"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #ff9b65, stop: 1 #ff7b45);
-        }
-
-        QPushButton[button_type="function"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #8c5dff, stop: 1 #6c3dff);
-        }
-
-        QPushButton[button_type="function"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #ac7dff, stop: 1 #8c5dff);
-        }
-
-        QPushButton[button_type="equals"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #10d863, stop: 1 #00b843);
-            font-size: 18px;
-        }
-
-        QPushButton[button_type="equals"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #30f883, stop: 1 #10d863);
-        }
-
-        QPushButton[button_type="clear"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #ff4848, stop: 1 #ff2828);
-        }
-
-        QPushButton[button_type="clear"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #ff6868, stop: 1 #ff4848);
-        }
-
-        QPushButton[button_type="constant"] {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #31a6f3, stop: 1 #1186d3);
-        }
-
-        QPushButton[button_type="constant"]:hover {
-            background: qlineargradient(x1: 0, y1: 0, x2: 0, y2: 1,
-                                        stop: 0 #51c6f3, stop: 1 #31a6f3);
-        }
-
-        QListWidget {
-            background-color: #2d2d2d;
-            border: 2px solid #3a3a3a;
-            border-radius: 8px;
-            color: #e0e0e0;
-            padding: 8px;
-            outline: none;
-        }
-
-        QListWidget::item {
-            padding: 8px;
-            border-bottom: 1px solid #3a3a3a;
-            border-radius: 4px;
-            margin: 2px;
-        }
-
-        QListWidget::item:hover {
-            background-color: #3a3a3a;
-        }
-
-        QListWidget::item:selected {
-            background-color: #4fc3f7;
-            color: #1a1a1a;
-        }
-
-        QTextEdit {
-            background-color: #2d2d2d;
-            border: 2px solid #3a3a3a;
-            border-radius: 8px;
-            color: #e0e0e0;
-            padding: 8px;
-            font-family: Consolas, monospace;
-        }
-
-        QSplitter::handle {
-            background-color: #3a3a3a;
-            width: 3px;
-            border-radius: 1px;
-        }
-
-        QSplitter::handle:hover {
-            background-color: #4fc3f7;
-        }
-
-        QStatusBar {
-            background-color: #242424;
-            color: #a0a0a0;
-            border-top: 1px solid #3a3a3a;
-            font-size: 12px;
-        }
-
-        QMenuBar {
-            background-color: #242424;
-            color: #e0e0e0;
-            border-bottom: 1px solid #3a3a3a;
-        }
-
-        QMenuBar::item:selected {
-            background-color: #3a3a3a;
-        }
-
-        QMenu {
-            background-color: #2d2d2d;
-            color: #e0e0e0;
-            border: 1px solid #3a3a3a;
-            border-radius: 4px;
-        }
-
-        QMenu::item:selected {
-            background-color: #4fc3f7;
-            color: #1a1a1a;
-        }
-
-        QMessageBox {
-            background-color: #2d2d2d;
-            color: #e0e0e0;
-        }
-        """
-        self.setStyleSheet(style)
+        """Применение стилей видимой при старте части окна"""
+        self.setStyleSheet(MAIN_STYLE)
+
+
+class StartupProfiler(QObject):
+    """Замер холодного старта: время до первой отрисовки и до интерактивности"""
+
+    def __init__(self, started_at=None):
+        super().__init__()
+        self.started_at = time.perf_counter() if started_at is None else started_at
+        self.marks = {}
 
+    def mark(self, name):
+        if name in self.marks:
+            return
+        self.marks[name] = time.perf_counter() - self.started_at
+        if name == "interactive":
+            self.report()
+
+    def report(self):
+        print("Профиль запуска:")
+        for name, seconds in self.marks.items():
+            print(f"  {name:<14} {seconds * 1000:8.1f} мс")
+
+
+# Тёмная тема: роль палитры и её цвет
+DARK_PALETTE_COLORS = (
+    (QPalette.Window, QColor(26, 26, 26)),
+    (QPalette.WindowText, Qt.white),
+    (QPalette.Base, QColor(45, 45, 45)),
+    (QPalette.AlternateBase, QColor(60, 60, 60)),
+    (QPalette.ToolTipBase, Qt.white),
+    (QPalette.ToolTipText, Qt.white),
+    (QPalette.Text, Qt.white),
+    (QPalette.Button, QColor(45, 45, 45)),
+    (QPalette.ButtonText, Qt.white),
+    (QPalette.BrightText, Qt.red),
+    (QPalette.Link, QColor(42, 130, 218)),
+    (QPalette.Highlight, QColor(42, 130, 218)),
+    (QPalette.HighlightedText, Qt.black),
+)
+
+
+def run_gui(reduced_effects=None, startup_profile=False, started_at=None, backend=None):
+    """Запуск GUI приложения
+
+    reduced_effects=None - определить режим эффектов автоматически.
+    startup_profile - напечатать время до первой отрисовки и до интерактивности,
+    started_at - момент старта процесса по time.perf_counter().
+    backend - числовой бэкенд сеанса (None - float).
+    """
+    profiler = StartupProfiler(started_at) if startup_profile else None
 
-def run_gui():
-    """Запуск GUI приложения"""
     app = QApplication.instance()
     if app is None:
         app = QApplication(sys.argv)
 
+    if reduced_effects is not None:
+        AnimationDriver.instance().reduced_effects = reduced_effects
+
     # Установка темной темы
     app.setStyle("Fusion")
-
-    # Настройка темной палитры
     dark_palette = QPalette()
-    dark_palette.setColor(QPalette.Window, QColor(26, 26, 26))
-    dark_palette.setColor(QPalette.WindowText, Qt.white)
-    dark_palette.setColor(QPalette.Base, QColor(45, 45, 45))
-    dark_palette.setColor(QPalette.AlternateBase, QColor(60, 60, 60))
-    dark_palette.setColor(QPalette.ToolTipBase, Qt.white)
-    dark_palette.setColor(QPalette.ToolTipText, Qt.white)
-    dark_palette.setColor(QPalette.Text, Qt.white)
-    dark_palette.setColor(QPalette.Button, QColor(45, 45, 45))
-    dark_palette.setColor(QPalette.ButtonText, Qt.white)
-    dark_palette.setColor(QPalette.BrightText, Qt.red)
-    dark_palette.setColor(QPalette.Link, QColor(42, 130, 218))
-    dark_palette.setColor(QPalette.Highlight, QColor(42, 130, 218))
-    dark_palette.setColor(QPalette.HighlightedText, Qt.black)
+    for role, color in DARK_PALETTE_COLORS:
+        dark_palette.setColor(role, color)
     app.setPalette(dark_palette)
 
-    calculator = CalculatorGUI()
+    calculator = CalculatorGUI(startup_profiler=profiler, backend=backend)
+    if profiler is not None:
+        profiler.mark("window_created")
     calculator.show()
 
     sys.exit(app.exec())
@@ -0,0 +1,198 @@
+import math
+from collections import ChainMap
+
+from .calculator import apply_binary, apply_unary, apply_ternary, finalize_result, _floordiv, _mod
+from .compiler import compile_rpn, CompiledExpression, CONST, VAR, UNARY, BINARY, CALL
+from .functions import UserFunction, user_functions
+from .limits import DEFAULT_BUDGET, EvaluationBudget
+from .parser import parse_expression
+
+
+class Dual:
+    """ Многомерное дуальное число: значение и частные производные по всем переменным сразу """
+
+    __slots__ = ("value", "grad")
+
+    def __init__(self, value, grad: list):
+        self.value = value
+        self.grad = grad
+
+    def __repr__(self):
+        return f"Dual({self.value!r}, {self.grad!r})"
+
+
+def _scale(k, grad):
+    return [k * g for g in grad]
+
+
+def _combine(ka, ga, kb, gb):
+    return [ka * x + kb * y for x, y in zip(ga, gb)]
+
+
+def _power(a: Dual, b: Dual) -> Dual:
+    value = a.value ** b.value
+    if not any(b.grad):
+        # Постоянный показатель: d(a^n) = n a^(n-1) da
+        if not any(a.grad):
+            return Dual(value, a.grad)
+        return Dual(value, _scale(b.value * a.value ** (b.value - 1), a.grad))
+    if a.value <= 0:
+        raise ValueError("Производная a^b по показателю определена только при a > 0")
+    return Dual(value, _combine(value * b.value / a.value, a.grad, value * math.log(a.value), b.grad))
+
+
+def _mod_dual(a: Dual, b: Dual) -> Dual:
+    value = _mod(a.value, b.value)
+    return Dual(value, _combine(1, a.grad, -math.floor(a.value / b.value), b.grad))
+
+
+DUAL_BINARY = {
+    "+": lambda a, b: Dual(a.value + b.value, _combine(1, a.grad, 1, b.grad)),
+    "-": lambda a, b: Dual(a.value - b.value, _combine(1, a.grad, -1, b.grad)),
+    "*": lambda a, b: Dual(a.value * b.value, _combine(b.value, a.grad, a.value, b.grad)),
+    # Целочисленное деление кусочно-постоянно: производная равна нулю
+    "//": lambda a, b: Dual(_floordiv(a.value, b.value), [0.0] * len(a.grad)),
+    "%": _mod_dual,
+    "^": _power,
+}
+
+
+def _log10_derivative(x):
+    if x <= 0: raise ValueError("Логарифм от неположительного числа")
+    return 1 / (x * math.log(10))
+
+
+def _ln_derivative(x):
+    if x <= 0: raise ValueError("Натуральный логарифм от неположительного числа")
+    return 1 / x
+
+
+# Производные унарных функций по аргументу
+DUAL_UNARY = {
+    "neg": lambda x: -1,
+    "sqrt": lambda x: 0.5 / math.sqrt(x),
+    "sin": math.cos,
+    "cos": lambda x: -math.sin(x),
+    "tan": lambda x: 1 / math.cos(x) ** 2,
+    "abs": lambda x: (x > 0) - (x < 0),
+    "log": _log10_derivative,
+    "ln": _ln_derivative,
+}
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _lift(value, size: int) -> Dual:
+    if isinstance(value, Dual):
+        return value
+    if not _is_scalar(value):
+        raise TypeError("Дифференцирование поддерживается только для скалярных выражений")
+    return Dual(value, [0.0] * size)
+
+
+def _primal(value):
+    return value.value if isinstance(value, Dual) else value
+
+
+def gradient(expression: str, env: dict = None, variables=None, budget: EvaluationBudget = None):
+    """ Значение выражения и точные частные производные за один проход.
+
+    Выражение (инфиксное или RPN) вычисляется один раз на дуальных числах,
+    несущих производные сразу по всем переменным. variables - имена, по
+    которым дифференцировать (по умолчанию все скалярные переменные
+    выражения). Ограничения budget проверяются по значениям, как в
+    rpn_calculator. Возвращает (значение, {имя: производная}).
+    """
+
+    env = env or {}
+    compiled = compile_rpn(parse_expression(expression), functions=user_functions(env))
+    if variables is None:
+        variables = [name for name in compiled.variables if _is_scalar(env.get(name))]
+    names = list(variables)
+    seeds = {}
+    for position, name in enumerate(names):
+        if not _is_scalar(env.get(name)):
+            raise TypeError(f"Переменная {name} должна быть задана числом")
+        grad = [0.0] * len(names)
+        grad[position] = 1.0
+        seeds[name] = Dual(env[name], grad)
+
+    result = evaluate_dual(compiled, env, seeds, budget=budget)
+    return finalize_result(result.value), dict(zip(names, result.grad))
+
+
+def evaluate_dual(compiled: CompiledExpression, env: dict, seeds: dict, size: int = None,
+                  budget: EvaluationBudget = None) -> Dual:
+    """Вычисление скомпилированного выражения, где seeds - {имя: Dual} для дифференцируемых переменных."""
+    if size is None:
+        size = len(next(iter(seeds.values())).grad) if seeds else 0
+    budget = budget or DEFAULT_BUDGET
+    budget.check_operations(compiled.operations)
+    for constant in compiled._vector_constants:
+        budget.check_vector(constant)
+    stack = []
+    for kind, arg in compiled.instructions:
+        if kind == CONST:
+            stack.append(arg)
+        elif kind == VAR:
+            if arg in seeds:
+                stack.append(seeds[arg])
+            elif arg in env:
+                budget.check_vector(env[arg])
+                stack.append(env[arg])
+            elif arg in compiled.literals:
+                stack.append(compiled.literals[arg])
+            else:
+                raise ValueError(f"'{arg}' - неизвестная переменная или некорректный токен")
+        elif kind == BINARY:
+            b, a = stack.pop(), stack.pop()
+            budget.check_binary(arg, _primal(a), _primal(b))
+            if not isinstance(a, Dual) and not isinstance(b, Dual):
+                result = apply_binary(arg, a, b)
+                budget.check_vector(result)
+                stack.append(result)
+            elif arg in DUAL_BINARY:
+                stack.append(DUAL_BINARY[arg](_lift(a, size), _lift(b, size)))
+            else:
+                raise TypeError(f"Оператор {arg} не дифференцируется")
+        elif kind == UNARY:
+            a = stack.pop()
+            if not isinstance(a, Dual):
+                result = apply_unary(arg, a)
+                budget.check_vector(result)
+                stack.append(result)
+            elif arg in DUAL_UNARY:
+                stack.append(Dual(apply_unary(arg, a.value), _scale(DUAL_UNARY[arg](a.value), a.grad)))
+            else:
+                raise TypeError(f"Функция {arg} не дифференцируется")
+        elif kind == CALL:
+            name, arity = arg
+            function = env.get(name)
+            if not isinstance(function, UserFunction) or function.arity != arity:
+                raise TypeError(f"'{name}' не является функцией с {arity} аргументами")
+            args = stack[len(stack) - arity:]
+            del stack[len(stack) - arity:]
+            stack.append(_call_dual(function, args, seeds, size, budget))
+        else:
+            c, b, a = stack.pop(), stack.pop(), stack.pop()
+            if any(isinstance(x, Dual) for x in (a, b, c)):
+                raise TypeError(f"Оператор {arg} не дифференцируется")
+            result = apply_ternary(arg, a, b, c)
+            budget.check_vector(result)
+            stack.append(result)
+
+    return _lift(stack[0], size)
+
+
+def _call_dual(function: UserFunction, args: list, seeds: dict, size: int, budget: EvaluationBudget):
+    """Вызов пользовательской функции: тело вычисляется на дуальных числах, если они есть среди входов."""
+    if not any(isinstance(a, Dual) for a in args) and not any(
+            name in seeds for name in function.compiled.variables if name not in function.params):
+        return function(*args, budget=budget)
+    # Свободные переменные тела, по которым дифференцируем, остаются дуальными
+    inner_seeds = {name: dual for name, dual in seeds.items() if name not in function.params}
+    inner_seeds.update((p, a) for p, a in zip(function.params, args) if isinstance(a, Dual))
+    local = {p: a for p, a in zip(function.params, args) if not isinstance(a, Dual)}
+    return evaluate_dual(function.compiled, ChainMap(local, function.scope), inner_seeds, size, budget)
@@ -0,0 +1,157 @@
+import decimal
+import math
+
+from .calculator import apply_binary, apply_unary, apply_ternary, finalize_result
+from .matrix import is_matrix
+from .vectors import parse_vector, is_vector
+
+
+class FloatBackend:
+    """ Текущее поведение: все литералы - float, результат округляется finalize_result """
+
+    name = "float"
+    coerce = None
+
+    parse_operand = staticmethod(parse_vector)
+    binary = staticmethod(apply_binary)
+    unary = staticmethod(apply_unary)
+    ternary = staticmethod(apply_ternary)
+    finalize = staticmethod(finalize_result)
+
+
+def _is_integer_literal(token: str) -> bool:
+    return token.lstrip("+-").isdigit()
+
+
+class IntegerBackend(FloatBackend):
+    """ Целые литералы остаются int: +, -, *, //, %, ^ над ними точны при любой длине """
+
+    name = "int"
+
+    @staticmethod
+    def parse_operand(token: str):
+        if _is_integer_literal(token):
+            return int(token)
+        return parse_vector(token)
+
+    @staticmethod
+    def finalize(value):
+        return value if isinstance(value, int) else finalize_result(value)
+
+
+class DecimalBackend:
+    """ Десятичная арифметика decimal.Decimal с заданной точностью.
+
+    Скаляры - Decimal, операции выполняются в собственном контексте
+    (глобальный контекст decimal не меняется). Векторы и матрицы остаются
+    float: в операциях с ними Decimal приводится к float. sin, cos, tan
+    считаются через float.
+    """
+
+    name = "decimal"
+
+    def __init__(self, precision: int = 28):
+        if precision < 1:
+            raise ValueError("Точность Decimal должна быть положительной")
+        self.precision = precision
+        self.context = decimal.Context(prec=precision, traps=[decimal.InvalidOperation,
+                                                              decimal.DivisionByZero, decimal.Overflow])
+
+    def parse_operand(self, token: str):
+        if token[:1] in ("[", "{"):
+            return parse_vector(token)
+        try:
+            return self.context.create_decimal(token)
+        except decimal.InvalidOperation:
+            raise ValueError(f"Некорректное число: {token}") from None
+
+    def coerce(self, value):
+        if isinstance(value, float):
+            return self.context.create_decimal(repr(value))
+        if isinstance(value, int) and not isinstance(value, bool):
+            return decimal.Decimal(value)
+        return value
+
+    @staticmethod
+    def _to_float(value):
+        return float(value) if isinstance(value, decimal.Decimal) else value
+
+    def _floor_divmod(self, a, b):
+        if b == 0:
+            raise ZeroDivisionError("Деление на ноль")
+        quotient, remainder = self.context.divide_int(a, b), self.context.remainder(a, b)
+        # Decimal округляет частное к нулю, а калькулятор - вниз, как int и float
+        if remainder and (remainder < 0) != (b < 0):
+            quotient, remainder = quotient - 1, remainder + b
+        return quotient, remainder
+
+    def binary(self, token: str, a, b):
+        if is_vector(a) or is_vector(b) or is_matrix(a) or is_matrix(b):
+            return apply_binary(token, self._to_float(a), self._to_float(b))
+        ctx = self.context
+        if token == "+":
+            return ctx.add(a, b)
+        if token == "-":
+            return ctx.subtract(a, b)
+        if token == "*":
+            return ctx.multiply(a, b)
+        if token == "//":
+            return self._floor_divmod(a, b)[0]
+        if token == "%":
+            if b == 0:
+                raise ZeroDivisionError("Деление на ноль по модулю")
+            return self._floor_divmod(a, b)[1]
+        if token == "^":
+            return ctx.power(a, b)
+        return apply_binary(token, a, b)
+
+    def unary(self, token: str, a):
+        if not isinstance(a, decimal.Decimal):
+            return apply_unary(token, a)
+        ctx = self.context
+        if token == "neg":
+            return ctx.minus(a)
+        if token == "abs":
+            return ctx.abs(a)
+        if token == "sqrt":
+            if a < 0:
+                raise ValueError("Корень из отрицательного числа")
+            return ctx.sqrt(a)
+        if token in ("ln", "log"):
+            if a <= 0:
+                raise ValueError("Логарифм от неположительного числа")
+            return ctx.ln(a) if token == "ln" else ctx.log10(a)
+        if token in ("sin", "cos", "tan"):
+            return ctx.create_decimal_from_float(getattr(math, token)(float(a)))
+        return apply_unary(token, a)
+
+    def ternary(self, token: str, a, b, c):
+        return apply_ternary(token, *(int(x) if isinstance(x, decimal.Decimal) and x == x.to_integral_value()
+                                      else x for x in (a, b, c)))
+
+    def finalize(self, value):
+        if isinstance(value, decimal.Decimal):
+            if value.is_finite() and value == value.to_integral_value():
+                return int(value)
+            return self.context.plus(value)
+        return finalize_result(value)
+
+
+FLOAT_BACKEND = FloatBackend()
+INT_BACKEND = IntegerBackend()
+
+
+def get_backend(spec: str = "float"):
+    """Бэкенд по имени: float, int или decimal[:точность], например decimal:50."""
+    name, _, precision = spec.strip().lower().partition(":")
+    if name == "float":
+        return FLOAT_BACKEND
+    if name == "int":
+        return INT_BACKEND
+    if name == "decimal":
+        if not precision:
+            return DecimalBackend()
+        if not precision.isdigit():
+            raise ValueError(f"Некорректная точность Decimal: {precision}")
+        return DecimalBackend(int(precision))
+    raise ValueError(f"Неизвестный числовой бэкенд: {spec} (доступны float, int, decimal[:точность])")
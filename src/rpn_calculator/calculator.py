@@ -1,8 +1,14 @@
 import math
+import operator
 
 from .parser import parse_str_infix, is_infix, parse_str_postfix
 from .vectors import (parse_vector, vector_abs, is_vector, vector_neg, vector_angle,
-                      vector_scalar_mul, vector_sub, vector_add)
+                      vector_scalar_mul, vector_sub, vector_add, vector_dot, vector_cross,
+                      vector_sum, vector_mean, vector_min, vector_max, vector_elementwise, vector_map,
+                      densify)
+from .limits import DEFAULT_BUDGET, EvaluationBudget
+from .matrix import is_matrix, matrix_binary, matrix_unary
+from .functions import UserFunction, define_function
 
 CONSTANTS = {
     "pi": math.pi,
@@ -28,137 +34,407 @@ class Stack:
         return len(self.data)
 
 
-def rpn_calculator(ex: str, variables: dict = None):
-    """ RPN калькулятор с вычислением через Stack """
+BINARY_OPERATORS = {"+", "-", "*", "//", "%", "^", "angle", "dot", "cross", "matmul", "solve"}
+UNARY_OPERATORS = {"neg", "sqrt", "sin", "cos", "tan", "abs", "log", "ln",
+                   "sum", "mean", "min", "max", "norm", "transpose", "det", "inv"}
+# Операторы, определённые только для матриц
+MATRIX_BINARY = {"matmul", "solve"}
+MATRIX_UNARY = {"transpose", "det", "inv"}
+TERNARY_OPERATORS = {"powmod"}
+
+
+def _floordiv(a, b):
+    if b == 0: raise ZeroDivisionError("Деление на ноль")
+    return a // b
+
+
+def _mod(a, b):
+    if b == 0: raise ZeroDivisionError("Деление на ноль по модулю")
+    return a % b
+
+
+def _log10(a):
+    if a <= 0: raise ValueError("Логарифм от неположительного числа")
+    return math.log10(a)
+
+
+def _ln(a):
+    if a <= 0: raise ValueError("Натуральный логарифм от неположительного числа")
+    return math.log(a)
+
+
+# Скалярные функции; к векторам применяются поэлементно
+SCALAR_FUNCTIONS = {
+    "sqrt": math.sqrt,
+    "sin": math.sin,
+    "cos": math.cos,
+    "tan": math.tan,
+    "log": _log10,
+    "ln": _ln,
+}
+
+# Свёртки вектора в скаляр
+VECTOR_REDUCTIONS = {
+    "sum": vector_sum,
+    "mean": vector_mean,
+    "min": vector_min,
+    "max": vector_max,
+    "norm": vector_abs,
+}
+
+
+def apply_binary(token: str, a, b):
+    """ Применение бинарного оператора к двум операндам """
+
+    if token in MATRIX_BINARY or is_matrix(a) or is_matrix(b):
+        return matrix_binary(token, densify(a), densify(b))
+    if token == "+":
+        if is_vector(a) and is_vector(b):
+            return vector_add(a, b)
+        elif not is_vector(a) and not is_vector(b):
+            return a + b
+        else:
+            raise TypeError("Нельзя складывать вектор и скаляр")
+    elif token == "-":
+        if is_vector(a) and is_vector(b):
+            return vector_sub(a, b)
+        elif not is_vector(a) and not is_vector(b):
+            return a - b
+        else:
+            raise TypeError("Нельзя вычитать вектор и скаляр")
+    elif token == "*":
+        if is_vector(a) and not is_vector(b):
+            return vector_scalar_mul(a, b)
+        elif not is_vector(a) and is_vector(b):
+            return vector_scalar_mul(b, a)
+        elif not is_vector(a) and not is_vector(b):
+            return a * b
+        else:
+            return vector_elementwise(operator.mul, a, b)
+    elif token == "//":
+        if is_vector(a) or is_vector(b):
+            return vector_elementwise(_floordiv, a, b)
+        return _floordiv(a, b)
+    elif token == "%":
+        if is_vector(a) or is_vector(b):
+            return vector_elementwise(_mod, a, b)
+        return _mod(a, b)
+    elif token == "^":
+        if is_vector(a) or is_vector(b):
+            return vector_elementwise(operator.pow, a, b)
+        return a ** b
+    elif token in ("angle", "dot", "cross"):
+        if not is_vector(a) or not is_vector(b):
+            raise TypeError(f"Оператор {token} применим только к двум векторам")
+        if token == "angle":
+            return vector_angle(a, b)
+        elif token == "dot":
+            return vector_dot(a, b)
+        return vector_cross(a, b)
+    raise ValueError(f"Неизвестный оператор: {token}")
+
+
+def apply_unary(token: str, a):
+    """ Применение унарной функции к операнду """
+
+    if is_matrix(a):
+        return matrix_unary(token, a)
+    if token in MATRIX_UNARY:
+        raise TypeError(f"Функция {token} применима только к матрице")
+    if token == "neg":
+        return vector_neg(a) if is_vector(a) else -a
+    elif token == "abs":
+        return vector_abs(a) if is_vector(a) else abs(a)
+    elif token in VECTOR_REDUCTIONS:
+        if not is_vector(a):
+            raise TypeError(f"Функция {token} применима только к вектору")
+        return VECTOR_REDUCTIONS[token](a)
+    elif token in SCALAR_FUNCTIONS:
+        function = SCALAR_FUNCTIONS[token]
+        return vector_map(function, a) if is_vector(a) else function(a)
+    raise ValueError(f"Неизвестная функция: {token}")
+
+
+def _as_integer(value, name: str) -> int:
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    raise TypeError(f"{name} должен быть целым числом, получено: {value}")
+
+
+def apply_ternary(token: str, a, b, c):
+    """ Применение тернарного оператора к трём операндам """
+
+    if token == "powmod":
+        if any(is_vector(x) or is_matrix(x) for x in (a, b, c)):
+            raise TypeError("powmod не применим к вектору или матрице")
+        base, exponent, modulus = (_as_integer(a, "Основание"), _as_integer(b, "Показатель"),
+                                   _as_integer(c, "Модуль"))
+        if modulus == 0:
+            raise ValueError("powmod по нулевому модулю")
+        return pow(base, exponent, modulus)
+    raise ValueError(f"Неизвестный оператор: {token}")
+
+
+def finalize_result(result):
+    """ Округление итогового значения так, как его показывает калькулятор """
+
+    if isinstance(result, float) and not result.is_integer():
+        return round(result, 10)
+    if isinstance(result, float) and result.is_integer():
+        return int(result)
+    return result
+
+
+def rpn_calculator(ex: str, variables: dict = None, budget: EvaluationBudget = None, tracer=None,
+                   backend=None):
+    """ RPN калькулятор с вычислением через Stack
+
+    budget ограничивает ресурсы вычисления (по умолчанию DEFAULT_BUDGET),
+    tracer (StepTracer) записывает каждый шаг вычисления, backend - числовой
+    бэкенд из backends.py (по умолчанию float).
+    """
+
+    result = evaluate_rpn(ex, variables, budget, tracer, backend)
+    return (backend.finalize if backend is not None else finalize_result)(result)
+
+
+def evaluate_rpn(ex: str, variables: dict = None, budget: EvaluationBudget = None, tracer=None,
+                 backend=None):
+    """rpn_calculator без округления итогового значения (тела функций под бэкендом)."""
 
     stack = Stack()
     variables = variables or {}
+    budget = budget or DEFAULT_BUDGET
+    operations = 0
+    if tracer is not None:
+        tracer.start(ex)
+    if backend is None:
+        parse_operand, binary, unary, ternary = parse_vector, apply_binary, apply_unary, apply_ternary
+        coerce = None
+    else:
+        parse_operand, binary, unary, ternary = backend.parse_operand, backend.binary, backend.unary, backend.ternary
+        coerce = backend.coerce
 
     for token in ex.split():
 
         # Бинарные операторы
-        if token in {"+", "-", "*", "//", "%", "^", "angle"}:
+        if token in BINARY_OPERATORS:
             if stack.size() < 2:
                 raise ValueError(f"Недостаточно операндов для оператора: {token}")
+            operations += 1
+            budget.check_operations(operations)
             b, a = stack.pop(), stack.pop()
-
-            result = None
-            if token == "+":
-                if is_vector(a) and is_vector(b):
-                    result = vector_add(a, b)
-                elif not is_vector(a) and not is_vector(b):
-                    result = a + b
-                else:
-                    raise TypeError("Нельзя складывать вектор и скаляр")
-            elif token == "-":
-                if is_vector(a) and is_vector(b):
-                    result = vector_sub(a, b)
-                elif not is_vector(a) and not is_vector(b):
-                    result = a - b
-                else:
-                    raise TypeError("Нельзя вычитать вектор и скаляр")
-            elif token == "*":
-                if is_vector(a) and not is_vector(b):
-                    result = vector_scalar_mul(a, b)
-                elif not is_vector(a) and is_vector(b):
-                    result = vector_scalar_mul(b, a)
-                elif not is_vector(a) and not is_vector(b):
-                    result = a * b
-                else:
-                    raise TypeError("Умножение вектора на вектор не поддерживается (используйте angle или dot)")
-            elif token == "//":
-                if b == 0: raise ZeroDivisionError("Деление на ноль")
-                result = a // b
-            elif token == "%":
-                if b == 0: raise ZeroDivisionError("Деление на ноль по модулю")
-                result = a % b
-            elif token == "^":
-                result = a ** b
-            elif token == "angle":
-                result = vector_angle(a, b)
-
+            budget.check_binary(token, a, b)
+            result = binary(token, a, b)
+            budget.check_vector(result)
             stack.push(result)
+            if tracer is not None:
+                tracer.record(token, (a, b), result, stack.size())
 
         # Унарные операторы
-        elif token in {"neg", "sqrt", "sin", "cos", "tan", "abs", "log", "ln"}:
+        elif token in UNARY_OPERATORS:
             if stack.size() < 1:
                 raise ValueError(f"Недостаточно операндов для функции: {token}")
+            operations += 1
+            budget.check_operations(operations)
             a = stack.pop()
+            result = unary(token, a)
+            budget.check_vector(result)
+            stack.push(result)
+            if tracer is not None:
+                tracer.record(token, (a,), result, stack.size())
 
-            result = None
-            if token == "neg":
-                result = vector_neg(a) if is_vector(a) else -a
-            elif token == "abs":
-                result = vector_abs(a) if is_vector(a) else abs(a)
-            elif is_vector(a):
-                raise TypeError(f"Функция {token} не применима к вектору")
-            elif token == "sqrt":
-                result = math.sqrt(a)
-            elif token == "sin":
-                result = math.sin(a)
-            elif token == "cos":
-                result = math.cos(a)
-            elif token == "tan":
-                result = math.tan(a)
-            elif token == "log":
-                if a <= 0: raise ValueError("Логарифм от неположительного числа")
-                result = math.log10(a)
-            elif token == "ln":
-                if a <= 0: raise ValueError("Натуральный логарифм от неположительного числа")
-                result = math.log(a)
-
+        # Тернарные операторы
+        elif token in TERNARY_OPERATORS:
+            if stack.size() < 3:
+                raise ValueError(f"Недостаточно операндов для оператора: {token}")
+            operations += 1
+            budget.check_operations(operations)
+            c, b, a = stack.pop(), stack.pop(), stack.pop()
+            result = ternary(token, a, b, c)
+            budget.check_vector(result)
             stack.push(result)
+            if tracer is not None:
+                tracer.record(token, (a, b, c), result, stack.size())
 
-        # Числа, векторы или переменные
+        # Переменные или пользовательские функции: проверяются до разбора литерала,
+        # чтобы не ловить исключение float() на каждой переменной
+        elif token in variables:
+            val = variables[token]
+            if coerce is not None:
+                val = coerce(val)
+            if isinstance(val, UserFunction):
+                if stack.size() < val.arity:
+                    raise ValueError(f"Недостаточно аргументов для функции: {token}")
+                operations += 1
+                budget.check_operations(operations)
+                args = tuple(reversed([stack.pop() for _ in range(val.arity)]))
+                result = val(*args, budget=budget, backend=backend)
+                stack.push(result)
+                if tracer is not None:
+                    tracer.record(token, args, result, stack.size())
+                continue
+            budget.check_vector(val)
+            stack.push(val)
+            if tracer is not None:
+                tracer.record(token, (), val, stack.size())
+
+        # Числа и векторы
         else:
             try:
-                val = parse_vector(token)
-                stack.push(val)
+                val = parse_operand(token)
             except ValueError:
-                if token in variables:
-                    stack.push(variables[token])
-                else:
-                    raise ValueError(f"'{token}' - неизвестная переменная или некорректный токен")
+                raise ValueError(f"'{token}' - неизвестная переменная или некорректный токен") from None
+            budget.check_vector(val)
+            stack.push(val)
+            if tracer is not None:
+                tracer.record(token, (), val, stack.size())
 
     if stack.size() != 1:
         raise ValueError(f"В конце вычислений в стеке осталось более одного элемента: {stack.data}")
 
-    result = stack.pop()
-    if isinstance(result, float) and not result.is_integer():
-        return round(result, 10)
-    if isinstance(result, float) and result.is_integer():
-        return int(result)
-    return result
+    return stack.pop()
 
 
-def evaluate_program(lines: list[str]) -> dict:
-    """ Обрабатывает список строк-программ """
+# Операторы, которые над столбцами из одних чисел применяются без разбора типов в apply_*
+BATCH_SCALAR_BINARY = {"+": operator.add, "-": operator.sub, "*": operator.mul, "//": _floordiv, "%": _mod}
+BATCH_SCALAR_UNARY = dict(SCALAR_FUNCTIONS, neg=operator.neg, abs=abs)
+_NUMBER_TYPES = (int, float)
 
-    env = {}
-    last_result = None
-    for line in lines:
-        line = line.strip()
-        if not line:
+
+def _is_number_column(values) -> bool:
+    return all(type(value) in _NUMBER_TYPES for value in values)
+
+
+def _check_batch_tokens(tokens: list, columns: dict):
+    """Неизвестное имя - ошибка всей пачки до вычислений, а не на первой строке."""
+    for token in tokens:
+        if (token in BINARY_OPERATORS or token in UNARY_OPERATORS or token in TERNARY_OPERATORS
+                or token in columns):
             continue
+        try:
+            parse_vector(token)
+        except ValueError:
+            raise ValueError(f"'{token}' - неизвестная переменная или некорректный токен") from None
+
+
+def rpn_calculator_batch(ex: str, columns: dict, size: int, budget: EvaluationBudget = None) -> list:
+    """ Векторизованное вычисление RPN сразу для size строк.
+
+    columns - словарь {имя: список значений длины size}. Каждый токен
+    обрабатывается один раз для всей пачки, а не один раз на строку;
+    над столбцами из одних чисел операторы применяются напрямую через map.
+    Имена проверяются до вычислений, ошибка в любой строке прерывает
+    вычисление всей пачки.
+    """
+
+    stack = Stack()
+    budget = budget or DEFAULT_BUDGET
+    operations = 0
+    tokens = ex.split()
+    _check_batch_tokens(tokens, columns)
+
+    for token in tokens:
+        if token in BINARY_OPERATORS:
+            if stack.size() < 2:
+                raise ValueError(f"Недостаточно операндов для оператора: {token}")
+            operations += 1
+            budget.check_operations(operations)
+            b, a = stack.pop(), stack.pop()
+            if token in ("^", "*", "matmul"):
+                for x, y in zip(a, b):
+                    budget.check_binary(token, x, y)
+            function = BATCH_SCALAR_BINARY.get(token)
+            if function is not None and _is_number_column(a) and _is_number_column(b):
+                stack.push(list(map(function, a, b)))
+            else:
+                stack.push([apply_binary(token, x, y) for x, y in zip(a, b)])
+        elif token in UNARY_OPERATORS:
+            if stack.size() < 1:
+                raise ValueError(f"Недостаточно операндов для функции: {token}")
+            operations += 1
+            budget.check_operations(operations)
+            a = stack.pop()
+            function = BATCH_SCALAR_UNARY.get(token)
+            if function is not None and _is_number_column(a):
+                stack.push(list(map(function, a)))
+            else:
+                stack.push([apply_unary(token, x) for x in a])
+        elif token in TERNARY_OPERATORS:
+            if stack.size() < 3:
+                raise ValueError(f"Недостаточно операндов для оператора: {token}")
+            operations += 1
+            budget.check_operations(operations)
+            c, b, a = stack.pop(), stack.pop(), stack.pop()
+            stack.push([apply_ternary(token, x, y, z) for x, y, z in zip(a, b, c)])
+        elif token in columns:
+            stack.push(columns[token])
+        else:
+            try:
+                val = parse_vector(token)
+            except ValueError:
+                raise ValueError(f"'{token}' - неизвестная переменная или некорректный токен") from None
+            budget.check_vector(val)
+            stack.push([val] * size)
+
+    if stack.size() != 1:
+        raise ValueError(f"В конце вычислений в стеке осталось более одного элемента: {stack.data}")
+
+    return [finalize_result(value) for value in stack.pop()]
+
 
-        var_name = None
-        expression = line
-        if '=' in line:
-            parts = line.split('=', 1)
-            var_name = parts[0].strip()
-            expression = parts[1].strip()
-            if not var_name.isidentifier():
-                raise ValueError(f"Недопустимое имя переменной: {var_name}")
+def evaluate_program(lines: list[str], budget: EvaluationBudget = None, evaluator=None, backend=None) -> dict:
+    """ Обрабатывает список строк-программ
 
+    evaluator - необязательный объект с методом evaluate(expression, env, budget),
+    например TieredEvaluator, который переиспользуется между запусками.
+    backend - числовой бэкенд; evaluator получает его аргументом backend.
+    """
+
+    def evaluate(expression: str, env: dict):
+        if evaluator is not None:
+            return (evaluator.evaluate(expression, env, budget) if backend is None
+                    else evaluator.evaluate(expression, env, budget, backend=backend))
         rpn_expr = parse_str_infix(expression) if is_infix(expression) else parse_str_postfix(expression)
+        return rpn_calculator(rpn_expr, env, budget, backend=backend)
+
+    return run_lines(lines, {}, evaluate)
+
 
-        result = rpn_calculator(rpn_expr, env)
+def split_assignment(line: str):
+    """'name = expr' -> (name, expr), просто выражение -> (None, expr)."""
+    if '=' not in line:
+        return None, line.strip()
+    var_name, expression = (part.strip() for part in line.split('=', 1))
+    if not var_name.isidentifier():
+        raise ValueError(f"Недопустимое имя переменной: {var_name}")
+    return var_name, expression
 
+
+def run_lines(lines: list[str], env: dict, evaluate) -> dict:
+    """ Выполнение строк программы в env; evaluate(выражение, env) возвращает значение.
+
+    Общий цикл evaluate_program и EvaluationContext.run_program: пустые
+    строки пропускаются, определения функций сохраняются в env. Если
+    последняя непустая строка - выражение без присваивания, его значение
+    записывается в env['_last'].
+    """
+    last_result, last_is_expression = None, False
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if define_function(line, env) is not None:
+            last_is_expression = False
+            continue
+        var_name, expression = split_assignment(line)
+        result = evaluate(expression, env)
         if var_name:
             env[var_name] = result
-        last_result = result
+        last_result, last_is_expression = result, var_name is None
 
-    if last_result is not None and not lines[-1].strip().count('='):
+    if last_is_expression:
         env['_last'] = last_result
-
     return env
@@ -0,0 +1,136 @@
+from .calculator import (BINARY_OPERATORS, UNARY_OPERATORS, TERNARY_OPERATORS, apply_binary, apply_unary,
+                         apply_ternary, rpn_calculator)
+from .functions import user_functions
+from .limits import DEFAULT_BUDGET, BudgetExceededError, EvaluationBudget
+from .matrix import is_matrix
+from .parser import parse_expression
+from .vectors import parse_vector, is_sparse
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+# Операторы, для которых порядок операндов не важен
+COMMUTATIVE = {"+", "*", "dot"}
+ARITY = {**{token: 2 for token in BINARY_OPERATORS}, **{token: 1 for token in UNARY_OPERATORS},
+         **{token: 3 for token in TERNARY_OPERATORS}}
+
+
+def _format_number(value) -> str:
+    if isinstance(value, float) and value.is_integer() and abs(value) < 1e16:
+        return str(int(value))
+    return repr(value)
+
+
+def format_literal(value) -> str:
+    """Запись значения в виде литерала RPN (обратная parse_vector)."""
+    if isinstance(value, list):
+        return "[" + ",".join(map(_format_number, value)) + "]"
+    if is_matrix(value):
+        return "[" + ",".join(format_literal(row) for row in value.tolist()) + "]"
+    if is_sparse(value):
+        items = ",".join(f"{i}:{_format_number(v)}" for i, v in zip(value.indices, value.values))
+        return f"{{{value.size};{items}}}"
+    return _format_number(value)
+
+
+def _fold(token: str, operands: list):
+    """Значение оператора над литералами или None, если сворачивать нельзя."""
+    if not all(isinstance(operand, (int, float)) for operand in operands):
+        # Размер векторов проверяет бюджет конкретного вычисления
+        return None
+    try:
+        if ARITY[token] == 2:
+            DEFAULT_BUDGET.check_binary(token, *operands)
+            return (apply_binary(token, *operands),)
+        if ARITY[token] == 1:
+            return (apply_unary(token, *operands),)
+        return (apply_ternary(token, *operands),)
+    except (BudgetExceededError,) + EVALUATION_ERRORS:
+        # Ошибка должна проявиться при вычислении, а не при нормализации
+        return None
+
+
+def canonical_rpn(expression: str, functions: dict = None, variables: dict = None) -> str:
+    """ Каноническая запись выражения в RPN.
+
+    Пробелы и лишние скобки исчезают при переводе в RPN, числа
+    записываются единообразно (3.0 -> 3), подвыражения из одних литералов
+    сворачиваются, а операнды коммутативных операторов (+, *, dot)
+    сортируются. functions - {имя: функция с атрибутом arity} для
+    пользовательских функций; variables - окружение, в котором переменные
+    inf, nan и подобные важнее одноимённых литералов.
+    """
+
+    arities = dict(ARITY)
+    for name, function in (functions or {}).items():
+        arities[name] = function.arity
+
+    # Стек узлов: (запись RPN, значение литерала или None)
+    stack = []
+    for token in parse_expression(expression).split():
+        arity = arities.get(token)
+        if arity is None:
+            if variables is not None and token.isidentifier() and token in variables:
+                stack.append((token, None))
+                continue
+            try:
+                value = parse_vector(token)
+            except ValueError:
+                stack.append((token, None))
+            else:
+                stack.append((format_literal(value), (value,)))
+            continue
+
+        if len(stack) < arity:
+            raise ValueError(f"Недостаточно операндов для {token}")
+        operands = stack[len(stack) - arity:]
+        del stack[len(stack) - arity:]
+
+        if token in ARITY and all(literal is not None for _, literal in operands):
+            folded = _fold(token, [literal[0] for _, literal in operands])
+            if folded is not None:
+                stack.append((format_literal(folded[0]), folded))
+                continue
+
+        if token in COMMUTATIVE:
+            operands.sort(key=lambda node: node[0])
+        stack.append((" ".join([text for text, _ in operands] + [token]), None))
+
+    if len(stack) != 1:
+        raise ValueError(f"В конце вычислений в стеке осталось {len(stack)} элементов вместо одного")
+    return stack[0][0]
+
+
+def evaluate_unique(expressions: list[str], variables: dict = None, budget: EvaluationBudget = None) -> dict:
+    """ Вычисление пачки выражений, где каждое каноническое выражение считается один раз.
+
+    Возвращает словарь: results - значения в порядке выражений (None для
+    ошибок), errors - {номер: текст ошибки}, total/unique - число выражений
+    и различных канонических форм, dedup_ratio - доля сэкономленных
+    вычислений (1 - unique / total). Пользовательские функции берутся из
+    variables.
+    """
+
+    functions = user_functions(variables)
+    canonical_by_text = {}
+    values = {}
+    results, errors = [], {}
+    for index, expression in enumerate(expressions):
+        try:
+            key = canonical_by_text.get(expression)
+            if key is None:
+                key = canonical_by_text[expression] = canonical_rpn(expression, functions, variables)
+            if key not in values:
+                try:
+                    values[key] = (rpn_calculator(key, variables, budget), None)
+                except EVALUATION_ERRORS as e:
+                    values[key] = (None, str(e))
+            value, error = values[key]
+        except EVALUATION_ERRORS as e:
+            value, error = None, str(e)
+
+        if error is not None:
+            errors[index] = error
+        results.append(list(value) if isinstance(value, list) else value)
+
+    total, unique = len(expressions), len(values)
+    return {"results": results, "errors": errors, "total": total, "unique": unique,
+            "dedup_ratio": 1 - unique / total if total else 0.0}
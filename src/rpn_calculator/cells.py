@@ -0,0 +1,143 @@
+import time
+from collections import ChainMap
+
+from .compiler import compile_rpn
+from .functions import user_functions
+from .parser import parse_expression
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+
+class CycleError(ValueError):
+    """Формула ячейки образует циклическую зависимость."""
+
+
+class CellSheet:
+    """ Таблица ячеек-формул с графом зависимостей.
+
+    Ячейка хранит выражение, которое может ссылаться на другие ячейки
+    (и на внешние переменные globals_env). При изменении ячейки
+    пересчитываются только её транзитивные зависимые в топологическом
+    порядке. Класс не потокобезопасен: все вызовы должны идти из одного
+    потока (в GUI - из единственного рабочего потока).
+    """
+
+    def __init__(self, globals_env: dict = None):
+        self.globals_env = dict(globals_env or {})
+        self.formulas = {}
+        self.values = {}
+        self.errors = {}
+        self._compiled = {}
+        self._dependencies = {}
+        self._dependents = {}
+        self.last_recalculated = 0
+        self.last_elapsed = 0.0
+
+    def _depends_on(self, start: str, target: str) -> bool:
+        """Зависит ли start (транзитивно) от target."""
+        seen, stack = set(), [start]
+        while stack:
+            name = stack.pop()
+            if name == target:
+                return True
+            if name in seen:
+                continue
+            seen.add(name)
+            stack.extend(self._dependencies.get(name, ()))
+        return False
+
+    def set_cell(self, name: str, expression: str) -> dict:
+        """Изменение формулы ячейки (пустая строка удаляет ячейку).
+
+        Возвращает {имя: значение или None при ошибке} для пересчитанных ячеек.
+        При синтаксической ошибке или цикле таблица не меняется.
+        """
+        if not name.isidentifier():
+            raise ValueError(f"Недопустимое имя ячейки: {name}")
+        expression = expression.strip()
+
+        if expression:
+            compiled = compile_rpn(parse_expression(expression), functions=user_functions(self.globals_env))
+            references = set(compiled.variables)
+            for reference in references:
+                if reference == name or self._depends_on(reference, name):
+                    raise CycleError(f"Циклическая зависимость: {name} -> {reference} -> ... -> {name}")
+        else:
+            compiled, references = None, set()
+
+        for reference in self._dependencies.pop(name, ()):
+            self._dependents[reference].discard(name)
+        if compiled is None:
+            self.formulas.pop(name, None)
+            self._compiled.pop(name, None)
+        else:
+            self.formulas[name] = expression
+            self._compiled[name] = compiled
+            self._dependencies[name] = references
+            for reference in references:
+                self._dependents.setdefault(reference, set()).add(name)
+
+        return self.recalculate(self.plan(name))
+
+    def plan(self, name: str) -> list[str]:
+        """Ячейка name и её транзитивные зависимые в топологическом порядке."""
+        affected, stack = set(), [name]
+        while stack:
+            current = stack.pop()
+            if current not in affected:
+                affected.add(current)
+                stack.extend(self._dependents.get(current, ()))
+
+        return self._order(affected)
+
+    def _order(self, affected: set) -> list[str]:
+        # Алгоритм Кана на подграфе affected
+        indegree = {cell: 0 for cell in affected}
+        for cell in affected:
+            for reference in self._dependencies.get(cell, ()):
+                if reference in affected:
+                    indegree[cell] += 1
+        ready = sorted(cell for cell, degree in indegree.items() if degree == 0)
+        order = []
+        while ready:
+            cell = ready.pop()
+            order.append(cell)
+            for dependent in self._dependents.get(cell, ()):
+                if dependent in indegree:
+                    indegree[dependent] -= 1
+                    if indegree[dependent] == 0:
+                        ready.append(dependent)
+        return order
+
+    def recalculate(self, order: list[str]) -> dict:
+        """Пересчёт ячеек в заданном порядке."""
+        start = time.perf_counter()
+        changed = {}
+        env = ChainMap(self.values, self.globals_env)
+        for name in order:
+            self.values.pop(name, None)
+            self.errors.pop(name, None)
+            compiled = self._compiled.get(name)
+            if compiled is None:
+                changed[name] = None
+                continue
+
+            failed = [ref for ref in compiled.variables if ref in self.errors]
+            if failed:
+                self.errors[name] = f"Зависит от ячейки с ошибкой: {failed[0]}"
+                changed[name] = None
+                continue
+            try:
+                self.values[name] = compiled.evaluate(env)
+            except EVALUATION_ERRORS as e:
+                self.errors[name] = str(e)
+            changed[name] = self.values.get(name)
+
+        self.last_recalculated = len(changed)
+        self.last_elapsed = time.perf_counter() - start
+        return changed
+
+    def set_globals(self, globals_env: dict) -> dict:
+        """Замена внешних переменных с пересчётом всех ячеек."""
+        self.globals_env = dict(globals_env)
+        return self.recalculate(self._order(set(self.formulas)))
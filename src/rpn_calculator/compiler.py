@@ -0,0 +1,203 @@
+import operator
+from collections import ChainMap
+
+from .calculator import (BINARY_OPERATORS, UNARY_OPERATORS, TERNARY_OPERATORS,
+                         apply_binary, apply_unary, apply_ternary, finalize_result)
+from .limits import DEFAULT_BUDGET, EvaluationBudget, BudgetExceededError
+from .functions import UserFunction
+from .vectors import parse_vector
+
+CONST, VAR, UNARY, BINARY, TERNARY, CALL = range(6)
+ARITY = {UNARY: 1, BINARY: 2, TERNARY: 3}
+BUILTIN_TOKENS = BINARY_OPERATORS | UNARY_OPERATORS | TERNARY_OPERATORS
+FOLD_ERRORS = (ValueError, TypeError, ArithmeticError)
+# Неизменяемые значения: результат для тех же объектов в слотах можно переиспользовать
+MEMO_TYPES = (int, float)
+
+
+class CompiledExpression:
+    """ RPN-выражение, разобранное один раз.
+
+    Литералы уже преобразованы в числа и векторы, константные подвыражения
+    свёрнуты, операторы заранее классифицированы, поэтому при вычислении
+    не остаётся ни разбора строк, ни исключений на каждую переменную.
+
+    Имена переменных и функций заранее пронумерованы (slots): окружение
+    можно передать кортежем значений в этом порядке (run_slots), а
+    словарь превращается в такой кортеж один раз за вычисление (bind).
+    Если все значения - те же неизменяемые числа, что и при прошлом
+    вычислении, результат берётся из прошлого вычисления.
+
+    Токены вроде inf и nan - и имена, и литералы: как и в rpn_calculator,
+    переменная с таким именем важнее литерала (literals - значения без неё).
+    """
+
+    def __init__(self, rpn: str, instructions: list, literals: dict = None):
+        self.rpn = rpn
+        self.instructions = instructions
+        self.operations = sum(1 for kind, _ in instructions if kind != CONST and kind != VAR)
+        self.variables = tuple(dict.fromkeys(arg for kind, arg in instructions if kind == VAR))
+        self.functions = tuple(dict.fromkeys(arg[0] for kind, arg in instructions if kind == CALL))
+        self.literals = literals or {}
+        self.slots = self.variables + tuple(name for name in self.functions if name not in self.variables)
+        slot_of = {name: index for index, name in enumerate(self.slots)}
+        self._code = [(kind, slot_of[arg]) if kind == VAR
+                      else (kind, (slot_of[arg[0]],) + arg) if kind == CALL
+                      else (kind, arg) for kind, arg in instructions]
+        # Векторы и матрицы среди литералов проверяются бюджетом один раз за вычисление
+        self._vector_constants = tuple(arg for kind, arg in instructions
+                                       if kind == CONST and not isinstance(arg, (int, float)))
+        # (значения слотов, бюджет, результат) последнего вычисления без вызовов функций
+        self._memo = None
+
+    def evaluate(self, variables: dict = None, budget: EvaluationBudget = None):
+        result = self.run(variables, budget)
+        return list(result) if isinstance(result, list) else finalize_result(result)
+
+    def bind(self, variables: dict = None) -> tuple:
+        """Значения слотов из словаря переменных в порядке slots."""
+        variables = variables if variables is not None else {}
+        try:
+            return tuple(map(variables.__getitem__, self.slots))
+        except KeyError as e:
+            name = e.args[0]
+            if name in self.literals and name not in variables:
+                return self.bind(ChainMap(variables, self.literals))
+            if name in self.functions and name not in self.variables:
+                arity = next(arg[1] for kind, arg in self.instructions if kind == CALL and arg[0] == name)
+                raise TypeError(f"'{name}' не является функцией с {arity} аргументами") from None
+            raise ValueError(f"'{name}' - неизвестная переменная или некорректный токен") from None
+
+    def run(self, variables: dict = None, budget: EvaluationBudget = None):
+        """Вычисление без округления итогового значения (для численных методов)."""
+        return self.run_slots(self.bind(variables), budget)
+
+    def run_slots(self, values: tuple, budget: EvaluationBudget = None):
+        """Вычисление по значениям слотов (кортеж в порядке self.slots)."""
+        budget = budget or DEFAULT_BUDGET
+        budget.check_operations(self.operations)
+        for constant in self._vector_constants:
+            budget.check_vector(constant)
+        memo = self._memo
+        if (memo is not None and memo[1] is budget and len(memo[0]) == len(values)
+                and all(map(operator.is_, memo[0], values))):
+            return memo[2]
+
+        stack = []
+        push, pop = stack.append, stack.pop
+        for kind, arg in self._code:
+            if kind == CONST:
+                push(arg)
+            elif kind == VAR:
+                value = values[arg]
+                budget.check_vector(value)
+                push(value)
+            elif kind == BINARY:
+                b, a = pop(), pop()
+                budget.check_binary(arg, a, b)
+                result = apply_binary(arg, a, b)
+                budget.check_vector(result)
+                push(result)
+            elif kind == UNARY:
+                result = apply_unary(arg, pop())
+                budget.check_vector(result)
+                push(result)
+            elif kind == CALL:
+                slot, name, arity = arg
+                function = values[slot]
+                if not isinstance(function, UserFunction) or function.arity != arity:
+                    raise TypeError(f"'{name}' не является функцией с {arity} аргументами")
+                args = stack[len(stack) - arity:]
+                del stack[len(stack) - arity:]
+                push(function(*args, budget=budget))
+            else:
+                c, b, a = pop(), pop(), pop()
+                result = apply_ternary(arg, a, b, c)
+                budget.check_vector(result)
+                push(result)
+
+        result = stack[0]
+        if not self.functions and type(result) in MEMO_TYPES and all(type(v) in MEMO_TYPES for v in values):
+            self._memo = (values, budget, result)
+        return result
+
+    def __repr__(self):
+        return f"CompiledExpression({self.rpn!r})"
+
+
+def _try_fold(kind: int, token: str, operands: list):
+    """Вычисление оператора над литералами на этапе компиляции (None - свернуть нельзя)."""
+    if not all(isinstance(operand, (int, float)) for operand in operands):
+        # Размер векторов проверяет бюджет конкретного вычисления
+        return None
+    try:
+        if kind == BINARY:
+            DEFAULT_BUDGET.check_binary(token, *operands)
+            return (apply_binary(token, *operands),)
+        if kind == UNARY:
+            return (apply_unary(token, *operands),)
+        return (apply_ternary(token, *operands),)
+    except (BudgetExceededError,) + FOLD_ERRORS:
+        # Ошибку покажем при вычислении, как это делает rpn_calculator
+        return None
+
+
+def compile_rpn(rpn: str, fold: bool = True, functions: dict = None) -> CompiledExpression:
+    """ Компиляция RPN-строки в CompiledExpression
+
+    functions - {имя: UserFunction}; такие токены компилируются в вызовы,
+    сама функция берётся из переменных в момент вычисления.
+    """
+
+    instructions = []
+    literals = {}
+    depth = 0
+    functions = functions or {}
+    for token in rpn.split():
+        if token in functions:
+            arity = functions[token].arity
+            if depth < arity:
+                raise ValueError(f"Недостаточно аргументов для функции: {token}")
+            depth -= arity - 1
+            instructions.append((CALL, (token, arity)))
+            continue
+        if token in BINARY_OPERATORS:
+            kind = BINARY
+        elif token in UNARY_OPERATORS:
+            kind = UNARY
+        elif token in TERNARY_OPERATORS:
+            kind = TERNARY
+        else:
+            try:
+                value = parse_vector(token)
+            except ValueError:
+                instructions.append((VAR, token))
+            else:
+                if token.isidentifier():
+                    # inf, nan: переменная с таким именем важнее литерала
+                    literals[token] = value
+                    instructions.append((VAR, token))
+                else:
+                    instructions.append((CONST, value))
+            depth += 1
+            continue
+
+        arity = ARITY[kind]
+        if depth < arity:
+            kind_name = "функции" if kind == UNARY else "оператора"
+            raise ValueError(f"Недостаточно операндов для {kind_name}: {token}")
+        depth -= arity - 1
+
+        tail = instructions[-arity:]
+        if fold and all(op_kind == CONST for op_kind, _ in tail):
+            folded = _try_fold(kind, token, [value for _, value in tail])
+            if folded is not None:
+                del instructions[-arity:]
+                instructions.append((CONST, folded[0]))
+                continue
+        instructions.append((kind, token))
+
+    if depth != 1:
+        raise ValueError(f"В конце вычислений в стеке осталось {depth} элементов вместо одного")
+
+    return CompiledExpression(rpn, instructions, literals)
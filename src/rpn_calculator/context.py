@@ -0,0 +1,164 @@
+import threading
+from collections.abc import Mapping, MutableMapping
+
+from .calculator import rpn_calculator, run_lines, split_assignment
+from .functions import UserFunction, define_function, parse_function_definition
+from .limits import EvaluationBudget
+from .parser import parse_expression
+
+
+def _freeze(value):
+    # Векторы копируются при записи, чтобы снимок не зависел от списков вызывающего кода
+    return list(value) if isinstance(value, list) else value
+
+
+class EnvironmentSnapshot(Mapping):
+    """ Неизменяемый снимок переменных.
+
+    Снимок никогда не меняется после создания: with_updates возвращает
+    новый снимок (copy-on-write), старый остаётся доступен читателям.
+    """
+
+    __slots__ = ("_data", "version")
+
+    def __init__(self, data: dict = None, version: int = 0):
+        self._data = {name: _freeze(value) for name, value in (data or {}).items()}
+        self.version = version
+
+    def __getitem__(self, name):
+        return self._data[name]
+
+    def __iter__(self):
+        return iter(self._data)
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def with_updates(self, updates: dict) -> "EnvironmentSnapshot":
+        snapshot = EnvironmentSnapshot(version=self.version + 1)
+        snapshot._data = dict(self._data)
+        snapshot._data.update((name, _freeze(value)) for name, value in updates.items())
+        return snapshot
+
+    def to_dict(self) -> dict:
+        return {name: _freeze(value) for name, value in self._data.items()}
+
+    def __repr__(self):
+        return f"EnvironmentSnapshot(version={self.version}, {self._data!r})"
+
+
+class _LiveScope(MutableMapping):
+    """ Окружение функций контекста: чтение - из вычисляемого снимка, запись - публикация нового.
+
+    Используется как scope пользовательских функций. Пока поток вычисляет
+    выражение против снимка (bind), свободные переменные тела читаются из
+    этого снимка, иначе - из текущего. Записывать можно только под замком
+    писателей контекста.
+    """
+
+    def __init__(self, context: "EvaluationContext"):
+        self._context = context
+        self._local = threading.local()
+
+    def bind(self, snapshot):
+        """Снимок для чтения в этом потоке; возвращает прежний для восстановления."""
+        previous = getattr(self._local, "snapshot", None)
+        self._local.snapshot = snapshot
+        return previous
+
+    def _current(self):
+        snapshot = getattr(self._local, "snapshot", None)
+        return snapshot if snapshot is not None else self._context._snapshot
+
+    def __getitem__(self, name):
+        return self._current()[name]
+
+    def __setitem__(self, name, value):
+        self._context._snapshot = self._context._snapshot.with_updates({name: value})
+
+    def __delitem__(self, name):
+        raise TypeError("Переменные контекста не удаляются")
+
+    def __iter__(self):
+        return iter(self._current())
+
+    def __len__(self):
+        return len(self._current())
+
+
+class EvaluationContext:
+    """ Потокобезопасный контекст вычислений.
+
+    Читатели вычисляют выражения против согласованного снимка окружения
+    без блокировок; писатели по одному публикуют новые снимки под замком.
+    """
+
+    def __init__(self, variables: dict = None, budget: EvaluationBudget = None):
+        self.budget = budget
+        self._snapshot = EnvironmentSnapshot(variables)
+        self._write_lock = threading.Lock()
+        self._scope = _LiveScope(self)
+
+    def snapshot(self) -> EnvironmentSnapshot:
+        """Текущий снимок окружения (чтение ссылки атомарно)."""
+        return self._snapshot
+
+    def evaluate(self, expression: str, snapshot: EnvironmentSnapshot = None):
+        """Вычисление выражения против snapshot (по умолчанию - текущего)."""
+        env = snapshot if snapshot is not None else self._snapshot
+        previous = self._scope.bind(env)
+        try:
+            return _freeze(rpn_calculator(parse_expression(expression), env, self.budget))
+        finally:
+            self._scope.bind(previous)
+
+    def commit(self, updates: dict) -> EnvironmentSnapshot:
+        """Атомарная публикация сразу нескольких присваиваний."""
+        with self._write_lock:
+            self._snapshot = self._snapshot.with_updates(updates)
+            return self._snapshot
+
+    def execute(self, line: str):
+        """Выполнение строки 'name = expr', 'f(x) = тело' или просто выражения.
+
+        Вычисление и публикация присваивания происходят под одним замком,
+        поэтому конкурентные присваивания не теряют друг друга. Для
+        определения функции возвращается сама функция.
+        """
+        if parse_function_definition(line) is not None:
+            with self._write_lock:
+                return define_function(line, self._scope)
+        var_name, expression = split_assignment(line)
+        if var_name is None:
+            return self.evaluate(expression)
+
+        with self._write_lock:
+            result = self.evaluate(expression)
+            self._snapshot = self._snapshot.with_updates({var_name: result})
+        return result
+
+    def run_program(self, lines: list[str]) -> EnvironmentSnapshot:
+        """Выполнение программы как одной транзакции.
+
+        Строки вычисляются на рабочей копии, а читатели видят либо
+        окружение до программы, либо после неё целиком. Строки и '_last'
+        обрабатываются так же, как в evaluate_program (run_lines).
+        """
+        with self._write_lock:
+            working = self._snapshot.to_dict()
+            # Функции контекста внутри программы видят её рабочую копию
+            previous = self._scope.bind(working)
+            try:
+                run_lines(lines, working,
+                          lambda expression, env: rpn_calculator(parse_expression(expression), env, self.budget))
+            finally:
+                self._scope.bind(previous)
+            for value in working.values():
+                # Функции программы после публикации видят живое окружение контекста
+                if isinstance(value, UserFunction) and value.scope is working:
+                    value.scope = self._scope
+            self._snapshot = self._snapshot.with_updates(working)
+            return self._snapshot
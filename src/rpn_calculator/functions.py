@@ -0,0 +1,173 @@
+import re
+from collections import ChainMap, OrderedDict
+
+from .parser import parse_expression
+
+DEFAULT_MEMO_SIZE = 1024
+# Растёт при каждом создании функции: скомпилированные вызовы сверяются с ним
+_definition_version = 0
+
+# f(x, y) = тело
+DEFINITION_PATTERN = re.compile(
+    r'^\s*([A-Za-z_]\w*)\s*\(\s*([A-Za-z_]\w*(?:\s*,\s*[A-Za-z_]\w*)*)?\s*\)\s*=\s*(.+?)\s*$')
+
+
+def parse_function_definition(line: str):
+    """Разбор строки 'f(x, y) = тело'. Возвращает (имя, параметры, тело) или None."""
+    match = DEFINITION_PATTERN.match(line)
+    if match is None:
+        return None
+    name, params, body = match.groups()
+    return name, [p.strip() for p in params.split(",")] if params else [], body
+
+
+def definition_version() -> int:
+    """Номер последнего определения функции (в любом окружении)."""
+    return _definition_version
+
+
+def user_functions(env) -> dict:
+    """{имя: UserFunction} из окружения - для compile_rpn(..., functions=...)."""
+    return {name: value for name, value in (env or {}).items() if isinstance(value, UserFunction)}
+
+
+def _is_scalar(value) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class UserFunction:
+    """ Пользовательская функция, тело которой скомпилировано один раз.
+
+    scope - окружение, в котором функция определена (свободные переменные
+    и другие функции берутся из него в момент вызова). Чистые функции
+    (тело зависит только от параметров и чистых функций) запоминают
+    результаты для скалярных аргументов в LRU-кэше на memo_size записей.
+    С нестандартным числовым бэкендом тело вычисляется интерпретатором
+    в этом бэкенде, без кэша.
+    """
+
+    def __init__(self, name: str, params: list, body: str, scope: dict = None,
+                 memo_size: int = DEFAULT_MEMO_SIZE):
+        # Импорт здесь: compiler сам зависит от UserFunction
+        from .compiler import compile_rpn, BUILTIN_TOKENS
+
+        if name in BUILTIN_TOKENS:
+            raise ValueError(f"Имя {name} занято встроенной функцией")
+        if len(set(params)) != len(params):
+            raise ValueError(f"Повторяющиеся параметры функции {name}")
+        if name in params:
+            raise ValueError(f"Параметр не может называться так же, как функция: {name}")
+        self.name = name
+        self.params = tuple(params)
+        self.arity = len(params)
+        self.body = body
+        self.scope = scope if scope is not None else {}
+        functions = user_functions(self.scope)
+        functions.pop(name, None)
+        self.rpn = parse_expression(body)
+        self.compiled = compile_rpn(self.rpn, functions=functions)
+        if name in self.compiled.variables:
+            raise ValueError(f"Рекурсивные функции не поддерживаются: {name}")
+
+        free = [v for v in self.compiled.variables if v not in self.params]
+        self.pure = not free and all(functions[f].pure for f in self.compiled.functions)
+        self.requested_memo_size = memo_size
+        global _definition_version
+        _definition_version += 1
+        self.memo_size = memo_size if self.pure else 0
+        self._memo = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, *args, budget=None, backend=None):
+        if len(args) != self.arity:
+            raise ValueError(f"Функция {self.name} ожидает {self.arity} аргументов, получено {len(args)}")
+        if backend is not None and backend.name != "float":
+            from .calculator import evaluate_rpn
+
+            local = dict(zip(self.params, args))
+            return evaluate_rpn(self.rpn, ChainMap(local, self.scope) if self.scope else local, budget,
+                                backend=backend)
+        key = None
+        if self.memo_size and all(map(_is_scalar, args)):
+            key = tuple((type(a), a) for a in args)
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                result = self._memo[key]
+                return list(result) if isinstance(result, list) else result
+            self.misses += 1
+
+        local = dict(zip(self.params, args))
+        try:
+            result = self.compiled.run(ChainMap(local, self.scope) if self.scope else local, budget)
+        except RecursionError:
+            raise ValueError(f"Слишком глубокая цепочка вызовов в функции {self.name}") from None
+        if isinstance(result, list):
+            result = list(result)
+
+        if key is not None:
+            self._memo[key] = result
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        return result
+
+    def cache_info(self) -> dict:
+        """Статистика кэша: попадания, промахи, текущий и максимальный размер."""
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._memo), "max_size": self.memo_size}
+
+    def cache_clear(self):
+        self._memo.clear()
+        self.hits = self.misses = 0
+
+    def __repr__(self):
+        return f"{self.name}({', '.join(self.params)}) = {self.body}"
+
+
+def define_function(line: str, env: dict, memo_size: int = DEFAULT_MEMO_SIZE):
+    """Если line - определение функции, сохраняет её в env и возвращает; иначе None."""
+    definition = parse_function_definition(line)
+    if definition is None:
+        return None
+    name, params, body = definition
+    function = UserFunction(name, params, body, scope=env, memo_size=memo_size)
+    redefined = isinstance(env.get(name), UserFunction)
+    env[name] = function
+    if redefined:
+        _invalidate_dependents(name, env)
+    return function
+
+
+def _invalidate_dependents(name: str, env: dict):
+    """Сброс кэшей и пересчёт чистоты всех функций, которые прямо или через другие вызывают name."""
+    functions = user_functions(env)
+    callers = {}
+    for key, function in functions.items():
+        for callee in function.compiled.functions:
+            callers.setdefault(callee, []).append(key)
+
+    # Обход в ширину по обратным рёбрам: от переопределённой функции к вызывающим
+    affected, queue = [], [name]
+    seen = {name}
+    while queue:
+        for caller in callers.get(queue.pop(0), ()):
+            if caller not in seen:
+                seen.add(caller)
+                affected.append(caller)
+                queue.append(caller)
+
+    pending = set(affected)
+
+    def refresh(key: str) -> bool:
+        # Чистота вызываемых пересчитывается раньше, чем у вызывающей функции
+        function = functions[key]
+        if key in pending:
+            pending.discard(key)
+            function.cache_clear()
+            free = [v for v in function.compiled.variables if v not in function.params]
+            function.pure = not free and all(f in functions and refresh(f) for f in function.compiled.functions)
+            function.memo_size = function.requested_memo_size if function.pure else 0
+        return function.pure
+
+    for key in affected:
+        refresh(key)
@@ -0,0 +1,107 @@
+import re
+
+# Слова, имена переменных и числа (3.14, 1e-5) - единицы поиска
+TERM_PATTERN = re.compile(r'\w+(?:\.\w+)*')
+BUCKET_PREFIX = 2
+# Во сколько раз кандидатов должно быть больше limit, чтобы выгоднее было сканировать номера
+SCAN_FACTOR = 20
+
+
+def split_terms(text: str) -> list[str]:
+    return TERM_PATTERN.findall(text.lower())
+
+
+class HistoryIndex:
+    """ Инвертированный индекс по записям истории вычислений.
+
+    Каждая запись получает возрастающий номер. Для каждого термина (имя
+    переменной, функция, число из выражения или результата) хранится
+    множество номеров записей; термины разложены по корзинам по первым
+    двум символам, так что поиск по префиксу просматривает одну корзину.
+    Добавление и удаление записи стоят пропорционально числу её терминов.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._postings = {}
+        self._buckets = {}
+        self.last_id = 0
+
+    def add(self, text: str) -> int:
+        self.last_id += 1
+        entry_id = self.last_id
+        self._entries[entry_id] = text
+        for term in set(split_terms(text)):
+            posting = self._postings.get(term)
+            if posting is None:
+                posting = self._postings[term] = set()
+                self._buckets.setdefault(term[:BUCKET_PREFIX], set()).add(term)
+            posting.add(entry_id)
+        return entry_id
+
+    def remove(self, entry_id: int):
+        text = self._entries.pop(entry_id, None)
+        if text is None:
+            return
+        for term in set(split_terms(text)):
+            posting = self._postings[term]
+            posting.discard(entry_id)
+            if not posting:
+                del self._postings[term]
+                bucket = self._buckets[term[:BUCKET_PREFIX]]
+                bucket.discard(term)
+                if not bucket:
+                    del self._buckets[term[:BUCKET_PREFIX]]
+
+    def clear(self):
+        self._entries.clear()
+        self._postings.clear()
+        self._buckets.clear()
+
+    def ids(self):
+        """Номера всех записей (представление ключей, поддерживает операции множеств)."""
+        return self._entries.keys()
+
+    def text(self, entry_id: int) -> str:
+        return self._entries[entry_id]
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _prefix_matches(self, prefix: str) -> set:
+        if len(prefix) >= BUCKET_PREFIX:
+            terms = [term for term in self._buckets.get(prefix[:BUCKET_PREFIX], ()) if term.startswith(prefix)]
+        else:
+            terms = [term for key, bucket in self._buckets.items() if key.startswith(prefix) for term in bucket]
+        if len(terms) == 1:
+            # Единственный термин - множество берётся без копирования
+            return self._postings[terms[0]]
+        return set().union(*(self._postings[term] for term in terms))
+
+    def search(self, query: str, limit: int = None) -> list[int]:
+        """Номера записей, где каждое слово запроса - префикс какого-то термина (новые первыми).
+
+        Пустой запрос совпадает со всеми записями.
+        """
+        prefixes = set(split_terms(query))
+        if not prefixes:
+            ordered = sorted(self._entries, reverse=True)
+            return ordered if limit is None else ordered[:limit]
+
+        candidates = sorted((self._prefix_matches(prefix) for prefix in prefixes), key=len)
+        if limit is not None and len(candidates[0]) > SCAN_FACTOR * limit:
+            # Частые термины: идём от новых записей к старым, пока не наберём limit
+            found = []
+            for entry_id in range(self.last_id, 0, -1):
+                if all(entry_id in candidate for candidate in candidates):
+                    found.append(entry_id)
+                    if len(found) == limit:
+                        break
+            return found
+        ordered = sorted(candidates[0].intersection(*candidates[1:]), reverse=True)
+        return ordered if limit is None else ordered[:limit]
+
+    def matches(self, entry_id: int, query: str) -> bool:
+        """Подходит ли одна запись под запрос (без обхода индекса)."""
+        terms = set(split_terms(self._entries.get(entry_id, "")))
+        return all(any(term.startswith(prefix) for term in terms) for prefix in split_terms(query))
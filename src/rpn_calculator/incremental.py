@@ -0,0 +1,130 @@
+import difflib
+import time
+
+from .calculator import split_assignment
+from .compiler import compile_rpn
+from .functions import UserFunction, define_function, parse_function_definition, user_functions
+from .parser import parse_expression
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+_MISSING = object()
+
+
+class LineRecord:
+    """ Результат одной строки программы и входы, на которых он получен """
+
+    __slots__ = ("text", "var_name", "compiled", "inputs", "result")
+
+    def __init__(self, text, var_name, compiled, inputs, result):
+        self.text = text
+        self.var_name = var_name
+        self.compiled = compiled
+        self.inputs = inputs
+        self.result = result
+
+
+def _same(a, b) -> bool:
+    if isinstance(a, UserFunction) and isinstance(b, UserFunction):
+        return repr(a) == repr(b)
+    return a is b or (type(a) is type(b) and a == b)
+
+
+class IncrementalProgram:
+    """ Повторное выполнение программы (формат evaluate_program) после правок.
+
+    Новая версия сравнивается со старой построчно (difflib). Неизменённая
+    строка не пересчитывается, если значения всех её входных переменных
+    совпадают с прошлым запуском. Определения функций и строки с их
+    вызовами выполняются каждый раз: результат вызова зависит и от
+    свободных переменных тела функции. cache - ParseCache, из которого
+    берутся уже разобранные выражения.
+    """
+
+    def __init__(self, cache=None):
+        self.records = []
+        self.env = {}
+        self.cache = cache
+
+    def _compile_line(self, text: str, env: dict):
+        var_name, expression = split_assignment(text)
+        rpn = self.cache.rpn(expression) if self.cache is not None else parse_expression(expression)
+        return var_name, compile_rpn(rpn, functions=user_functions(env))
+
+    def run(self, lines: list[str]) -> dict:
+        """Выполнение новой версии программы.
+
+        Возвращает отчёт: changed - {имя: новое значение} для изменившихся
+        переменных, removed - исчезнувшие переменные, evaluated/reused -
+        номера пересчитанных и переиспользованных строк (с 1), timings -
+        {номер строки: секунды}, elapsed - общее время, error - текст ошибки
+        или None (при ошибке окружение прошлого запуска сохраняется).
+        """
+        start = time.perf_counter()
+        texts = [line.strip() for line in lines]
+        old_texts = [record.text for record in self.records]
+        previous = {}
+        matcher = difflib.SequenceMatcher(a=old_texts, b=texts, autojunk=False)
+        for tag, i1, i2, j1, _ in matcher.get_opcodes():
+            if tag == 'equal':
+                for offset in range(i2 - i1):
+                    previous[j1 + offset] = self.records[i1 + offset]
+
+        report = {"changed": {}, "removed": [], "evaluated": [], "reused": [], "timings": {},
+                  "elapsed": 0.0, "error": None}
+        env, records = {}, []
+        for number, text in enumerate(texts, 1):
+            if not text:
+                records.append(LineRecord(text, None, None, {}, None))
+                continue
+
+            definition = parse_function_definition(text)
+            if definition is not None:
+                try:
+                    function = define_function(text, env)
+                except EVALUATION_ERRORS as e:
+                    report["error"] = f"строка {number}: {e}"
+                    report["elapsed"] = time.perf_counter() - start
+                    return report
+                records.append(LineRecord(text, definition[0], None, {}, function))
+                report["evaluated"].append(number)
+                continue
+
+            old = previous.get(number - 1)
+            if old is not None and old.compiled is not None and not old.compiled.functions and all(
+                    _same(env.get(name, _MISSING), value) for name, value in old.inputs.items()):
+                record = old
+                report["reused"].append(number)
+            else:
+                line_start = time.perf_counter()
+                try:
+                    if old is not None and old.compiled is not None and not old.compiled.functions:
+                        var_name, compiled = old.var_name, old.compiled
+                    else:
+                        var_name, compiled = self._compile_line(text, env)
+                    inputs = {name: env.get(name, _MISSING) for name in compiled.variables}
+                    result = compiled.evaluate(env)
+                except EVALUATION_ERRORS as e:
+                    report["error"] = f"строка {number}: {e}"
+                    report["elapsed"] = time.perf_counter() - start
+                    return report
+                record = LineRecord(text, var_name, compiled, inputs, result)
+                report["evaluated"].append(number)
+                report["timings"][number] = time.perf_counter() - line_start
+
+            if record.var_name:
+                env[record.var_name] = record.result
+            records.append(record)
+
+        # '_last' - только от последней непустой строки и только после программы, как в run_lines
+        filled = [record for record in records if record.text]
+        if filled and filled[-1].var_name is None:
+            env['_last'] = filled[-1].result
+
+        for name, value in env.items():
+            if not _same(self.env.get(name, _MISSING), value):
+                report["changed"][name] = value
+        report["removed"] = [name for name in self.env if name not in env]
+
+        self.records, self.env = records, env
+        report["elapsed"] = time.perf_counter() - start
+        return report
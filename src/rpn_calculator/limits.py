@@ -0,0 +1,100 @@
+import math
+
+from .matrix import is_matrix
+from .vectors import is_sparse, is_vector
+
+# Плотный вектор такой длины занимает около 80 МБ
+DEFAULT_MAX_VECTOR_LENGTH = 10 ** 7
+
+
+class BudgetExceededError(ValueError):
+    """Вычисление превысило заданный бюджет ресурсов."""
+
+
+class EvaluationBudget:
+    """ Ограничения на ресурсы одного вычисления.
+
+    max_result_bits - максимальный размер целого результата (в битах) для ^ и *;
+    max_vector_length - максимальная длина вектора (число элементов матрицы) в стеке;
+    для разреженного вектора проверяется размерность: многие операции делают
+    его плотным;
+    max_operations - максимальное число операторов в одном выражении.
+    None отключает соответствующую проверку.
+    """
+
+    def __init__(self, max_result_bits: int = None, max_vector_length: int = None,
+                 max_operations: int = None):
+        self.max_result_bits = max_result_bits
+        self.max_vector_length = max_vector_length
+        self.max_operations = max_operations
+
+    def check_binary(self, token: str, a, b):
+        """Проверка оператора до его выполнения."""
+        if token == "matmul" and self.max_vector_length is not None and is_matrix(a) and is_matrix(b):
+            # Размер произведения известен заранее: внешнее произведение может быть намного больше операндов
+            rows, columns = a.shape[0], b.shape[1]
+            if rows * columns > self.max_vector_length:
+                raise BudgetExceededError(f"Матрица {rows}x{columns} превышает лимит "
+                                          f"{self.max_vector_length} элементов")
+        if self.max_result_bits is None:
+            return
+        if token == "^" and isinstance(a, list) and isinstance(b, list):
+            # Поэлементная степень: оцениваем худшую пару
+            bits = max(map(estimate_power_bits, a, b), default=0)
+        elif token == "^" and (is_vector(a) or is_vector(b)):
+            # Скаляр или разреженный вектор (нули дают 1 бит): худшее основание в худшей степени
+            bits = _worst_power_bits(_elements(a), _elements(b))
+        elif token == "^":
+            bits = estimate_power_bits(a, b)
+        elif token == "*" and isinstance(a, int) and isinstance(b, int):
+            bits = a.bit_length() + b.bit_length()
+        else:
+            return
+        if bits > self.max_result_bits:
+            raise BudgetExceededError(f"Результат {token} слишком велик: около {int(bits)} бит "
+                                      f"при лимите {self.max_result_bits}")
+
+    def check_vector(self, value):
+        if self.max_vector_length is None:
+            return
+        if isinstance(value, list) and len(value) > self.max_vector_length:
+            raise BudgetExceededError(f"Длина вектора {len(value)} превышает лимит {self.max_vector_length}")
+        if is_sparse(value) and value.size > self.max_vector_length:
+            raise BudgetExceededError(f"Размерность разреженного вектора {value.size} превышает лимит "
+                                      f"{self.max_vector_length}")
+        if is_matrix(value) and value.shape[0] * value.shape[1] > self.max_vector_length:
+            raise BudgetExceededError(f"Матрица {value.shape[0]}x{value.shape[1]} превышает лимит "
+                                      f"{self.max_vector_length} элементов")
+
+    def check_operations(self, count: int):
+        if self.max_operations is not None and count > self.max_operations:
+            raise BudgetExceededError(f"Превышен лимит операций: {self.max_operations}")
+
+
+def _elements(value) -> list:
+    if is_sparse(value):
+        return value.values
+    return value if isinstance(value, list) else [value]
+
+
+def _worst_power_bits(bases, exponents) -> float:
+    integer_bases = [abs(x) for x in bases if isinstance(x, int) and not isinstance(x, bool)]
+    integer_exponents = [y for y in exponents if isinstance(y, int) and not isinstance(y, bool)]
+    if not integer_bases or not integer_exponents:
+        return 0
+    return estimate_power_bits(max(integer_bases), max(integer_exponents))
+
+
+def estimate_power_bits(a, b) -> float:
+    """Оценка числа бит в a ** b без вычисления самой степени.
+
+    Для вещественных операндов возвращает 0: float сам сообщает о переполнении.
+    """
+    if not isinstance(a, int) or not isinstance(b, int) or isinstance(a, bool):
+        return 0
+    if b <= 0 or a in (-1, 0, 1):
+        return 1
+    return math.log2(abs(a)) * b + 1
+
+
+DEFAULT_BUDGET = EvaluationBudget(max_result_bits=1 << 20, max_vector_length=DEFAULT_MAX_VECTOR_LENGTH)
@@ -0,0 +1,247 @@
+import socket
+import threading
+import time
+from array import array
+from bisect import bisect_right
+from concurrent.futures import ThreadPoolExecutor
+
+from .context import EvaluationContext
+from .functions import parse_function_definition
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+CLI_PROMPT = ">> "
+# Верхние границы корзин гистограммы, секунды
+BUCKET_BOUNDS = (25e-6, 50e-6, 100e-6, 250e-6, 500e-6, 1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 1.0)
+
+
+def _history_line(line: str) -> str:
+    """Строка истории GUI без показанного результата: 'x = a + b = 7' -> 'x = a + b'."""
+    if parse_function_definition(line) is not None:
+        return line
+    parts = [part.strip() for part in line.split('=')]
+    if len(parts) > 2 or (len(parts) == 2 and not parts[0].isidentifier()):
+        parts.pop()
+    return " = ".join(parts)
+
+
+def load_corpus(path: str) -> list[str]:
+    """ Строки для воспроизведения нагрузки.
+
+    Понимает стенограмму --cli (берутся только строки после приглашения
+    '>> '), историю GUI ('выражение = результат') и просто файл с
+    выражением или присваиванием в каждой строке.
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = [line.rstrip("\n") for line in f]
+    if any(line.startswith(CLI_PROMPT) for line in lines):
+        lines = [line[len(CLI_PROMPT):] for line in lines if line.startswith(CLI_PROMPT)]
+        lines = [line.strip() for line in lines if line.strip() and line.strip().lower() != 'exit']
+    else:
+        lines = [_history_line(line.strip()) for line in lines if line.strip()]
+    if not lines:
+        raise ValueError(f"{path}: нет строк для воспроизведения")
+    return lines
+
+
+class LatencyHistogram:
+    """Задержки в секундах: точные перцентили и счётчики по корзинам BUCKET_BOUNDS."""
+
+    def __init__(self):
+        self._values = array("d")
+        self._sorted = True
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._values.append(seconds)
+            self._sorted = False
+
+    def __len__(self):
+        return len(self._values)
+
+    def percentile(self, p: float) -> float:
+        """Задержка, не превышенная долей p запросов (0 < p <= 100), методом ближайшего ранга."""
+        if not self._values:
+            return 0.0
+        with self._lock:
+            if not self._sorted:
+                self._values = array("d", sorted(self._values))
+                self._sorted = True
+            rank = max(1, -(-len(self._values) * p // 100))
+            return self._values[int(rank) - 1]
+
+    def buckets(self) -> list[tuple[float, int]]:
+        """Пары (верхняя граница, число запросов); последняя граница - inf."""
+        counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        for value in self._values:
+            counts[bisect_right(BUCKET_BOUNDS, value)] += 1
+        return list(zip(BUCKET_BOUNDS + (float("inf"),), counts))
+
+
+class InProcessTarget:
+    """Выполнение строк в этом процессе через общий EvaluationContext."""
+
+    def __init__(self, context: EvaluationContext = None):
+        self.context = context or EvaluationContext()
+
+    def __call__(self, line: str) -> bool:
+        try:
+            self.context.execute(line)
+        except EVALUATION_ERRORS:
+            return False
+        return True
+
+    def close(self):
+        pass
+
+
+class TcpTarget:
+    """Выполнение строк на сервере main.py --serve: по соединению на поток."""
+
+    def __init__(self, host: str, port: int, timeout: float = 10.0):
+        self.address = (host, port)
+        self.timeout = timeout
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            sock = socket.create_connection(self.address, self.timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            connection = self._local.connection = (sock, sock.makefile("rb"))
+            with self._lock:
+                self._connections.append(connection)
+        return connection
+
+    def _drop(self, connection):
+        self._local.connection = None
+        with self._lock:
+            if connection in self._connections:
+                self._connections.remove(connection)
+        sock, reader = connection
+        reader.close()
+        sock.close()
+
+    def __call__(self, line: str) -> bool:
+        """Успех запроса; после обрыва или таймаута соединение закрывается и следующий запрос открывает новое."""
+        connection = self._connection()
+        sock, reader = connection
+        try:
+            sock.sendall(line.encode("utf-8") + b"\n")
+            response = reader.readline()
+            if not response:
+                raise ConnectionError("Сервер закрыл соединение")
+        except OSError:
+            # В том числе socket.timeout: ответ мог прийти позже и сдвинуть все следующие
+            self._drop(connection)
+            raise
+        return response.startswith(b"=")
+
+    def close(self):
+        with self._lock:
+            for sock, reader in self._connections:
+                reader.close()
+                sock.close()
+            self._connections.clear()
+
+
+def run_load(corpus: list[str], target, concurrency: int = 1, rate: float = None,
+             duration: float = None, requests: int = None) -> dict:
+    """ Воспроизведение corpus по кругу против target (вызываемый объект: строка -> успех).
+
+    Без rate - замкнутый цикл: concurrency потоков отправляют запросы один
+    за другим. С rate - открытый цикл: запросы планируются через равные
+    интервалы 1/rate и выполняются пулом из concurrency потоков; задержка
+    считается от запланированного момента, поэтому очередь из-за
+    перегрузки входит в перцентили. Останавливается после duration секунд
+    или requests запросов (нужно хотя бы одно из двух).
+    """
+    if duration is None and requests is None:
+        raise ValueError("Нужно задать длительность или число запросов")
+    if concurrency < 1:
+        raise ValueError("Число потоков должно быть положительным")
+    if rate is not None and rate <= 0:
+        raise ValueError("Частота запросов должна быть положительной")
+
+    histogram = LatencyHistogram()
+    errors = [0]
+    counter_lock = threading.Lock()
+    limit = requests if requests is not None else float("inf")
+    start = time.perf_counter()
+    deadline = start + duration if duration is not None else float("inf")
+
+    def execute(index: int, scheduled: float):
+        try:
+            ok = target(corpus[index % len(corpus)])
+        except OSError:
+            ok = False
+        histogram.record(time.perf_counter() - scheduled)
+        if not ok:
+            with counter_lock:
+                errors[0] += 1
+
+    if rate is None:
+        issued = [0]
+
+        def worker():
+            while time.perf_counter() < deadline:
+                with counter_lock:
+                    index = issued[0]
+                    if index >= limit:
+                        return
+                    issued[0] += 1
+                execute(index, time.perf_counter())
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    else:
+        interval = 1.0 / rate
+        with ThreadPoolExecutor(concurrency) as pool:
+            index = 0
+            while index < limit:
+                scheduled = start + index * interval
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(execute, index, scheduled)
+                index += 1
+
+    elapsed = time.perf_counter() - start
+    completed = len(histogram)
+    return {
+        "requests": completed,
+        "errors": errors[0],
+        "elapsed": elapsed,
+        "throughput": completed / elapsed if elapsed > 0 else 0.0,
+        "p50": histogram.percentile(50),
+        "p90": histogram.percentile(90),
+        "p99": histogram.percentile(99),
+        "max": histogram.percentile(100),
+        "histogram": histogram.buckets(),
+    }
+
+
+def _format_seconds(seconds: float) -> str:
+    if seconds == float("inf"):
+        return "inf"
+    return f"{seconds * 1e6:.0f} мкс" if seconds < 1e-3 else f"{seconds * 1e3:.2f} мс"
+
+
+def format_report(report: dict) -> str:
+    lines = [f"Запросов: {report['requests']}, ошибок: {report['errors']}, "
+             f"{report['throughput']:.0f} в секунду за {report['elapsed']:.2f} с",
+             "  ".join(f"{name} {_format_seconds(report[name])}" for name in ("p50", "p90", "p99", "max"))]
+    total = report["requests"] or 1
+    widest = max((count for _, count in report["histogram"]), default=0) or 1
+    for bound, count in report["histogram"]:
+        if count:
+            bar = "#" * max(1, round(40 * count / widest))
+            lines.append(f"  <= {_format_seconds(bound):>10} {count:>9} {100 * count / total:6.2f}% {bar}")
+    return "\n".join(lines)
@@ -0,0 +1,233 @@
+import math
+import operator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+class Matrix:
+    """ Неизменяемая матрица rows x cols.
+
+    При установленном NumPy данные хранятся в ndarray, и умножение,
+    det, inv и solve выполняются через BLAS/LAPACK. Без NumPy
+    используются списки и метод Гаусса с выбором ведущего элемента.
+    """
+
+    __slots__ = ("_data", "shape")
+
+    def __init__(self, rows):
+        if np is not None and isinstance(rows, np.ndarray):
+            if rows.ndim != 2 or 0 in rows.shape:
+                raise ValueError("Матрица должна быть двумерной и непустой")
+            self._data = rows.astype(float, copy=False)
+            self.shape = rows.shape
+            return
+        rows = [[float(x) for x in row] for row in rows]
+        if not rows or not rows[0]:
+            raise ValueError("Матрица должна быть непустой")
+        width = len(rows[0])
+        if any(len(row) != width for row in rows):
+            raise ValueError("Строки матрицы должны иметь одинаковую длину")
+        self.shape = (len(rows), width)
+        self._data = np.array(rows, dtype=float) if np is not None else rows
+
+    def tolist(self) -> list[list[float]]:
+        return self._data.tolist() if np is not None else [list(row) for row in self._data]
+
+    def __eq__(self, other):
+        if isinstance(other, Matrix):
+            return self.shape == other.shape and self.tolist() == other.tolist()
+        if isinstance(other, list):
+            return self.tolist() == other
+        return NotImplemented
+
+    def __repr__(self):
+        return repr(self.tolist())
+
+
+def is_matrix(obj) -> bool:
+    return isinstance(obj, Matrix)
+
+
+def parse_matrix(token: str) -> Matrix:
+    """Разбор литерала вида [[1,2],[3,4]]."""
+    body = token.strip()[1:-1].strip()
+    if not body.startswith("[") or not body.endswith("]"):
+        raise ValueError(f"Некорректный литерал матрицы: {token}")
+    rows = []
+    for chunk in body[1:-1].split("],"):
+        chunk = chunk.strip().lstrip("[").rstrip("]")
+        rows.append([float(x) for x in chunk.split(",")])
+    return Matrix(rows)
+
+
+def _rows(m: Matrix) -> list[list[float]]:
+    return m._data if np is None else m._data.tolist()
+
+
+def _elementwise(op, a, b) -> Matrix:
+    if is_matrix(a) and is_matrix(b):
+        if a.shape != b.shape:
+            raise ValueError(f"Размеры матриц не совпадают: {a.shape} и {b.shape}")
+        if np is not None:
+            return Matrix(op(a._data, b._data))
+        return Matrix([list(map(op, x, y)) for x, y in zip(a._data, b._data)])
+    if is_matrix(a):
+        return Matrix(op(a._data, b) if np is not None else [[op(x, b) for x in row] for row in a._data])
+    return Matrix(op(a, b._data) if np is not None else [[op(a, y) for y in row] for row in b._data])
+
+
+def matrix_matmul(a, b):
+    """Матричное произведение; вектор слева - строка, справа - столбец."""
+    if not is_matrix(a) and not is_matrix(b):
+        raise TypeError("matmul применим к матрицам (и векторам подходящей длины)")
+    if not all(is_matrix(x) or isinstance(x, list) for x in (a, b)):
+        raise TypeError("matmul требует векторы или матрицы")
+    left_vector, right_vector = isinstance(a, list), isinstance(b, list)
+    inner_a = len(a) if left_vector else a.shape[1]
+    inner_b = len(b) if right_vector else b.shape[0]
+    if inner_a != inner_b:
+        raise ValueError(f"Несогласованные размеры для matmul: {inner_a} и {inner_b}")
+
+    if np is not None:
+        left = np.asarray(a, dtype=float) if left_vector else a._data
+        right = np.asarray(b, dtype=float) if right_vector else b._data
+        result = left @ right
+        return result.tolist() if result.ndim == 1 else Matrix(result)
+
+    if right_vector:
+        return [sum(map(operator.mul, row, b)) for row in a._data]
+    columns = list(zip(*b._data))
+    if left_vector:
+        return [sum(map(operator.mul, a, column)) for column in columns]
+    return Matrix([[sum(map(operator.mul, row, column)) for column in columns] for row in a._data])
+
+
+def matrix_transpose(m: Matrix) -> Matrix:
+    return Matrix(m._data.T.copy()) if np is not None else Matrix([list(col) for col in zip(*m._data)])
+
+
+def _require_square(m: Matrix, action: str):
+    if m.shape[0] != m.shape[1]:
+        raise ValueError(f"{action} определён только для квадратной матрицы, размер {m.shape}")
+
+
+def _eliminate(rows: list[list[float]], rhs: list[list[float]] = None):
+    """Прямой и обратный ход метода Гаусса. Возвращает (определитель, решение для rhs)."""
+    n = len(rows)
+    a = [list(row) + (list(extra) if rhs is not None else []) for row, extra in
+         zip(rows, rhs if rhs is not None else [()] * n)]
+    det = 1.0
+    for col in range(n):
+        pivot = max(range(col, n), key=lambda r: abs(a[r][col]))
+        if a[pivot][col] == 0:
+            return 0.0, None
+        if pivot != col:
+            a[col], a[pivot] = a[pivot], a[col]
+            det = -det
+        pivot_value = a[col][col]
+        det *= pivot_value
+        for r in range(col + 1, n):
+            factor = a[r][col] / pivot_value
+            if factor:
+                row_r, row_c = a[r], a[col]
+                for k in range(col, len(row_r)):
+                    row_r[k] -= factor * row_c[k]
+    if rhs is None:
+        return det, None
+    width = len(rhs[0])
+    solution = [[0.0] * width for _ in range(n)]
+    for r in range(n - 1, -1, -1):
+        for k in range(width):
+            acc = a[r][n + k] - sum(a[r][c] * solution[c][k] for c in range(r + 1, n))
+            solution[r][k] = acc / a[r][r]
+    return det, solution
+
+
+def matrix_det(m: Matrix) -> float:
+    _require_square(m, "Определитель")
+    if np is not None:
+        return float(np.linalg.det(m._data))
+    return _eliminate(m._data)[0]
+
+
+def matrix_inv(m: Matrix) -> Matrix:
+    _require_square(m, "Обратная матрица")
+    if np is not None:
+        try:
+            return Matrix(np.linalg.inv(m._data))
+        except np.linalg.LinAlgError:
+            raise ValueError("Матрица вырождена, обратной не существует") from None
+    n = m.shape[0]
+    identity = [[1.0 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    _, solution = _eliminate(m._data, identity)
+    if solution is None:
+        raise ValueError("Матрица вырождена, обратной не существует")
+    return Matrix(solution)
+
+
+def matrix_solve(a: Matrix, b):
+    """Решение A x = b для вектора или матрицы b."""
+    if not is_matrix(a):
+        raise TypeError("solve: левый операнд должен быть матрицей")
+    _require_square(a, "solve")
+    b_vector = isinstance(b, list)
+    if not b_vector and not is_matrix(b):
+        raise TypeError("solve: правая часть должна быть вектором или матрицей")
+    rows_b = len(b) if b_vector else b.shape[0]
+    if rows_b != a.shape[0]:
+        raise ValueError(f"solve: размер правой части {rows_b} не совпадает с {a.shape[0]}")
+
+    if np is not None:
+        try:
+            result = np.linalg.solve(a._data, np.asarray(b, dtype=float) if b_vector else b._data)
+        except np.linalg.LinAlgError:
+            raise ValueError("Матрица системы вырождена") from None
+        return result.tolist() if b_vector else Matrix(result)
+
+    rhs = [[x] for x in b] if b_vector else _rows(b)
+    _, solution = _eliminate(a._data, rhs)
+    if solution is None:
+        raise ValueError("Матрица системы вырождена")
+    return [row[0] for row in solution] if b_vector else Matrix(solution)
+
+
+def matrix_norm(m: Matrix) -> float:
+    """Норма Фробениуса."""
+    if np is not None:
+        return float(np.linalg.norm(m._data))
+    return math.hypot(*(x for row in m._data for x in row))
+
+
+def matrix_binary(token: str, a, b):
+    """Бинарные операторы, в которых участвует хотя бы одна матрица."""
+    if token == "matmul":
+        return matrix_matmul(a, b)
+    if token == "solve":
+        return matrix_solve(a, b)
+    if isinstance(a, list) or isinstance(b, list):
+        raise TypeError(f"Оператор {token} между матрицей и вектором не поддерживается (используйте matmul)")
+    if token in ("+", "-"):
+        if not (is_matrix(a) and is_matrix(b)):
+            raise TypeError("Нельзя складывать или вычитать матрицу и скаляр")
+        return _elementwise(operator.add if token == "+" else operator.sub, a, b)
+    if token == "*":
+        return _elementwise(operator.mul, a, b)
+    raise TypeError(f"Оператор {token} не применим к матрице")
+
+
+def matrix_unary(token: str, m: Matrix):
+    """Унарные функции от матрицы."""
+    if token == "neg":
+        return _elementwise(operator.mul, m, -1.0)
+    if token == "transpose":
+        return matrix_transpose(m)
+    if token == "det":
+        return matrix_det(m)
+    if token == "inv":
+        return matrix_inv(m)
+    if token in ("norm", "abs"):
+        return matrix_norm(m)
+    raise TypeError(f"Функция {token} не применима к матрице")
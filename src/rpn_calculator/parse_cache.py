@@ -0,0 +1,174 @@
+import hashlib
+import mmap
+import os
+import struct
+from pathlib import Path
+
+from .parser import parse_expression
+
+MAGIC = b"RPNC"
+FORMAT_VERSION = 1
+# Исходники, от которых зависит результат разбора и компиляции
+ENGINE_SOURCES = ("parser.py", "compiler.py", "calculator.py")
+
+# Заголовок: сигнатура, версия формата, отпечаток движка, число записей
+HEADER = struct.Struct("<4sH16sQ")
+# Индекс по первым двум байтам хэша: границы [lo, hi) записей с таким префиксом
+FANOUT = struct.Struct("<II")
+FANOUT_SIZE = (2 ** 16 + 1) * 4
+# Запись таблицы: хэш выражения, смещение и длина RPN в области данных
+RECORD = struct.Struct("<16sQI")
+DIGEST_SIZE = 16
+TABLE_OFFSET = HEADER.size + FANOUT_SIZE
+
+_fingerprint = None
+
+
+def engine_fingerprint() -> bytes:
+    """Хэш исходников парсера и компилятора: при их правке старый кэш не используется."""
+    global _fingerprint
+    if _fingerprint is None:
+        digest = hashlib.blake2b(digest_size=DIGEST_SIZE)
+        digest.update(FORMAT_VERSION.to_bytes(2, "little"))
+        directory = Path(__file__).resolve().parent
+        for name in ENGINE_SOURCES:
+            digest.update((directory / name).read_bytes())
+        _fingerprint = digest.digest()
+    return _fingerprint
+
+
+def expression_key(expression: str) -> bytes:
+    return hashlib.blake2b(expression.encode("utf-8"), digest_size=DIGEST_SIZE).digest()
+
+
+class ParseCache:
+    """ Кэш разобранных выражений (текст -> RPN) в двоичном файле между запусками.
+
+    Файл отображается в память (mmap): таблица записей отсортирована по
+    хэшу выражения, индекс по первым двум байтам хэша сразу даёт одну-две
+    записи-кандидата, поэтому открытие не читает файл целиком. Новые
+    выражения копятся в памяти до save(), который атомарно переписывает
+    файл. Если файл повреждён или записан другой версией парсера
+    (engine_fingerprint), он игнорируется и перезаписывается.
+    """
+
+    def __init__(self, path: str, fingerprint: bytes = None):
+        self.path = path
+        self.fingerprint = fingerprint or engine_fingerprint()
+        self.hits = 0
+        self.misses = 0
+        self.stale = False
+        self._pending = {}
+        self._compiled = {}
+        self._file = None
+        self._map = None
+        self._count = 0
+        self._open()
+
+    def _open(self):
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            return
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+            magic, version, fingerprint, count = HEADER.unpack_from(self._map, 0)
+            valid = (magic == MAGIC and version == FORMAT_VERSION and fingerprint == self.fingerprint
+                     and TABLE_OFFSET + count * RECORD.size <= len(self._map))
+        except (ValueError, OSError, struct.error):
+            # Пустой или обрезанный файл
+            valid = False
+        if not valid:
+            self.stale = True
+            self._close_map()
+            return
+        self._count = count
+
+    def _close_map(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self._count = 0
+
+    def _record(self, index: int):
+        return RECORD.unpack_from(self._map, TABLE_OFFSET + index * RECORD.size)
+
+    def _lookup(self, key: bytes):
+        lo, hi = FANOUT.unpack_from(self._map, HEADER.size + (key[0] << 8 | key[1]) * 4)
+        for index in range(lo, hi):
+            digest, start, length = self._record(index)
+            if digest == key:
+                return self._map[start:start + length].decode("utf-8")
+        return None
+
+    def __len__(self):
+        return self._count + len(self._pending)
+
+    def rpn(self, expression: str) -> str:
+        """RPN выражения: из файла, из новых записей или разбором с сохранением."""
+        key = expression_key(expression)
+        rpn = self._pending.get(key)
+        if rpn is None and self._map is not None:
+            rpn = self._lookup(key)
+        if rpn is not None:
+            self.hits += 1
+            return rpn
+        self.misses += 1
+        rpn = self._pending[key] = parse_expression(expression)
+        return rpn
+
+    def compile(self, expression: str):
+        """CompiledExpression по тексту выражения; компиляция из RPN запоминается в памяти."""
+        from .compiler import compile_rpn
+
+        compiled = self._compiled.get(expression)
+        if compiled is None:
+            compiled = self._compiled[expression] = compile_rpn(self.rpn(expression))
+        return compiled
+
+    def _items(self):
+        for index in range(self._count):
+            digest, start, length = self._record(index)
+            if digest not in self._pending:
+                yield digest, self._map[start:start + length]
+        for digest, rpn in self._pending.items():
+            yield digest, rpn.encode("utf-8")
+
+    def save(self):
+        """Запись всех выражений во временный файл и атомарная замена кэша."""
+        if not self._pending and not self.stale:
+            return
+        items = sorted(self._items())
+        temporary = f"{self.path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, self.fingerprint, len(items)))
+            fanout = [0] * (2 ** 16 + 1)
+            for digest, _ in items:
+                fanout[(digest[0] << 8 | digest[1]) + 1] += 1
+            for prefix in range(2 ** 16):
+                fanout[prefix + 1] += fanout[prefix]
+            f.write(struct.pack(f"<{len(fanout)}I", *fanout))
+            offset = TABLE_OFFSET + len(items) * RECORD.size
+            for digest, data in items:
+                f.write(RECORD.pack(digest, offset, len(data)))
+                offset += len(data)
+            for _, data in items:
+                f.write(data)
+        # Отображение старого файла нужно закрыть до замены (Windows не даёт заменить открытый файл)
+        self._close_map()
+        os.replace(temporary, self.path)
+        self._pending.clear()
+        self.stale = False
+        self._open()
+
+    def close(self):
+        self._close_map()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
@@ -1,9 +1,27 @@
 import re
 
+OPERATORS = {
+    '+': (1, 'L'), '-': (1, 'L'),
+    '*': (2, 'L'), '//': (2, 'L'), '%': (2, 'L'),
+    '^': (3, 'R'), 'neg': (4, 'R')
+}
+FUNCTIONS = {"sin", "cos", "tan", "sqrt", "abs", "log", "ln", "powmod",
+             "sum", "mean", "min", "max", "norm", "dot", "cross", "angle",
+             "matmul", "solve", "transpose", "det", "inv"}
+
+# Регулярные выражения компилируются один раз при импорте, а не на каждый токен.
+# Литерал вектора [1,2], матрицы [[1,2],[3,4]] или разреженного вектора {n;i:v,...} -
+# один операнд без пробелов
+TOKEN_PATTERN = re.compile(r'(\[(?:[^\[\]]|\[[^\[\]]*\])*\]|\{[^{}]*\})|(\d+\.\d*|\d*\.\d+|\d+)'
+                           r'|([a-zA-Z_][a-zA-Z0-9_]*)|(//|%|[+\-*/^(),])')
+NUMBER_PATTERN = re.compile(r'\d+\.\d*|\d*\.\d+|\d+')
+INFIX_PATTERN = re.compile(r'[+\-*/^%()]')
+WHITESPACE_PATTERN = re.compile(r'\s+')
+
 
 def is_infix(expr: str) -> bool:
     """Проверяет, является ли выражение инфиксным, ища операторы или скобки."""
-    return bool(re.search(r'[+\-*/^%()]', expr))
+    return bool(INFIX_PATTERN.search(expr))
 
 
 def parse_str_postfix(s: str) -> str:
@@ -11,40 +29,35 @@ def parse_str_postfix(s: str) -> str:
     return " ".join(s.strip().split())
 
 
+def tokenize(expression: str) -> list[str]:
+    """Разбиение инфиксного выражения на токены."""
+    tokens = []
+    for literal, num, name, op in TOKEN_PATTERN.findall(expression):
+        if literal:
+            tokens.append(WHITESPACE_PATTERN.sub('', literal))
+        else:
+            tokens.append(num or name or op)
+    return tokens
+
+
 def parse_str_infix(ex: str) -> str:
     """Преобразование инфиксного выражения в обратную польскую нотацию."""
-    OPERATORS = {
-        '+': (1, 'L'), '-': (1, 'L'),
-        '*': (2, 'L'), '//': (2, 'L'), '%': (2, 'L'),
-        '^': (3, 'R'), 'neg': (4, 'R')
-    }
-    FUNCTIONS = {"sin", "cos", "tan", "sqrt", "abs"}
-
-    def tokenize(expression):
-        token_regex = re.compile(r'(\d+\.\d*|\d*\.\d+|\d+)|([a-zA-Z_][a-zA-Z0-9_]*)|(//|%|[+\-*/^()])')
-        tokens = []
-        for num, name, op in token_regex.findall(expression):
-            if num:
-                tokens.append(num)
-            elif name:
-                tokens.append(name)
-            elif op:
-                tokens.append(op)
-        return tokens
-
     output = []
     stack = []
     tokens = tokenize(ex)
     prev_token_type = 'OPERATOR'
 
-    for token in tokens:
+    for position, token in enumerate(tokens):
+        # Имя перед скобкой - вызов функции (в том числе пользовательской)
+        is_call = (token in FUNCTIONS or (token[0].isalpha() or token[0] == '_')
+                   and position + 1 < len(tokens) and tokens[position + 1] == '(')
 
-        if (re.fullmatch(r'\d+\.\d*|\d*\.\d+|\d+', token)
-                or token not in OPERATORS and token not in FUNCTIONS and token not in '()'):
+        if not is_call and (NUMBER_PATTERN.fullmatch(token)
+                            or token not in OPERATORS and token not in ('(', ')', ',')):
             output.append(token)
             prev_token_type = 'OPERAND'
 
-        elif token in FUNCTIONS:
+        elif is_call:
             stack.append(token)
             prev_token_type = 'FUNCTION'
         elif token == '-':
@@ -69,6 +82,14 @@ def parse_str_infix(ex: str) -> str:
             stack.append(token)
             prev_token_type = 'OPERATOR'
 
+        elif token == ',':
+            # Разделитель аргументов функции: выталкиваем операторы до скобки
+            while stack and stack[-1] != '(':
+                output.append(stack.pop())
+            if not stack:
+                raise ValueError("Запятая вне аргументов функции")
+            prev_token_type = 'OPERATOR'
+
         elif token == '(':
             stack.append(token)
             prev_token_type = 'PAREN_OPEN'
@@ -79,7 +100,7 @@ def parse_str_infix(ex: str) -> str:
             if not stack or stack[-1] != '(':
                 raise ValueError("Несбалансированные скобки или пропущен открывающий символ")
             stack.pop()
-            if stack and stack[-1] in FUNCTIONS:
+            if stack and stack[-1] not in OPERATORS and stack[-1] != '(':
                 output.append(stack.pop())
             prev_token_type = 'PAREN_CLOSE'
 
@@ -90,3 +111,8 @@ def parse_str_infix(ex: str) -> str:
         output.append(op)
 
     return ' '.join(output)
+
+
+def parse_expression(expression: str) -> str:
+    """Перевод выражения в RPN с автоматическим определением нотации."""
+    return parse_str_infix(expression) if is_infix(expression) else parse_str_postfix(expression)
@@ -0,0 +1,170 @@
+import csv
+
+from .calculator import (rpn_calculator, rpn_calculator_batch, split_assignment, BINARY_OPERATORS,
+                         UNARY_OPERATORS, TERNARY_OPERATORS)
+from .parser import parse_expression
+from .vectors import parse_vector
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+
+def compile_assignments(expressions: list[str], cache=None) -> list[tuple[str, str]]:
+    """Разбор строк вида 'name = expr' в пары (имя, RPN); cache - ParseCache для готовых разборов."""
+    compiled = []
+    for line in expressions:
+        var_name, expression = split_assignment(line)
+        if var_name is None:
+            raise ValueError(f"Ожидалось присваивание вида 'name = expr': {line}")
+        compiled.append((var_name, cache.rpn(expression) if cache is not None else parse_expression(expression)))
+    return compiled
+
+
+def check_columns(header: list[str], compiled: list[tuple[str, str]]):
+    """Все имена в выражениях - столбцы заголовка или ранее вычисленные; иначе ValueError сразу."""
+    known = set(header)
+    for var_name, rpn_expr in compiled:
+        for token in rpn_expr.split():
+            if (token in known or token in BINARY_OPERATORS or token in UNARY_OPERATORS
+                    or token in TERNARY_OPERATORS):
+                continue
+            try:
+                parse_vector(token)
+            except ValueError:
+                raise ValueError(f"{var_name}: нет столбца '{token}'") from None
+        known.add(var_name)
+
+
+def _read_chunks(reader, chunk_size: int):
+    chunk = []
+    for row in reader:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _format_value(value) -> str:
+    return "" if value is None else str(value)
+
+
+def evaluate_chunk(rows: list[list[str]], header: list[str], compiled: list[tuple[str, str]]):
+    """Вычисление всех выражений для пачки строк CSV.
+
+    Возвращает (значения по каждому выражению, ошибки по строкам). Сначала
+    выражение считается векторизованно для всей пачки; если это не удалось,
+    пачка пересчитывается построчно, чтобы ошибка осталась только у виноватых строк.
+    Строки длиннее заголовка не вычисляются.
+    """
+    n = len(rows)
+    errors = [None] * n
+    positions = {name: idx for idx, name in enumerate(header)}
+    for i, row in enumerate(rows):
+        if len(row) > len(header):
+            errors[i] = f"лишние поля: {len(row)} вместо {len(header)}"
+
+    referenced = set()
+    for _, rpn_expr in compiled:
+        referenced.update(token for token in rpn_expr.split() if token in positions)
+
+    columns = {}
+    for name in referenced:
+        idx = positions[name]
+        column = []
+        for i, row in enumerate(rows):
+            try:
+                column.append(parse_vector(row[idx]))
+            except (ValueError, IndexError):
+                column.append(None)
+                if errors[i] is None:
+                    cell = row[idx] if idx < len(row) else ""
+                    errors[i] = f"{name}: некорректное значение '{cell}'"
+        columns[name] = column
+
+    outputs = []
+    for var_name, rpn_expr in compiled:
+        live = [i for i in range(n) if errors[i] is None]
+        if len(live) == n:
+            env = columns
+        else:
+            env = {key: [column[i] for i in live] for key, column in columns.items()}
+
+        try:
+            values = rpn_calculator_batch(rpn_expr, env, len(live))
+        except EVALUATION_ERRORS:
+            values = []
+            for i in live:
+                try:
+                    values.append(rpn_calculator(rpn_expr, {key: column[i] for key, column in columns.items()}))
+                except EVALUATION_ERRORS as e:
+                    values.append(None)
+                    errors[i] = f"{var_name}: {e}"
+
+        result = [None] * n
+        for i, value in zip(live, values):
+            if errors[i] is None:
+                result[i] = value
+        columns[var_name] = result
+        outputs.append(result)
+
+    return outputs, errors
+
+
+def evaluate_csv(source: str, target: str, expressions: list[str], chunk_size: int = 10000,
+                 delimiter: str = ",", error_column: str = "_error", max_error_samples: int = 100,
+                 cache=None) -> dict:
+    """Потоковое вычисление столбцов CSV-файла.
+
+    Имена из заголовка source становятся переменными, каждое выражение
+    'name = expr' добавляет (или перезаписывает) столбец name. Файл читается
+    пачками по chunk_size строк, поэтому память не зависит от размера входа.
+    Ошибки строк пишутся в столбец error_column, первые max_error_samples
+    из них возвращаются в отчёте вместе с номерами строк данных (с 1).
+    cache - ParseCache, из которого берутся уже разобранные выражения.
+    """
+    if chunk_size < 1:
+        raise ValueError("Размер пачки должен быть положительным")
+    compiled = compile_assignments(expressions, cache)
+
+    report = {"rows": 0, "errors": 0, "error_samples": []}
+    with open(source, newline='', encoding='utf-8') as src, open(target, 'w', newline='', encoding='utf-8') as dst:
+        reader = csv.reader(src, delimiter=delimiter)
+        writer = csv.writer(dst, delimiter=delimiter)
+
+        header = next(reader, None)
+        if header is None:
+            raise ValueError("Пустой CSV-файл: нет заголовка")
+        check_columns(header, compiled)
+
+        out_header = list(header)
+        targets = []
+        for var_name, _ in compiled:
+            if var_name in out_header:
+                targets.append(out_header.index(var_name))
+            else:
+                targets.append(len(out_header))
+                out_header.append(var_name)
+        if error_column:
+            out_header.append(error_column)
+        writer.writerow(out_header)
+
+        width = len(out_header) - (1 if error_column else 0)
+        for rows in _read_chunks(reader, chunk_size):
+            outputs, errors = evaluate_chunk(rows, header, compiled)
+            for i, row in enumerate(rows):
+                # Лишние поля длинной строки отбрасываются, чтобы столбцы не съезжали
+                out_row = row[:len(header)] + [""] * (width - min(len(row), len(header)))
+                for position, values in zip(targets, outputs):
+                    out_row[position] = _format_value(values[i])
+                if error_column:
+                    out_row.append(errors[i] or "")
+                writer.writerow(out_row)
+
+                report["rows"] += 1
+                if errors[i] is not None:
+                    report["errors"] += 1
+                    if len(report["error_samples"]) < max_error_samples:
+                        report["error_samples"].append((report["rows"], errors[i]))
+
+    return report
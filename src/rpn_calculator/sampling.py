@@ -0,0 +1,94 @@
+import math
+
+from .calculator import rpn_calculator, rpn_calculator_batch
+from .limits import EvaluationBudget
+from .parser import parse_expression
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+
+class FunctionSampler:
+    """ Адаптивная выборка точек функции одной переменной.
+
+    Выражение разбирается один раз, точки считаются пачками через
+    rpn_calculator_batch. Абсциссы берутся из двоичной решётки (k * 2^-n),
+    поэтому при сдвиге и масштабировании окна большинство точек совпадает
+    с уже посчитанными и берётся из кэша. Точки, превысившие budget,
+    считаются неопределёнными.
+    """
+
+    def __init__(self, expression: str, variable: str = "x", variables: dict = None,
+                 tolerance: float = 0.002, max_depth: int = 8, max_cached: int = 200000,
+                 budget: EvaluationBudget = None):
+        self.rpn = parse_expression(expression)
+        self.variable = variable
+        self.variables = dict(variables or {})
+        self.variables.pop(variable, None)
+        self.tolerance = tolerance
+        self.max_depth = max_depth
+        self.max_cached = max_cached
+        self.budget = budget
+        self._points = {}
+        self.evaluated = 0
+
+    def _compute(self, xs: list) -> list:
+        n = len(xs)
+        columns = {name: [value] * n for name, value in self.variables.items()}
+        columns[self.variable] = xs
+        try:
+            ys = rpn_calculator_batch(self.rpn, columns, n, self.budget)
+        except EVALUATION_ERRORS:
+            # Где-то в пачке точка вне области определения - досчитываем по одной
+            ys = []
+            env = dict(self.variables)
+            for x in xs:
+                env[self.variable] = x
+                try:
+                    ys.append(rpn_calculator(self.rpn, env, self.budget))
+                except EVALUATION_ERRORS:
+                    ys.append(None)
+        return [y if isinstance(y, (int, float)) and math.isfinite(y) else None for y in ys]
+
+    def evaluate(self, xs: list) -> list:
+        """Значения функции в точках xs; None там, где функция не определена."""
+        missing = [x for x in dict.fromkeys(xs) if x not in self._points]
+        if missing:
+            if len(self._points) + len(missing) > self.max_cached:
+                self._points.clear()
+            self.evaluated += len(missing)
+            self._points.update(zip(missing, self._compute(missing)))
+        return [self._points[x] for x in xs]
+
+    def sample(self, x_min: float, x_max: float, initial: int = 64) -> list[tuple]:
+        """Отсортированные точки (x, y) на [x_min, x_max] с уточнением на изгибах."""
+        if not x_min < x_max:
+            raise ValueError("Левая граница диапазона должна быть меньше правой")
+        step = 2.0 ** math.floor(math.log2((x_max - x_min) / max(initial, 1)))
+        first, last = math.floor(x_min / step), math.ceil(x_max / step)
+        xs = [k * step for k in range(first, last + 1)]
+        ys = self.evaluate(xs)
+
+        finite = [y for y in ys if y is not None]
+        y_scale = (max(finite) - min(finite)) if finite else 0.0
+        threshold = self.tolerance * (y_scale or 1.0)
+
+        points = dict(zip(xs, ys))
+        intervals = list(zip(xs, xs[1:]))
+        for _ in range(self.max_depth):
+            if not intervals:
+                break
+            mids = [(a + b) / 2 for a, b in intervals]
+            mid_values = self.evaluate(mids)
+            refined = []
+            for (a, b), m, ym in zip(intervals, mids, mid_values):
+                points[m] = ym
+                ya, yb = points[a], points[b]
+                if ya is None or yb is None or ym is None:
+                    # Граница области определения: уточняем, только если она внутри
+                    if not (ya is None and yb is None and ym is None):
+                        refined.extend(((a, m), (m, b)))
+                elif abs(ym - (ya + yb) / 2) > threshold:
+                    refined.extend(((a, m), (m, b)))
+            intervals = refined
+
+        return sorted(points.items())
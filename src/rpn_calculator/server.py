@@ -0,0 +1,37 @@
+import socketserver
+
+from .context import EvaluationContext
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+
+
+class _LineHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        context = self.server.context
+        for raw in self.rfile:
+            line = raw.decode("utf-8", "replace").strip()
+            if not line:
+                continue
+            try:
+                response = f"= {context.execute(line)}"
+            except EVALUATION_ERRORS as e:
+                response = f"! {e}"
+            except Exception as e:
+                # Непредвиденная ошибка не должна обрывать соединение клиента
+                response = f"! Внутренняя ошибка: {type(e).__name__}: {e}"
+            self.wfile.write(response.replace("\n", " ").encode("utf-8") + b"\n")
+
+
+class CalculatorServer(socketserver.ThreadingTCPServer):
+    """ Построчный TCP-сервер: на каждую строку запроса одна строка ответа.
+
+    Ответ '= результат' или '! текст ошибки'. Все соединения работают с
+    одним EvaluationContext, поэтому присваивания видны всем клиентам.
+    """
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address: tuple, context: EvaluationContext = None):
+        self.context = context or EvaluationContext()
+        super().__init__(address, _LineHandler)
@@ -0,0 +1,223 @@
+import struct
+import weakref
+from array import array
+from collections.abc import Mapping
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+
+from .calculator import rpn_calculator
+from .functions import UserFunction
+from .limits import EvaluationBudget
+from .parser import parse_expression
+
+SLOT = 8
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+
+
+def _kind(value):
+    """'d' для float, 'q' для int в пределах int64, 'v' для вектора, None - значение передаётся как есть."""
+    if isinstance(value, float):
+        return "d"
+    if isinstance(value, int) and not isinstance(value, bool) and INT64_MIN <= value <= INT64_MAX:
+        return "q"
+    if isinstance(value, list) and all(isinstance(x, (int, float)) and not isinstance(x, bool) for x in value):
+        return "v"
+    return None
+
+
+def _release(block, unlink):
+    block.close()
+    if unlink:
+        try:
+            block.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _attach_block(name: str):
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        # До Python 3.13 подключение регистрирует блок в resource_tracker.
+        # Дочерние процессы делят трекер с создателем, и повторная регистрация
+        # безвредна
+        return shared_memory.SharedMemory(name=name)
+
+
+def _function_order(functions: dict) -> list:
+    """Имена функций так, что вызываемые идут раньше вызывающих."""
+    order, seen = [], set()
+
+    def visit(name):
+        if name in seen:
+            return
+        seen.add(name)
+        for callee in functions[name].compiled.functions:
+            if callee in functions:
+                visit(callee)
+        order.append(name)
+
+    for name in functions:
+        visit(name)
+    return order
+
+
+class SharedEnvironment(Mapping):
+    """ Окружение переменных в общей памяти для нескольких процессов.
+
+    Владелец создаёт окружение (create), рабочие процессы подключаются по
+    небольшому дескриптору (attach) без копирования данных через pickle.
+    Скаляры лежат в общей таблице по 8 байт (float64 или int64) и читаются
+    при каждом обращении, поэтому set_scalar владельца сразу видят все
+    процессы. Векторы хранятся подряд как float64 и только читаются:
+    vector_view даёт memoryview без копирования, а список для
+    rpn_calculator создаётся при первом обращении к переменной в процессе.
+    Функции передаются в дескрипторе определениями и заново создаются над
+    самим общим окружением, прочие значения (матрицы, длинные целые) - как
+    есть. Владелец освобождает блок в close(), при выходе из with или при
+    сборке мусора.
+
+    До Python 3.13 подключаться должны только дочерние процессы владельца
+    (например, пул процессов): иначе трекер ресурсов подключившегося
+    процесса удалит блок при его завершении.
+    """
+
+    def __init__(self, block, layout: dict, owner: bool):
+        self._block = block
+        self._layout = layout
+        self._scalars = layout["scalars"]
+        self._vectors = layout["vectors"]
+        self._other = dict(layout["other"])
+        self._owner = owner
+        # Тело функции видит общее окружение, а не словарь, из которого она пришла
+        compiled_functions = {}
+        for name, (params, body, memo_size) in layout.get("functions", {}).items():
+            function = UserFunction(name, params, body, scope=dict(compiled_functions), memo_size=memo_size)
+            function.scope = self
+            compiled_functions[name] = self._other[name] = function
+        self._lists = {}
+        self._finalizer = weakref.finalize(self, _release, block, owner)
+
+    @classmethod
+    def create(cls, variables: dict) -> "SharedEnvironment":
+        scalars, vectors, other, functions = {}, {}, {}, {}
+        slots = 0
+        for name, value in variables.items():
+            kind = _kind(value)
+            if kind in ("d", "q"):
+                scalars[name] = (slots, kind)
+                slots += 1
+            elif isinstance(value, UserFunction):
+                functions[name] = value
+            elif kind is None:
+                other[name] = value
+        for name, value in variables.items():
+            if _kind(value) == "v":
+                vectors[name] = (slots, len(value))
+                slots += len(value)
+
+        layout = {"scalars": scalars, "vectors": vectors, "other": other, "size": slots * SLOT,
+                  "functions": {name: (functions[name].params, functions[name].body,
+                                       functions[name].requested_memo_size)
+                                for name in _function_order(functions)}}
+        block = shared_memory.SharedMemory(create=True, size=max(slots * SLOT, SLOT))
+        layout["block"] = block.name
+        environment = cls(block, layout, owner=True)
+        for name, (index, kind) in scalars.items():
+            struct.pack_into(kind, block.buf, index * SLOT, variables[name])
+        for name, (offset, length) in vectors.items():
+            block.buf[offset * SLOT:(offset + length) * SLOT] = memoryview(array("d", variables[name])).cast("B")
+        return environment
+
+    @classmethod
+    def attach(cls, descriptor: dict) -> "SharedEnvironment":
+        return cls(_attach_block(descriptor["block"]), descriptor, owner=False)
+
+    def descriptor(self) -> dict:
+        """Небольшой picklable словарь для attach в другом процессе."""
+        return self._layout
+
+    def __getitem__(self, name):
+        scalar = self._scalars.get(name)
+        if scalar is not None:
+            index, kind = scalar
+            return struct.unpack_from(kind, self._block.buf, index * SLOT)[0]
+        vector = self._lists.get(name)
+        if vector is None:
+            if name not in self._vectors:
+                return self._other[name]
+            offset, length = self._vectors[name]
+            with self._block.buf[offset * SLOT:(offset + length) * SLOT] as raw, raw.cast("d") as doubles:
+                vector = self._lists[name] = doubles.tolist()
+        return vector
+
+    def __contains__(self, name):
+        return name in self._scalars or name in self._vectors or name in self._other
+
+    def __iter__(self):
+        yield from self._scalars
+        yield from self._vectors
+        yield from self._other
+
+    def __len__(self):
+        return len(self._scalars) + len(self._vectors) + len(self._other)
+
+    def vector_view(self, name: str) -> memoryview:
+        """ Вектор как memoryview над общей памятью (float64, только чтение).
+
+        Представление нужно освободить (release или with) до close().
+        """
+        offset, length = self._vectors[name]
+        return self._block.buf[offset * SLOT:(offset + length) * SLOT].cast("d").toreadonly()
+
+    def set_scalar(self, name: str, value):
+        """ Изменение скаляра владельцем; новое значение сразу видно всем процессам.
+
+        Тип слота задаётся при создании: в целый слот можно записать только
+        целое число в пределах int64.
+        """
+        if not self._owner:
+            raise PermissionError("Изменять общее окружение может только создавший его процесс")
+        index, kind = self._scalars[name]
+        if _kind(value) not in ("d", "q"):
+            raise TypeError(f"Значение {name} должно быть числом")
+        if kind == "q" and _kind(value) != "q":
+            raise TypeError(f"Переменная {name} целая, значение {value} в неё не записывается")
+        struct.pack_into(kind, self._block.buf, index * SLOT, float(value) if kind == "d" else int(value))
+
+    def close(self):
+        self._lists.clear()
+        self._finalizer()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+_worker_environment = None
+
+
+def init_worker(descriptor: dict):
+    """initializer для пула процессов: подключение к общему окружению."""
+    global _worker_environment
+    _worker_environment = SharedEnvironment.attach(descriptor)
+
+
+def evaluate_in_worker(expression: str, budget: EvaluationBudget = None):
+    return rpn_calculator(parse_expression(expression), _worker_environment, budget)
+
+
+def evaluate_parallel(expressions: list[str], variables: dict, processes: int = None,
+                      budget: EvaluationBudget = None, chunksize: int = 64) -> list:
+    """ Вычисление выражений в пуле процессов над общим окружением variables.
+
+    Ошибка любого выражения прерывает вычисление, как в pool.map.
+    """
+
+    with SharedEnvironment.create(variables) as environment:
+        with ProcessPoolExecutor(processes, initializer=init_worker,
+                                 initargs=(environment.descriptor(),)) as pool:
+            return list(pool.map(evaluate_in_worker, expressions, [budget] * len(expressions),
+                                 chunksize=chunksize))
@@ -0,0 +1,248 @@
+import struct
+import sys
+from array import array
+from decimal import Decimal
+
+from .calculator import rpn_calculator, split_assignment
+from .functions import define_function
+from .matrix import is_matrix
+from .parser import parse_expression
+from .vectors import is_sparse
+
+MAGIC = b"RPNR"
+FORMAT_VERSION = 1
+FILE_HEADER = struct.Struct("<4sH")
+# Заголовок блока: строк, значений векторов, байт текста
+BLOCK_HEADER = struct.Struct("<IQQ")
+DEFAULT_BLOCK_ROWS = 65536
+
+# Виды значений в столбце kinds
+FLOAT, INT, VECTOR, ERROR, BIGINT, DECIMAL, FUNCTION = range(7)
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+INT64_MIN, INT64_MAX = -2 ** 63, 2 ** 63 - 1
+NAN = float("nan")
+
+
+def _to_bytes(column: array) -> bytes:
+    # Формат файла - little-endian независимо от платформы
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column.tobytes()
+
+
+def _from_bytes(typecode: str, data: bytes) -> array:
+    column = array(typecode)
+    column.frombytes(data)
+    if sys.byteorder == "big" and column.itemsize > 1:
+        column.byteswap()
+    return column
+
+
+class ResultWriter:
+    """ Запись результатов пакетного вычисления в столбцовый двоичный файл.
+
+    Строки копятся в памяти и сбрасываются блоками по block_rows. Каждый
+    блок хранит столбцы подряд: виды значений (uint8), float64, int64,
+    смещения и значения векторов (uint64 и float64), смещения и байты
+    текста (сообщения об ошибках, длинные целые, Decimal и определения
+    функций в UTF-8).
+    Разреженные векторы записываются плотными; матрицы не поддерживаются.
+    """
+
+    def __init__(self, path: str, block_rows: int = DEFAULT_BLOCK_ROWS):
+        if block_rows < 1:
+            raise ValueError("Размер блока должен быть положительным")
+        self.block_rows = block_rows
+        self.rows = 0
+        self._file = open(path, "wb")
+        self._file.write(FILE_HEADER.pack(MAGIC, FORMAT_VERSION))
+        self._reset()
+
+    def _reset(self):
+        self._kinds = array("B")
+        self._floats = array("d")
+        self._ints = array("q")
+        self._vector_offsets = array("Q", [0])
+        self._vector_values = array("d")
+        self._text_offsets = array("Q", [0])
+        self._text = bytearray()
+
+    def _append(self, kind: int, number=0, text: str = None):
+        self._kinds.append(kind)
+        self._floats.append(number if kind == FLOAT else NAN)
+        self._ints.append(number if kind == INT else 0)
+        self._vector_offsets.append(len(self._vector_values))
+        if text is not None:
+            self._text += text.encode("utf-8")
+        self._text_offsets.append(len(self._text))
+        self.rows += 1
+        if len(self._kinds) >= self.block_rows:
+            self.flush()
+
+    def append(self, value):
+        """Добавление результата: число, целое, Decimal или вектор."""
+        if type(value) is float and len(self._kinds) + 1 < self.block_rows:
+            # Самый частый случай без промежуточных вызовов
+            self._kinds.append(FLOAT)
+            self._floats.append(value)
+            self._ints.append(0)
+            self._vector_offsets.append(self._vector_offsets[-1])
+            self._text_offsets.append(self._text_offsets[-1])
+            self.rows += 1
+            return
+        if isinstance(value, bool):
+            value = int(value)
+        if isinstance(value, float):
+            self._append(FLOAT, value)
+        elif isinstance(value, int):
+            if INT64_MIN <= value <= INT64_MAX:
+                self._append(INT, value)
+            else:
+                self._append(BIGINT, text=str(value))
+        elif isinstance(value, Decimal):
+            self._append(DECIMAL, text=str(value))
+        elif isinstance(value, list) or is_sparse(value):
+            self._vector_values.extend(value.to_dense() if is_sparse(value) else value)
+            self._append(VECTOR)
+        elif is_matrix(value):
+            raise TypeError("Матрицы не поддерживаются столбцовым форматом")
+        else:
+            raise TypeError(f"Неподдерживаемый тип результата: {type(value).__name__}")
+
+    def append_error(self, message: str):
+        self._append(ERROR, text=message)
+
+    def append_function(self, function):
+        """Строка для определения функции: хранится его запись."""
+        self._append(FUNCTION, text=repr(function))
+
+    def flush(self):
+        """Запись накопленного блока на диск."""
+        if not self._kinds:
+            return
+        self._file.write(BLOCK_HEADER.pack(len(self._kinds), len(self._vector_values), len(self._text)))
+        for column in (self._kinds, self._floats, self._ints, self._vector_offsets, self._vector_values,
+                       self._text_offsets):
+            self._file.write(_to_bytes(column))
+        self._file.write(self._text)
+        self._reset()
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class ResultReader:
+    """ Чтение файла ResultWriter: по строкам (__iter__) или столбцами (columns).
+
+    Строка определения функции читается как текст определения.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+    def blocks(self):
+        """Блоки файла как словари столбцов array (смещения - внутри блока)."""
+        with open(self.path, "rb") as f:
+            header = f.read(FILE_HEADER.size)
+            if len(header) < FILE_HEADER.size or FILE_HEADER.unpack(header) != (MAGIC, FORMAT_VERSION):
+                raise ValueError(f"{self.path}: не файл результатов или неподдерживаемая версия")
+            while True:
+                raw = f.read(BLOCK_HEADER.size)
+                if not raw:
+                    return
+                if len(raw) < BLOCK_HEADER.size:
+                    raise ValueError(f"{self.path}: обрезанный блок")
+                rows, values, text_size = BLOCK_HEADER.unpack(raw)
+                block = {}
+                for name, typecode, count in (("kinds", "B", rows), ("floats", "d", rows), ("ints", "q", rows),
+                                              ("vector_offsets", "Q", rows + 1), ("vector_values", "d", values),
+                                              ("text_offsets", "Q", rows + 1)):
+                    size = count * array(typecode).itemsize
+                    data = f.read(size)
+                    if len(data) < size:
+                        raise ValueError(f"{self.path}: обрезанный блок")
+                    block[name] = _from_bytes(typecode, data)
+                block["text"] = f.read(text_size)
+                if len(block["text"]) < text_size:
+                    raise ValueError(f"{self.path}: обрезанный блок")
+                yield block
+
+    def __iter__(self):
+        """Пары (значение, ошибка): ошибка - None или текст, значение при ошибке - None."""
+        for block in self.blocks():
+            kinds, floats, ints = block["kinds"], block["floats"], block["ints"]
+            vector_offsets, vector_values = block["vector_offsets"], block["vector_values"]
+            text_offsets, text = block["text_offsets"], block["text"]
+            for row, kind in enumerate(kinds):
+                if kind == FLOAT:
+                    yield floats[row], None
+                elif kind == INT:
+                    yield ints[row], None
+                elif kind == VECTOR:
+                    yield vector_values[vector_offsets[row]:vector_offsets[row + 1]].tolist(), None
+                else:
+                    string = text[text_offsets[row]:text_offsets[row + 1]].decode("utf-8")
+                    if kind == ERROR:
+                        yield None, string
+                    elif kind == BIGINT:
+                        yield int(string), None
+                    elif kind == DECIMAL:
+                        yield Decimal(string), None
+                    else:
+                        yield string, None
+
+    def columns(self) -> dict:
+        """ Весь файл столбцами: kinds, floats, ints, vector_offsets, vector_values (array)
+        и errors - {номер строки: текст}. Смещения векторов - сквозные по файлу.
+        """
+        result = {"kinds": array("B"), "floats": array("d"), "ints": array("q"),
+                  "vector_offsets": array("Q", [0]), "vector_values": array("d"), "errors": {}}
+        for block in self.blocks():
+            first_row, base = len(result["kinds"]), len(result["vector_values"])
+            for name in ("kinds", "floats", "ints", "vector_values"):
+                result[name].extend(block[name])
+            result["vector_offsets"].extend(base + offset for offset in block["vector_offsets"][1:])
+            offsets, text = block["text_offsets"], block["text"]
+            for row, kind in enumerate(block["kinds"]):
+                if kind == ERROR:
+                    result["errors"][first_row + row] = text[offsets[row]:offsets[row + 1]].decode("utf-8")
+        return result
+
+
+def write_program(lines, sink: ResultWriter, env: dict = None, backend=None, cache=None) -> dict:
+    """ Выполнение программы с записью строки результата на каждую непустую строку.
+
+    Строки - выражения, присваивания или определения функций (они
+    записываются append_function); ошибка строки записывается текстом и
+    не прерывает программу. cache - ParseCache для готовых разборов.
+    Возвращает окружение после программы.
+    """
+    env = {} if env is None else env
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            function = define_function(line, env)
+            if function is not None:
+                sink.append_function(function)
+                continue
+            var_name, expression = split_assignment(line)
+            rpn = cache.rpn(expression) if cache is not None else parse_expression(expression)
+            result = rpn_calculator(rpn, env, backend=backend)
+            if var_name:
+                env[var_name] = result
+            sink.append(result)
+        except EVALUATION_ERRORS as e:
+            sink.append_error(str(e))
+    return env
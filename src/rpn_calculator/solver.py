@@ -0,0 +1,245 @@
+import math
+import re
+
+from .autodiff import Dual, evaluate_dual
+from .calculator import finalize_result
+from .compiler import compile_rpn
+from .functions import user_functions
+from .limits import DEFAULT_BUDGET, BudgetExceededError, EvaluationBudget
+from .parser import parse_expression
+from .sampling import FunctionSampler
+
+EVALUATION_ERRORS = (ValueError, TypeError, ArithmeticError)
+GOLDEN = (math.sqrt(5) - 1) / 2
+# Сколько операторов может выполнить одно решение за все итерации вместе
+MAX_SOLVER_OPERATIONS = 10 ** 7
+
+# solve EXPR for x in LO..HI | solve EXPR for x near X0 | minimize EXPR for x in LO..HI
+COMMAND_PATTERN = re.compile(
+    r'^(solve|minimize)\s+(.+?)\s+for\s+([A-Za-z_]\w*)\s+'
+    r'(?:in\s+(\S+?)\s*\.\.\s*(\S+)|near\s+(\S+))\s*$')
+
+
+class SolverResult:
+    """ Итог численного метода """
+
+    __slots__ = ("x", "value", "iterations", "evaluations", "converged", "method")
+
+    def __init__(self, x, value, iterations, evaluations, converged, method):
+        self.x = x
+        self.value = value
+        self.iterations = iterations
+        self.evaluations = evaluations
+        self.converged = converged
+        self.method = method
+
+    def __repr__(self):
+        return (f"SolverResult(x={self.x!r}, value={self.value!r}, iterations={self.iterations}, "
+                f"evaluations={self.evaluations}, converged={self.converged}, method={self.method!r})")
+
+
+class _Objective:
+    """ Выражение, скомпилированное один раз, как функция одной переменной
+
+    Каждое вычисление проверяется budget, а общее число операторов за все
+    вычисления ограничено MAX_SOLVER_OPERATIONS.
+    """
+
+    def __init__(self, expression: str, variable: str, env: dict, budget: EvaluationBudget = None):
+        if '=' in expression:
+            # Уравнение lhs = rhs сводится к lhs - (rhs) = 0
+            lhs, rhs = expression.split('=', 1)
+            expression = f"({lhs}) - ({rhs})"
+        self.expression = expression
+        self.variable = variable
+        self.env = dict(env or {})
+        self.env.pop(variable, None)
+        self.compiled = compile_rpn(parse_expression(expression), functions=user_functions(self.env))
+        self.budget = budget or DEFAULT_BUDGET
+        self.evaluations = 0
+        self._point = dict(self.env)
+
+    def _count(self, evaluations: int):
+        self.evaluations += evaluations
+        if self.evaluations * max(self.compiled.operations, 1) > MAX_SOLVER_OPERATIONS:
+            raise BudgetExceededError(f"Превышен лимит операций решателя: {MAX_SOLVER_OPERATIONS}")
+
+    def __call__(self, x: float) -> float:
+        self._count(1)
+        self._point[self.variable] = x
+        value = self.compiled.run(self._point, self.budget)
+        if isinstance(value, (list, complex)) or not math.isfinite(value):
+            raise ValueError(f"Функция не определена или не конечна в точке {x}")
+        return value
+
+    def with_derivative(self, x: float) -> tuple:
+        self._count(1)
+        dual = evaluate_dual(self.compiled, self.env, {self.variable: Dual(x, [1.0])}, budget=self.budget)
+        return dual.value, dual.grad[0]
+
+    def probe(self, lo: float, hi: float, count: int) -> list[tuple]:
+        """Значения в count равноотстоящих точках одной пачкой (None - не определено)."""
+        xs = [lo + (hi - lo) * i / (count - 1) for i in range(count)]
+        self._count(count)
+        sampler = FunctionSampler(self.expression, self.variable, self.env, budget=self.budget)
+        return list(zip(xs, sampler.evaluate(xs)))
+
+
+def _check_interval(lo: float, hi: float, probes: int):
+    if not lo < hi:
+        raise ValueError("Левая граница отрезка должна быть меньше правой")
+    if probes < 2:
+        raise ValueError("Нужно хотя бы две пробные точки")
+
+
+def _brent_root(f, a, b, fa, fb, tolerance, max_iterations):
+    """Метод Брента: обратная квадратичная интерполяция, секущие и бисекция."""
+    if abs(fa) < abs(fb):
+        a, b, fa, fb = b, a, fb, fa
+    c, fc, d, bisected = a, fa, a, True
+    for iteration in range(1, max_iterations + 1):
+        if fb == 0 or abs(b - a) <= tolerance * (1 + abs(b)):
+            return b, fb, iteration, True
+        if fa != fc and fb != fc:
+            s = (a * fb * fc / ((fa - fb) * (fa - fc)) + b * fa * fc / ((fb - fa) * (fb - fc))
+                 + c * fa * fb / ((fc - fa) * (fc - fb)))
+        else:
+            s = b - fb * (b - a) / (fb - fa)
+        low, high = sorted(((3 * a + b) / 4, b))
+        step_limit = abs(b - c) if bisected else abs(c - d)
+        if not low < s < high or abs(s - b) >= step_limit / 2 or step_limit < tolerance:
+            s, bisected = (a + b) / 2, True
+        else:
+            bisected = False
+        fs = f(s)
+        d, c, fc = c, b, fb
+        if fa * fs < 0:
+            b, fb = s, fs
+        else:
+            a, fa = s, fs
+        if abs(fa) < abs(fb):
+            a, b, fa, fb = b, a, fb, fa
+    return b, fb, max_iterations, False
+
+
+def _newton(objective: _Objective, x0: float, tolerance: float, max_iterations: int) -> SolverResult:
+    x = x0
+    value = None
+    for iteration in range(1, max_iterations + 1):
+        value, slope = objective.with_derivative(x)
+        if value == 0:
+            return SolverResult(x, value, iteration, objective.evaluations, True, "newton")
+        if slope == 0:
+            raise ValueError(f"Производная обращается в ноль в точке {x}, метод Ньютона остановлен")
+        step = value / slope
+        x -= step
+        if abs(step) <= tolerance * (1 + abs(x)):
+            return SolverResult(x, objective(x), iteration, objective.evaluations, True, "newton")
+    return SolverResult(x, value, max_iterations, objective.evaluations, False, "newton")
+
+
+def find_root(expression: str, variable: str = "x", lo: float = None, hi: float = None,
+              x0: float = None, env: dict = None, tolerance: float = 1e-12,
+              max_iterations: int = 100, probes: int = 64, budget: EvaluationBudget = None) -> SolverResult:
+    """ Корень уравнения f(variable) = 0.
+
+    С отрезком [lo, hi] функция сначала вычисляется пачкой в probes точках,
+    первая смена знака уточняется методом Брента. Без отрезка нужен x0 -
+    тогда используется метод Ньютона с точной производной (autodiff).
+    Выражение вида "lhs = rhs" решается как lhs - rhs = 0. budget
+    ограничивает каждое вычисление функции.
+    """
+
+    objective = _Objective(expression, variable, env, budget)
+    if lo is None or hi is None:
+        if x0 is None:
+            raise ValueError("Укажите отрезок lo..hi или начальную точку x0")
+        return _newton(objective, x0, tolerance, max_iterations)
+
+    _check_interval(lo, hi, probes)
+    points = [(x, y) for x, y in objective.probe(lo, hi, probes) if y is not None]
+    for (a, ya), (b, yb) in zip(points, points[1:]):
+        if ya * yb > 0:
+            continue
+        # Пробы округлены; знаки на концах перепроверяем точным вычислением
+        fa, fb = objective(a), objective(b)
+        if fa == 0:
+            return SolverResult(a, fa, 0, objective.evaluations, True, "probe")
+        if fb == 0:
+            return SolverResult(b, fb, 0, objective.evaluations, True, "probe")
+        if fa * fb < 0:
+            x, value, iterations, converged = _brent_root(objective, a, b, fa, fb, tolerance, max_iterations)
+            return SolverResult(x, value, iterations, objective.evaluations, converged, "brent")
+    raise ValueError(f"На отрезке [{lo}, {hi}] не найдено смены знака функции")
+
+
+def minimize(expression: str, variable: str = "x", lo: float = None, hi: float = None,
+             env: dict = None, tolerance: float = 1e-10, max_iterations: int = 200,
+             probes: int = 64, budget: EvaluationBudget = None) -> SolverResult:
+    """ Минимум функции на отрезке [lo, hi].
+
+    Пачка пробных точек выбирает лучший узел, затем золотое сечение
+    уточняет минимум между соседними узлами.
+    """
+
+    if lo is None or hi is None:
+        raise ValueError("Для минимизации нужен отрезок lo..hi")
+    _check_interval(lo, hi, probes)
+    objective = _Objective(expression, variable, env, budget)
+    points = objective.probe(lo, hi, probes)
+    finite = [i for i, (_, y) in enumerate(points) if y is not None]
+    if not finite:
+        raise ValueError(f"Функция не определена ни в одной точке отрезка [{lo}, {hi}]")
+    best = min(finite, key=lambda i: points[i][1])
+
+    a = points[max(best - 1, 0)][0]
+    b = points[min(best + 1, len(points) - 1)][0]
+    c, d = b - GOLDEN * (b - a), a + GOLDEN * (b - a)
+    fc, fd = objective(c), objective(d)
+    iterations, converged = 0, False
+    while iterations < max_iterations:
+        iterations += 1
+        if abs(b - a) <= tolerance * (1 + abs(c) + abs(d)):
+            converged = True
+            break
+        if fc < fd:
+            b, d, fd = d, c, fc
+            c = b - GOLDEN * (b - a)
+            fc = objective(c)
+        else:
+            a, c, fc = c, d, fd
+            d = a + GOLDEN * (b - a)
+            fd = objective(d)
+
+    x, value = (c, fc) if fc < fd else (d, fd)
+    # Минимум может лежать на границе отрезка
+    for edge in (lo, hi):
+        try:
+            edge_value = objective(edge)
+        except EVALUATION_ERRORS:
+            continue
+        if edge_value < value:
+            x, value = edge, edge_value
+    return SolverResult(x, value, iterations, objective.evaluations, converged, "golden")
+
+
+def run_solver_command(line: str, env: dict = None):
+    """Выполнение команды solve/minimize из CLI или GUI (None - строка не является командой)."""
+    match = COMMAND_PATTERN.match(line.strip())
+    if match is None:
+        return None
+    command, expression, variable, lo, hi, x0 = match.groups()
+    if command == "solve":
+        if x0 is not None:
+            return find_root(expression, variable, x0=float(x0), env=env)
+        return find_root(expression, variable, float(lo), float(hi), env=env)
+    if x0 is not None:
+        raise ValueError("minimize требует отрезок: minimize EXPR for x in LO..HI")
+    return minimize(expression, variable, float(lo), float(hi), env=env)
+
+
+def format_solver_result(line: str, result: SolverResult) -> str:
+    variable = COMMAND_PATTERN.match(line.strip()).group(3)
+    status = "" if result.converged else " (точность не достигнута)"
+    return (f"{variable} = {finalize_result(result.x)}, f = {finalize_result(result.value)} "
+            f"[{result.method}, вычислений: {result.evaluations}]{status}")
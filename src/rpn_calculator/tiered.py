@@ -0,0 +1,106 @@
+import time
+from collections import OrderedDict
+
+from .calculator import rpn_calculator
+from .compiler import compile_rpn
+from .functions import UserFunction, definition_version, user_functions
+from .limits import EvaluationBudget
+from .parser import parse_expression
+
+
+def _calls_resolve(compiled, variables) -> bool:
+    """Все вызовы скомпилированного выражения по-прежнему указывают на функции."""
+    return not compiled.functions or all(
+        isinstance((variables or {}).get(name), UserFunction) for name in compiled.functions)
+
+
+class TieredEvaluator:
+    """ Двухуровневое исполнение выражений.
+
+    Первые threshold вычислений выражения идут через интерпретатор
+    (разбор + rpn_calculator). После этого выражение компилируется
+    (compile_rpn) и дальше исполняется скомпилированным. Не больше
+    max_compiled скомпилированных выражений хранится одновременно (LRU).
+    Вызовы функций компилируются по таблице функций на момент повышения;
+    после любого нового определения функции или если имя вызова в
+    переменных больше не функция, выражение компилируется заново.
+    Скомпилированный код работает только с float, поэтому с другим
+    числовым бэкендом выражение всегда интерпретируется.
+    """
+
+    def __init__(self, threshold: int = 50, max_compiled: int = 1024, max_tracked: int = 100000):
+        if threshold < 0:
+            raise ValueError("Порог компиляции не может быть отрицательным")
+        self.threshold = threshold
+        self.max_compiled = max_compiled
+        self.max_tracked = max_tracked
+        self._counts = {}
+        self._interpreted_time = {}
+        self._compiled = OrderedDict()
+        self.interpreted_runs = 0
+        self.compiled_runs = 0
+        self.promotions = 0
+        self.time_saved = 0.0
+
+    def evaluate(self, expression: str, variables: dict = None, budget: EvaluationBudget = None, backend=None):
+        """Вычисление выражения в инфиксной или постфиксной нотации."""
+        if backend is not None and backend.name != "float":
+            self.interpreted_runs += 1
+            return rpn_calculator(parse_expression(expression), variables, budget, backend=backend)
+
+        entry = self._compiled.get(expression)
+        if entry is not None and (entry[1] != definition_version() or not _calls_resolve(entry[0], variables)):
+            self._promote(expression, variables)
+            entry = self._compiled[expression]
+        if entry is not None:
+            compiled = entry[0]
+            self._compiled.move_to_end(expression)
+            start = time.perf_counter()
+            result = compiled.evaluate(variables, budget)
+            elapsed = time.perf_counter() - start
+            self.compiled_runs += 1
+            count, total = self._interpreted_time.get(expression, (0, 0.0))
+            if count:
+                self.time_saved += total / count - elapsed
+            return result
+
+        start = time.perf_counter()
+        result = rpn_calculator(parse_expression(expression), variables, budget)
+        elapsed = time.perf_counter() - start
+        self.interpreted_runs += 1
+
+        if len(self._counts) >= self.max_tracked and expression not in self._counts:
+            # Холодные выражения забываем целиком, чтобы счётчики не росли бесконечно
+            self._counts.clear()
+            self._interpreted_time = {key: self._interpreted_time[key] for key in self._compiled
+                                      if key in self._interpreted_time}
+        count = self._counts.get(expression, 0) + 1
+        self._counts[expression] = count
+        runs, total = self._interpreted_time.get(expression, (0, 0.0))
+        self._interpreted_time[expression] = (runs + 1, total + elapsed)
+
+        if count >= self.threshold:
+            self._promote(expression, variables)
+        return result
+
+    def _promote(self, expression: str, variables: dict = None):
+        compiled = compile_rpn(parse_expression(expression), functions=user_functions(variables))
+        self._compiled[expression] = (compiled, definition_version())
+        self._counts.pop(expression, None)
+        self.promotions += 1
+        while len(self._compiled) > self.max_compiled:
+            evicted, _ = self._compiled.popitem(last=False)
+            self._interpreted_time.pop(evicted, None)
+
+    def is_compiled(self, expression: str) -> bool:
+        return expression in self._compiled
+
+    def stats(self) -> dict:
+        """Статистика: число вычислений по уровням, повышений и сэкономленное время (сек)."""
+        return {
+            "interpreted": self.interpreted_runs,
+            "compiled": self.compiled_runs,
+            "promotions": self.promotions,
+            "compiled_expressions": len(self._compiled),
+            "time_saved": self.time_saved,
+        }
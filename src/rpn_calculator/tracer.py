@@ -0,0 +1,60 @@
+import json
+from collections import deque
+
+
+class TraceStep:
+    """ Один шаг вычисления: токен, снятые операнды, результат и глубина стека """
+
+    __slots__ = ("index", "token", "operands", "result", "depth")
+
+    def __init__(self, index, token, operands, result, depth):
+        self.index = index
+        self.token = token
+        self.operands = operands
+        self.result = result
+        self.depth = depth
+
+    def to_dict(self) -> dict:
+        return {"index": self.index, "token": self.token, "operands": list(self.operands),
+                "result": self.result, "depth": self.depth}
+
+
+class StepTracer:
+    """ Запись шагов rpn_calculator в кольцевой буфер.
+
+    Хранятся только последние capacity шагов; dropped - сколько более
+    ранних шагов вытеснено. Передайте трассировщик в rpn_calculator(tracer=...),
+    без него вычисление не платит за трассировку ничего, кроме одной проверки.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        if capacity < 1:
+            raise ValueError("Ёмкость трассировки должна быть положительной")
+        self.steps = deque(maxlen=capacity)
+        self.total = 0
+        self.expression = None
+
+    def start(self, expression: str):
+        """Начало новой трассы (старые шаги удаляются)."""
+        self.steps.clear()
+        self.total = 0
+        self.expression = expression
+
+    def record(self, token: str, operands: tuple, result, depth: int):
+        self.total += 1
+        self.steps.append(TraceStep(self.total, token, operands, result, depth))
+
+    @property
+    def dropped(self) -> int:
+        return self.total - len(self.steps)
+
+    def __len__(self):
+        return len(self.steps)
+
+    def __iter__(self):
+        return iter(self.steps)
+
+    def to_json(self, indent: int = None) -> str:
+        return json.dumps({"expression": self.expression, "dropped": self.dropped,
+                           "steps": [step.to_dict() for step in self.steps]},
+                          ensure_ascii=False, indent=indent, default=str)
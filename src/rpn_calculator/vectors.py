@@ -1,37 +1,145 @@
 import math
+import operator
 from typing import Union
 
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .matrix import Matrix, parse_matrix
+
 Vector = list[float]
 
+# С какой длины выгоднее отдавать векторы в NumPy (если он установлен)
+NUMPY_MIN_LENGTH = 4096
+
+
+class SparseVector:
+    """ Разреженный вектор: размерность и отсортированные массивы индексов и значений.
+
+    Нули не хранятся. Сложение, вычитание, умножение на скаляр, dot, abs
+    и angle работают только с ненулевыми элементами; остальные операции
+    получают плотный список через to_dense().
+    """
+
+    __slots__ = ("size", "indices", "values")
+
+    def __init__(self, size: int, items=()):
+        if size < 0:
+            raise ValueError("Размерность вектора не может быть отрицательной")
+        pairs = sorted((int(i), float(v)) for i, v in dict(items).items() if v != 0)
+        if pairs and not 0 <= pairs[0][0] <= pairs[-1][0] < size:
+            raise ValueError(f"Индекс разреженного вектора вне диапазона 0..{size - 1}")
+        self.size = size
+        self.indices = [i for i, _ in pairs]
+        self.values = [v for _, v in pairs]
+
+    def as_dict(self) -> dict:
+        return dict(zip(self.indices, self.values))
+
+    def to_dense(self) -> Vector:
+        dense = [0.0] * self.size
+        for i, v in zip(self.indices, self.values):
+            dense[i] = v
+        return dense
+
+    def __len__(self):
+        return self.size
+
+    def __eq__(self, other):
+        if isinstance(other, SparseVector):
+            return self.size == other.size and self.indices == other.indices and self.values == other.values
+        if isinstance(other, list):
+            return self.to_dense() == other
+        return NotImplemented
+
+    def __repr__(self):
+        items = ",".join(f"{i}:{v!r}" for i, v in zip(self.indices, self.values))
+        return f"{{{self.size};{items}}}"
+
 
 def is_vector(obj):
-    return isinstance(obj, list)
+    return isinstance(obj, (list, SparseVector))
 
 
-def vector_add(a: Vector, b: Vector) -> Vector:
+def is_sparse(obj) -> bool:
+    return isinstance(obj, SparseVector)
+
+
+def densify(v) -> Vector:
+    """Плотное представление вектора (список возвращается как есть)."""
+    return v.to_dense() if isinstance(v, SparseVector) else v
+
+
+def _use_numpy(*vectors) -> bool:
+    return np is not None and len(vectors[0]) >= NUMPY_MIN_LENGTH
+
+
+def _check_lengths(a: Vector, b: Vector, action: str):
     if len(a) != len(b):
-        raise ValueError("Сложение векторов разной длины")
-    return [x + y for x, y in zip(a, b)]
+        raise ValueError(f"{action} векторов разной длины")
+
+
+def _sparse_combine(a: SparseVector, b: SparseVector, sign: float) -> SparseVector:
+    merged = a.as_dict()
+    for i, v in zip(b.indices, b.values):
+        merged[i] = merged.get(i, 0.0) + sign * v
+    return SparseVector(a.size, merged)
+
+
+def vector_add(a: Vector, b: Vector) -> Vector:
+    _check_lengths(a, b, "Сложение")
+    if is_sparse(a) and is_sparse(b):
+        return _sparse_combine(a, b, 1.0)
+    a, b = densify(a), densify(b)
+    return list(map(operator.add, a, b))
 
 
 def vector_sub(a: Vector, b: Vector) -> Vector:
-    if len(a) != len(b):
-        raise ValueError("Вычитание векторов разной длины")
-    return [x - y for x, y in zip(a, b)]
+    _check_lengths(a, b, "Вычитание")
+    if is_sparse(a) and is_sparse(b):
+        return _sparse_combine(a, b, -1.0)
+    a, b = densify(a), densify(b)
+    return list(map(operator.sub, a, b))
 
 
 def vector_neg(v: Vector) -> Vector:
-    return [-x for x in v]
+    if is_sparse(v):
+        return vector_scalar_mul(v, -1.0)
+    return list(map(operator.neg, v))
 
 
 def vector_abs(v: Vector) -> float:
-    return math.sqrt(sum(x * x for x in v))
+    if is_sparse(v):
+        return math.hypot(*v.values)
+    if _use_numpy(v):
+        return float(np.linalg.norm(np.asarray(v, dtype=float)))
+    return math.hypot(*v)
 
 
 def vector_dot(a: Vector, b: Vector) -> float:
-    if len(a) != len(b):
-        raise ValueError("Скалярное произведение векторов разной длины")
-    return sum(x * y for x, y in zip(a, b))
+    _check_lengths(a, b, "Скалярное произведение")
+    if is_sparse(a) and is_sparse(b):
+        if len(a.indices) > len(b.indices):
+            a, b = b, a
+        other = b.as_dict()
+        return sum(v * other.get(i, 0.0) for i, v in zip(a.indices, a.values))
+    if is_sparse(a) or is_sparse(b):
+        sparse, dense = (a, b) if is_sparse(a) else (b, a)
+        return sum(v * dense[i] for i, v in zip(sparse.indices, sparse.values))
+    if _use_numpy(a):
+        return float(np.dot(np.asarray(a, dtype=float), np.asarray(b, dtype=float)))
+    return sum(map(operator.mul, a, b))
+
+
+def vector_cross(a: Vector, b: Vector) -> Vector:
+    if len(a) != 3 or len(b) != 3:
+        raise ValueError("Векторное произведение определено только для трёхмерных векторов")
+    a, b = densify(a), densify(b)
+    return [a[1] * b[2] - a[2] * b[1],
+            a[2] * b[0] - a[0] * b[2],
+            a[0] * b[1] - a[1] * b[0]]
 
 
 def vector_angle(a: Vector, b: Vector) -> float:
@@ -45,11 +153,100 @@ def vector_angle(a: Vector, b: Vector) -> float:
 
 
 def vector_scalar_mul(v: Vector, s: float) -> Vector:
+    if is_sparse(v):
+        return SparseVector(v.size, zip(v.indices, [x * s for x in v.values]))
     return [x * s for x in v]
 
 
-def parse_vector(token: str) -> Union[float, Vector]:
+def vector_sum(v: Vector) -> float:
+    if is_sparse(v):
+        return sum(v.values)
+    if _use_numpy(v):
+        return float(np.sum(np.asarray(v, dtype=float)))
+    return sum(v)
+
+
+def vector_mean(v: Vector) -> float:
+    if not v:
+        raise ValueError("Среднее пустого вектора не определено")
+    return vector_sum(v) / len(v)
+
+
+def vector_min(v: Vector) -> float:
+    if not v:
+        raise ValueError("Минимум пустого вектора не определён")
+    if is_sparse(v):
+        return min(v.values + [0.0] * (len(v.values) < v.size))
+    return min(v)
+
+
+def vector_max(v: Vector) -> float:
+    if not v:
+        raise ValueError("Максимум пустого вектора не определён")
+    if is_sparse(v):
+        return max(v.values + [0.0] * (len(v.values) < v.size))
+    return max(v)
+
+
+def vector_elementwise(op, a, b) -> Vector:
+    """Поэлементная операция: вектор с вектором той же длины или вектор со скаляром."""
+    if op is operator.mul and is_sparse(a) and is_sparse(b):
+        # Произведение ненулевое только на общих индексах
+        _check_lengths(a, b, "Поэлементная операция для")
+        other = b.as_dict()
+        return SparseVector(a.size, {i: v * other[i] for i, v in zip(a.indices, a.values) if i in other})
+    a, b = densify(a), densify(b)
+    if is_vector(a) and is_vector(b):
+        _check_lengths(a, b, "Поэлементная операция для")
+        return list(map(op, a, b))
+    if is_vector(a):
+        return [op(x, b) for x in a]
+    return [op(a, y) for y in b]
+
+
+def vector_map(fn, v: Vector) -> Vector:
+    return list(map(fn, densify(v)))
+
+
+def parse_sparse_vector(token: str) -> SparseVector:
+    """Разбор литерала {размерность;индекс:значение,...}, например {1000000;3:1.5,17:-2}."""
+    body = token.strip()[1:-1]
+    size, sep, items = body.partition(";")
+    if not sep:
+        raise ValueError(f"Некорректный литерал разреженного вектора: {token}")
+    pairs = {}
+    for item in filter(None, items.split(",")):
+        index, value = item.split(":")
+        pairs[int(index)] = float(value)
+    return SparseVector(int(size), pairs)
+
+
+def load_sparse_vector(path: str, size: int = None) -> SparseVector:
+    """Загрузка разреженного вектора из файла.
+
+    Каждая непустая строка - пары "индекс значение" или "индекс:значение"
+    (через пробел); всё после # игнорируется. По умолчанию размерность -
+    наибольший индекс плюс один.
+    """
+    pairs = {}
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            fields = line.split("#", 1)[0].replace(":", " ").split()
+            if len(fields) % 2:
+                raise ValueError(f"Нечётное число полей в строке: {line.strip()}")
+            for index, value in zip(fields[::2], fields[1::2]):
+                pairs[int(index)] = pairs.get(int(index), 0.0) + float(value)
+    if size is None:
+        size = max(pairs, default=-1) + 1
+    return SparseVector(size, pairs)
+
+
+def parse_vector(token: str) -> Union[float, Vector, Matrix, SparseVector]:
     token = token.strip()
+    if token.startswith("{") and token.endswith("}"):
+        return parse_sparse_vector(token)
+    if token.startswith("[[") and token.endswith("]]"):
+        return parse_matrix(token)
     if token.startswith("[") and token.endswith("]"):
         if len(token) == 2:
             return []
@@ -1,8 +1,40 @@
+import csv
+import json
+import os
+import pickle
+import socket
+import tempfile
+import threading
 import unittest
-from math import isclose, pi, sqrt
-
-from src.rpn_calculator.calculator import rpn_calculator, evaluate_program
+from concurrent.futures import ThreadPoolExecutor
+from decimal import Decimal
+from math import cos, isclose, log, pi, sin, sqrt
+
+from src.rpn_calculator.calculator import rpn_calculator, evaluate_program, rpn_calculator_batch
+from src.rpn_calculator.pipeline import evaluate_csv
+from src.rpn_calculator.compiler import compile_rpn, CONST
+from src.rpn_calculator.tiered import TieredEvaluator
+from src.rpn_calculator.sampling import FunctionSampler
+from src.rpn_calculator.cells import CellSheet, CycleError
+from src.rpn_calculator.incremental import IncrementalProgram
+from src.rpn_calculator.tracer import StepTracer
+from src.rpn_calculator.context import EvaluationContext, EnvironmentSnapshot
+from src.rpn_calculator.limits import EvaluationBudget, BudgetExceededError, estimate_power_bits
 from src.rpn_calculator.parser import parse_str_postfix, parse_str_infix
+from src.rpn_calculator.matrix import Matrix
+from src.rpn_calculator.vectors import SparseVector, load_sparse_vector
+from src.rpn_calculator.autodiff import gradient
+from src.rpn_calculator.backends import get_backend, DecimalBackend
+from src.rpn_calculator.canonical import canonical_rpn, evaluate_unique
+from src.rpn_calculator.functions import define_function, parse_function_definition
+from src.rpn_calculator.solver import find_root, minimize, run_solver_command, format_solver_result
+from src.rpn_calculator.history import HistoryIndex
+from src.rpn_calculator.parse_cache import ParseCache
+from src.rpn_calculator.shared_env import SharedEnvironment, evaluate_parallel
+from src.rpn_calculator.sink import ResultReader, ResultWriter, ERROR, FUNCTION, VECTOR, write_program
+from src.rpn_calculator.loadgen import (LatencyHistogram, InProcessTarget, TcpTarget, load_corpus, run_load,
+                                        format_report)
+from src.rpn_calculator.server import CalculatorServer
 
 
 class TestPush(unittest.TestCase):
@@ -497,8 +529,9 @@ class TestEdgeCasesAndErrors(unittest.TestCase):
             rpn_calculator("[1,2] [1,2,3] angle")
 
     def test_trig_function_on_vector(self):
-        with self.assertRaises(TypeError, msg="sin function should not be applicable to a vector"):
-            rpn_calculator("[1,2] sin")
+        result = rpn_calculator("[0,1] sin")
+        self.assertEqual(result[0], 0, "sin function should be applied element-wise to a vector")
+        self.assertTrue(isclose(result[1], 0.8414709848))
 
     def test_unary_minus_in_infix(self):
         program = parse_str_infix("-3 + 4")
@@ -514,5 +547,1382 @@ class TestEdgeCasesAndErrors(unittest.TestCase):
         self.assertEqual(rpn_calculator(program), 5, "Double unary minus failed")
 
 
+class TestBatchAndCsvPipeline(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.tmp.name, "in.csv")
+        self.target = os.path.join(self.tmp.name, "out.csv")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def write_source(self, rows):
+        with open(self.source, "w", newline="", encoding="utf-8") as f:
+            csv.writer(f).writerows(rows)
+
+    def read_target(self):
+        with open(self.target, newline="", encoding="utf-8") as f:
+            return list(csv.reader(f))
+
+    def test_batch_matches_scalar(self):
+        columns = {"a": [1.0, 2.0, 3.0], "b": [4.0, 5.0, 6.0]}
+        self.assertEqual(rpn_calculator_batch("a b * 1 +", columns, 3), [5, 11, 19])
+
+    def test_batch_error_propagates(self):
+        with self.assertRaises(ZeroDivisionError):
+            rpn_calculator_batch("a b //", {"a": [1.0, 2.0], "b": [1.0, 0.0]}, 2)
+
+    def test_columns_computed(self):
+        self.write_source([["a", "b"], ["1", "2"], ["3", "4"], ["5", "6"]])
+        report = evaluate_csv(self.source, self.target, ["s = a + b", "p = s * 2"], chunk_size=2)
+        rows = self.read_target()
+        self.assertEqual(rows[0], ["a", "b", "s", "p", "_error"])
+        self.assertEqual([row[2:4] for row in rows[1:]], [["3", "6"], ["7", "14"], ["11", "22"]])
+        self.assertEqual(report["rows"], 3)
+        self.assertEqual(report["errors"], 0)
+
+    def test_per_row_errors(self):
+        self.write_source([["a", "b"], ["4", "2"], ["1", "0"], ["x", "1"], ["9", "3"]])
+        report = evaluate_csv(self.source, self.target, ["q = a // b"], chunk_size=10)
+        rows = self.read_target()
+        self.assertEqual([row[2] for row in rows[1:]], ["2", "", "", "3"])
+        self.assertEqual(rows[1][3], "")
+        self.assertIn("q:", rows[2][3])
+        self.assertIn("a:", rows[3][3])
+        self.assertEqual(report["errors"], 2)
+        self.assertEqual([number for number, _ in report["error_samples"]], [2, 3])
+
+    def test_overwrite_existing_column(self):
+        self.write_source([["a"], ["2"]])
+        evaluate_csv(self.source, self.target, ["a = a ^ 3"], error_column=None)
+        self.assertEqual(self.read_target(), [["a"], ["8"]])
+
+    def test_invalid_assignment(self):
+        self.write_source([["a"], ["1"]])
+        with self.assertRaises(ValueError):
+            evaluate_csv(self.source, self.target, ["a + 1"])
+
+    def test_unknown_column_rejected_before_rows(self):
+        self.write_source([["a"], ["1"], ["2"]])
+        with self.assertRaises(ValueError):
+            evaluate_csv(self.source, self.target, ["s = a + 1", "t = s * c"])
+        with self.assertRaises(ValueError):
+            rpn_calculator_batch("a 1 + c +", {"a": [1.0]}, 1)
+
+    def test_long_rows_do_not_shift_columns(self):
+        self.write_source([["a", "b"], ["1", "2", "extra"], ["3", "4"], ["5"]])
+        report = evaluate_csv(self.source, self.target, ["s = a + b"])
+        rows = self.read_target()
+        self.assertTrue(all(len(row) == 4 for row in rows))
+        self.assertEqual(rows[1][:3], ["1", "2", ""])
+        self.assertIn("лишние поля", rows[1][3])
+        self.assertEqual(rows[2], ["3", "4", "7", ""])
+        self.assertIn("b:", rows[3][3])
+        self.assertEqual(report["errors"], 2)
+
+    def test_batch_mixed_columns(self):
+        columns = {"a": [1.0, 2.0], "v": [[1.0, 2.0], 3.0]}
+        self.assertEqual(rpn_calculator_batch("v a *", columns, 2), [[1, 2], 6])
+        self.assertEqual(rpn_calculator_batch("a neg abs sqrt", columns, 2), [1, 1.4142135624])
+
+
+class TestEvaluationBudget(unittest.TestCase):
+    def test_huge_integer_power_rejected(self):
+        lines = ["a = 9", "b = a ^ a", "c = a ^ b"]
+        with self.assertRaises(BudgetExceededError):
+            evaluate_program(lines)
+
+    def test_budget_error_is_value_error(self):
+        self.assertTrue(issubclass(BudgetExceededError, ValueError))
+
+    def test_reasonable_power_allowed(self):
+        self.assertEqual(rpn_calculator("a b ^", {"a": 2, "b": 100}), 2 ** 100)
+
+    def test_estimate_power_bits(self):
+        self.assertAlmostEqual(estimate_power_bits(2, 100), 101)
+        self.assertEqual(estimate_power_bits(1, 10 ** 9), 1)
+        self.assertEqual(estimate_power_bits(2.0, 10), 0)
+
+    def test_custom_result_bits(self):
+        budget = EvaluationBudget(max_result_bits=64)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("a b ^", {"a": 2, "b": 100}, budget)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("a a *", {"a": 2 ** 40}, budget)
+
+    def test_operation_limit(self):
+        budget = EvaluationBudget(max_operations=2)
+        self.assertEqual(rpn_calculator("1 2 + 3 +", budget=budget), 6)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("1 2 + 3 + 4 +", budget=budget)
+
+    def test_vector_length_limit(self):
+        budget = EvaluationBudget(max_vector_length=2)
+        self.assertEqual(rpn_calculator("[1,2] neg", budget=budget), [-1, -2])
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("[1,2,3] neg", budget=budget)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("v abs", {"v": [1, 2, 3]}, budget)
+
+    def test_compiled_path_applies_same_checks(self):
+        bits = EvaluationBudget(max_result_bits=64)
+        env = {"v": [2, 3], "w": [100, 1], "n": 100, "s": SparseVector(2, {0: 3})}
+        for expression in ("v n ^", "v w ^", "n w ^"):
+            with self.assertRaises(BudgetExceededError):
+                rpn_calculator(expression, env, bits)
+            with self.assertRaises(BudgetExceededError):
+                compile_rpn(expression).evaluate(env, bits)
+        for expression in ("s 2 ^", "v s ^"):
+            self.assertEqual(compile_rpn(expression).evaluate(env, bits), rpn_calculator(expression, env, bits))
+        length = EvaluationBudget(max_vector_length=2)
+        with self.assertRaises(BudgetExceededError):
+            compile_rpn("v sin").evaluate({"v": SparseVector(3, {0: 1})}, length)
+
+    def test_sparse_size_is_budgeted(self):
+        budget = EvaluationBudget(max_vector_length=100)
+        self.assertAlmostEqual(rpn_calculator("{100;0:1} sin sum", budget=budget), sin(1))
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("{101;0:1} sin sum", budget=budget)
+        with self.assertRaises(BudgetExceededError):
+            compile_rpn("{101;0:1} sin sum").evaluate(budget=budget)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("v sin sum", {"v": SparseVector(101, {0: 1})}, budget)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("{100000000;0:1} sin sum")
+        with self.assertRaises(BudgetExceededError):
+            compile_rpn("{100000000;0:1} sin sum").evaluate()
+
+    def test_binary_result_size_is_budgeted(self):
+        budget = EvaluationBudget(max_vector_length=100)
+        env = {"a": Matrix([[1]] * 50), "c": Matrix([[1] * 50])}
+        self.assertEqual(rpn_calculator("c a matmul", env, budget), [[50]])
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("a c matmul", env, budget)
+        with self.assertRaises(BudgetExceededError):
+            compile_rpn("a c matmul").evaluate(env, budget)
+
+    def test_gradient_is_budgeted(self):
+        with self.assertRaises(BudgetExceededError):
+            gradient("x + a ^ b", {"x": 1, "a": 9, "b": 9 ** 9}, variables=["x"])
+        with self.assertRaises(BudgetExceededError):
+            gradient("x ^ b", {"x": 9, "b": 9 ** 9}, variables=["x"])
+        with self.assertRaises(BudgetExceededError):
+            gradient("x + 1 + 2", {"x": 1}, budget=EvaluationBudget(max_operations=1))
+        self.assertEqual(gradient("x * a ^ 2", {"x": 1, "a": 3}, budget=EvaluationBudget(max_result_bits=64)),
+                         (9, {"x": 9.0, "a": 6.0}))
+
+    def test_powmod_postfix(self):
+        self.assertEqual(rpn_calculator("2 10 1000 powmod"), 24)
+
+    def test_powmod_infix(self):
+        program = parse_str_infix("powmod(3, 2 + 1, 5) + 1")
+        self.assertEqual(program, "3 2 1 + 5 powmod 1 +")
+        self.assertEqual(rpn_calculator(program), 3)
+
+    def test_powmod_big_exponent_is_fast(self):
+        result = rpn_calculator("a b m powmod", {"a": 9, "b": 9 ** 9 ** 2, "m": 10 ** 9 + 7})
+        self.assertEqual(result, pow(9, 9 ** 9 ** 2, 10 ** 9 + 7))
+
+    def test_powmod_errors(self):
+        with self.assertRaises(TypeError):
+            rpn_calculator("2.5 2 7 powmod")
+        with self.assertRaises(ValueError):
+            rpn_calculator("2 2 0 powmod")
+        with self.assertRaises(ValueError):
+            rpn_calculator("2 7 powmod")
+
+    def test_log_functions_in_infix(self):
+        self.assertEqual(rpn_calculator(parse_str_infix("log(100) + ln(1)")), 2)
+
+
+class TestCompiledAndTiered(unittest.TestCase):
+    def test_compiled_matches_interpreter(self):
+        cases = [
+            ("3 4 + 2 *", {}),
+            ("a b + c * d neg +", {"a": 2, "b": 3, "c": 4, "d": 6}),
+            ("[1,2] [3,4] + 2 *", {}),
+            ("x sqrt 1 +", {"x": 16}),
+            ("2 10 1000 powmod", {}),
+        ]
+        for rpn, env in cases:
+            self.assertEqual(compile_rpn(rpn).evaluate(env), rpn_calculator(rpn, env), rpn)
+
+    def test_constant_folding(self):
+        compiled = compile_rpn(parse_str_infix("x * (2 + 3) ^ 2"))
+        self.assertEqual(len(compiled.instructions), 3)
+        self.assertIn((CONST, 25.0), compiled.instructions)
+        self.assertEqual(compiled.variables, ("x",))
+        self.assertEqual(compiled.evaluate({"x": 2}), 50)
+
+    def test_folding_keeps_runtime_errors(self):
+        compiled = compile_rpn("1 0 //")
+        with self.assertRaises(ZeroDivisionError):
+            compiled.evaluate()
+
+    def test_compile_errors(self):
+        with self.assertRaises(ValueError):
+            compile_rpn("1 +")
+        with self.assertRaises(ValueError):
+            compile_rpn("1 2")
+        with self.assertRaises(ValueError):
+            compile_rpn("x y +").evaluate({"x": 1})
+
+    def test_compiled_vector_result_is_copy(self):
+        compiled = compile_rpn("[1,2]")
+        compiled.evaluate().append(3)
+        self.assertEqual(compiled.evaluate(), [1, 2])
+
+    def test_promotion_after_threshold(self):
+        evaluator = TieredEvaluator(threshold=3)
+        for i in range(10):
+            self.assertEqual(evaluator.evaluate("x * 2 + 1", {"x": i}), 2 * i + 1)
+        self.assertTrue(evaluator.is_compiled("x * 2 + 1"))
+        stats = evaluator.stats()
+        self.assertEqual(stats["promotions"], 1)
+        self.assertEqual(stats["interpreted"], 3)
+        self.assertEqual(stats["compiled"], 7)
+
+    def test_cold_expression_stays_interpreted(self):
+        evaluator = TieredEvaluator(threshold=3)
+        evaluator.evaluate("1 2 +")
+        self.assertFalse(evaluator.is_compiled("1 2 +"))
+
+    def test_compiled_lru_limit(self):
+        evaluator = TieredEvaluator(threshold=1, max_compiled=2)
+        for expression in ["1 1 +", "2 2 +", "3 3 +"]:
+            evaluator.evaluate(expression)
+        self.assertFalse(evaluator.is_compiled("1 1 +"))
+        self.assertTrue(evaluator.is_compiled("3 3 +"))
+
+    def test_program_with_evaluator(self):
+        evaluator = TieredEvaluator(threshold=1)
+        lines = ["a = 4", "b = a * 2", "a b +"]
+        for _ in range(3):
+            result = evaluate_program(lines, evaluator=evaluator)
+        self.assertEqual(result, evaluate_program(lines))
+        self.assertEqual(evaluator.stats()["promotions"], 3)
+
+
+class TestEvaluationContext(unittest.TestCase):
+    def test_snapshot_is_immutable(self):
+        source = {"v": [1, 2]}
+        context = EvaluationContext(source)
+        source["v"].append(3)
+        snapshot = context.snapshot()
+        context.commit({"v": [5]})
+        self.assertEqual(snapshot["v"], [1, 2])
+        self.assertEqual(context.snapshot()["v"], [5])
+        self.assertEqual(context.snapshot().version, snapshot.version + 1)
+
+    def test_evaluate_against_old_snapshot(self):
+        context = EvaluationContext({"x": 1})
+        old = context.snapshot()
+        context.execute("x = x + 1")
+        self.assertEqual(context.evaluate("x * 10", old), 10)
+        self.assertEqual(context.evaluate("x * 10"), 20)
+
+    def test_functions_read_the_evaluated_snapshot(self):
+        context = EvaluationContext()
+        context.execute("k = 1")
+        context.execute("f(x) = x + k")
+        old = context.snapshot()
+        context.execute("k = 100")
+        self.assertEqual(old["k"], 1)
+        self.assertEqual(context.evaluate("f(0)", old), 1)
+        self.assertEqual(context.evaluate("f(0)"), 100)
+        snapshot = context.run_program(["k = 7", "y = f(0)"])
+        self.assertEqual(snapshot["y"], 7)
+
+    def test_run_program_is_atomic_on_error(self):
+        context = EvaluationContext({"a": 1})
+        with self.assertRaises(ValueError):
+            context.run_program(["a = 5", "b = undefined + 1"])
+        self.assertEqual(dict(context.snapshot()), {"a": 1})
+
+    def test_run_program(self):
+        context = EvaluationContext()
+        snapshot = context.run_program(["a = 4", "b = a 2 *", "a b +"])
+        self.assertIsInstance(snapshot, EnvironmentSnapshot)
+        self.assertEqual(snapshot["b"], 8)
+        self.assertEqual(snapshot["_last"], 12)
+
+    def test_last_matches_evaluate_program(self):
+        for lines in (["a = 4", "a 2 *", "b = a + 1", ""], ["a = 4", "a 2 *", ""], ["f(x) = x + 1", "f(2)"],
+                      ["a = 1", "a + 1", "g(x) = x"]):
+            # Функции сравниваются по записи определения
+            expected = {name: repr(value) for name, value in evaluate_program(lines).items()}
+            snapshot = EvaluationContext().run_program(lines)
+            self.assertEqual({name: repr(value) for name, value in snapshot.items()}, expected, lines)
+            program = IncrementalProgram()
+            program.run(lines)
+            self.assertEqual({name: repr(value) for name, value in program.env.items()}, expected, lines)
+
+    def test_concurrent_readers_see_consistent_snapshots(self):
+        context = EvaluationContext({"a": 0, "b": 0})
+
+        def writer():
+            for i in range(1, 2001):
+                context.commit({"a": i, "b": -i})
+
+        def reader(_):
+            for _ in range(500):
+                self.assertEqual(context.evaluate("a + b"), 0)
+            return True
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            write = pool.submit(writer)
+            reads = list(pool.map(reader, range(7)))
+            write.result()
+        self.assertTrue(all(reads))
+        self.assertEqual(context.snapshot()["a"], 2000)
+
+    def test_concurrent_increments_are_not_lost(self):
+        context = EvaluationContext({"n": 0})
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            list(pool.map(lambda _: context.execute("n = n + 1"), range(400)))
+        self.assertEqual(context.snapshot()["n"], 400)
+
+
+class TestFunctionSampler(unittest.TestCase):
+    def test_values_match_calculator(self):
+        sampler = FunctionSampler("x * x + a", variables={"a": 1})
+        for x, y in sampler.sample(-2, 2, initial=16):
+            self.assertTrue(isclose(y, x * x + 1, abs_tol=1e-9))
+
+    def test_pan_reuses_sampled_points(self):
+        sampler = FunctionSampler("x * x")
+        sampler.sample(0, 8, initial=16)
+        before = sampler.evaluated
+        sampler.sample(2, 10, initial=16)
+        # Новые только 4 узла решётки на (8, 10] и середины новых отрезков
+        self.assertEqual(sampler.evaluated - before, 8)
+
+    def test_zoom_in_reuses_sampled_points(self):
+        sampler = FunctionSampler("x * 3")
+        sampler.sample(0, 8, initial=16)
+        before = sampler.evaluated
+        sampler.sample(0, 4, initial=8)
+        self.assertEqual(sampler.evaluated, before)
+
+    def test_refinement_near_curvature(self):
+        sampler = FunctionSampler("abs(x - 0.3)")
+        points = [x for x, _ in sampler.sample(-1, 1, initial=8)]
+        near = [x for x in points if abs(x - 0.3) < 0.125]
+        far = [x for x in points if -1 <= x < -0.5]
+        self.assertGreater(len(near), len(far))
+
+    def test_undefined_points_are_none(self):
+        sampler = FunctionSampler("sqrt(x)")
+        points = dict(sampler.sample(-1, 1, initial=8))
+        self.assertIsNone(points[-1.0])
+        self.assertEqual(points[1.0], 1)
+
+    def test_invalid_range(self):
+        with self.assertRaises(ValueError):
+            FunctionSampler("x").sample(1, 1)
+
+
+class TestCellSheet(unittest.TestCase):
+    def test_dependents_recalculated(self):
+        sheet = CellSheet()
+        sheet.set_cell("A1", "2")
+        sheet.set_cell("B1", "A1 * 10")
+        sheet.set_cell("C1", "B1 + A1")
+        changed = sheet.set_cell("A1", "3")
+        self.assertEqual(list(changed), ["A1", "B1", "C1"])
+        self.assertEqual(sheet.values["C1"], 33)
+
+    def test_only_transitive_dependents_recalculated(self):
+        sheet = CellSheet()
+        sheet.set_cell("A1", "1")
+        sheet.set_cell("A2", "5")
+        sheet.set_cell("B1", "A1 + 1")
+        sheet.set_cell("B2", "A2 + 1")
+        self.assertEqual(set(sheet.set_cell("A1", "7")), {"A1", "B1"})
+
+    def test_topological_order_for_diamond(self):
+        sheet = CellSheet()
+        sheet.set_cell("A1", "1")
+        sheet.set_cell("D1", "B1 + C1")
+        sheet.set_cell("B1", "A1 * 2")
+        sheet.set_cell("C1", "A1 * 3")
+        order = list(sheet.set_cell("A1", "2"))
+        self.assertEqual(order[0], "A1")
+        self.assertEqual(order[-1], "D1")
+        self.assertEqual(sheet.values["D1"], 10)
+
+    def test_cycle_rejected_without_changes(self):
+        sheet = CellSheet()
+        sheet.set_cell("A1", "1")
+        sheet.set_cell("B1", "A1 + 1")
+        with self.assertRaises(CycleError):
+            sheet.set_cell("A1", "B1 + 1")
+        with self.assertRaises(CycleError):
+            sheet.set_cell("C1", "C1 + 1")
+        self.assertEqual(sheet.formulas["A1"], "1")
+        self.assertEqual(sheet.set_cell("A1", "4")["B1"], 5)
+
+    def test_errors_propagate_and_recover(self):
+        sheet = CellSheet()
+        sheet.set_cell("A1", "0")
+        sheet.set_cell("B1", "1 // A1")
+        sheet.set_cell("C1", "B1 + 1")
+        self.assertIn("B1", sheet.errors)
+        self.assertIn("C1", sheet.errors)
+        sheet.set_cell("A1", "1")
+        self.assertEqual(sheet.values["C1"], 2)
+        self.assertFalse(sheet.errors)
+
+    def test_delete_cell_and_globals(self):
+        sheet = CellSheet({"k": 3})
+        sheet.set_cell("A1", "k * 2")
+        sheet.set_cell("B1", "A1 + 1")
+        self.assertEqual(sheet.values["B1"], 7)
+        sheet.set_globals({"k": 10})
+        self.assertEqual(sheet.values["B1"], 21)
+        sheet.set_cell("A1", "")
+        self.assertNotIn("A1", sheet.formulas)
+        self.assertIn("B1", sheet.errors)
+
+    def test_long_chain(self):
+        sheet = CellSheet()
+        sheet.set_cell("c0", "1")
+        for i in range(1, 1000):
+            sheet.set_cell(f"c{i}", f"c{i - 1} + 1")
+        changed = sheet.set_cell("c0", "0")
+        self.assertEqual(len(changed), 1000)
+        self.assertEqual(sheet.values["c999"], 999)
+
+
+class TestIncrementalProgram(unittest.TestCase):
+    def test_first_run_matches_evaluate_program(self):
+        lines = ["a = 4", "b = a * 2", "", "a b +"]
+        report = IncrementalProgram().run(lines)
+        self.assertEqual(report["changed"], evaluate_program(lines))
+        self.assertEqual(report["evaluated"], [1, 2, 4])
+
+    def test_unchanged_program_reuses_everything(self):
+        program = IncrementalProgram()
+        lines = ["a = 4", "b = a * 2"]
+        program.run(lines)
+        report = program.run(lines)
+        self.assertEqual(report["evaluated"], [])
+        self.assertEqual(report["reused"], [1, 2])
+        self.assertEqual(report["changed"], {})
+
+    def test_only_affected_lines_reevaluated(self):
+        program = IncrementalProgram()
+        program.run(["a = 4", "b = 5", "c = a * 2", "d = b * 2"])
+        report = program.run(["a = 7", "b = 5", "c = a * 2", "d = b * 2"])
+        self.assertEqual(report["evaluated"], [1, 3])
+        self.assertEqual(report["reused"], [2, 4])
+        self.assertEqual(report["changed"], {"a": 7, "c": 14})
+
+    def test_inserted_line_shifts_positions(self):
+        program = IncrementalProgram()
+        program.run(["a = 1", "b = a + 1"])
+        report = program.run(["a = 1", "z = 100", "b = a + 1"])
+        self.assertEqual(report["evaluated"], [2])
+        self.assertEqual(report["changed"], {"z": 100})
+
+    def test_same_value_stops_propagation(self):
+        program = IncrementalProgram()
+        program.run(["a = 2", "b = a * 0", "c = b + 1"])
+        report = program.run(["a = 3", "b = a * 0", "c = b + 1"])
+        self.assertEqual(report["evaluated"], [1, 2])
+        self.assertEqual(report["reused"], [3])
+
+    def test_removed_variables_and_errors(self):
+        program = IncrementalProgram()
+        program.run(["a = 1", "b = 2"])
+        self.assertEqual(program.run(["a = 1"])["removed"], ["b"])
+        report = program.run(["a = 1", "c = missing + 1"])
+        self.assertIn("строка 2", report["error"])
+        self.assertEqual(program.env, {"a": 1})
+
+    def test_last_is_not_visible_to_later_lines(self):
+        lines = ["1 2 +", "y = _last * 2"]
+        with self.assertRaises(ValueError):
+            evaluate_program(lines)
+        report = IncrementalProgram().run(lines)
+        self.assertIn("строка 2", report["error"])
+        program = IncrementalProgram()
+        program.run(["1 2 +", "4 5 +"])
+        self.assertEqual(program.env, {"_last": 9})
+
+
+class TestStepTracer(unittest.TestCase):
+    def test_records_every_step(self):
+        tracer = StepTracer()
+        result = rpn_calculator("x 2 + 3 *", {"x": 1}, tracer=tracer)
+        self.assertEqual(result, 9)
+        steps = [(s.token, s.operands, s.result, s.depth) for s in tracer]
+        self.assertEqual(steps, [("x", (), 1, 1), ("2", (), 2.0, 2), ("+", (1, 2.0), 3.0, 1),
+                                 ("3", (), 3.0, 2), ("*", (3.0, 3.0), 9.0, 1)])
+
+    def test_ring_buffer_is_bounded(self):
+        tracer = StepTracer(capacity=3)
+        rpn_calculator("1 2 + 3 + 4 +", tracer=tracer)
+        self.assertEqual(len(tracer), 3)
+        self.assertEqual(tracer.dropped, 4)
+        self.assertEqual([s.index for s in tracer], [5, 6, 7])
+
+    def test_new_calculation_resets_trace(self):
+        tracer = StepTracer()
+        rpn_calculator("1 2 +", tracer=tracer)
+        rpn_calculator("5 neg", tracer=tracer)
+        self.assertEqual(tracer.expression, "5 neg")
+        self.assertEqual(len(tracer), 2)
+
+    def test_trace_kept_on_error(self):
+        tracer = StepTracer()
+        with self.assertRaises(ZeroDivisionError):
+            rpn_calculator("1 2 + 0 //", tracer=tracer)
+        self.assertEqual(tracer.steps[-1].token, "0")
+
+    def test_json_export(self):
+        tracer = StepTracer()
+        rpn_calculator("[1,2] neg", tracer=tracer)
+        data = json.loads(tracer.to_json())
+        self.assertEqual(data["expression"], "[1,2] neg")
+        self.assertEqual(data["steps"][1]["operands"], [[1.0, 2.0]])
+        self.assertEqual(data["steps"][1]["result"], [-1.0, -2.0])
+
+
+class TestVectorReductionsAndElementwise(unittest.TestCase):
+    def test_dot_and_cross(self):
+        self.assertEqual(rpn_calculator("[1,2,3] [4,5,6] dot"), 32)
+        self.assertEqual(rpn_calculator("[1,0,0] [0,1,0] cross"), [0, 0, 1])
+        self.assertEqual(rpn_calculator(parse_str_infix("dot(a, b) + 1"), {"a": [1, 1], "b": [2, 3]}), 6)
+
+    def test_cross_requires_3d(self):
+        with self.assertRaises(ValueError):
+            rpn_calculator("[1,2] [3,4] cross")
+        with self.assertRaises(TypeError):
+            rpn_calculator("[1,2] 3 dot")
+
+    def test_reductions(self):
+        self.assertEqual(rpn_calculator("[1,2,3,4] sum"), 10)
+        self.assertEqual(rpn_calculator("[1,2,3,4] mean"), 2.5)
+        self.assertEqual(rpn_calculator("[3,-1,2] min"), -1)
+        self.assertEqual(rpn_calculator("[3,-1,2] max"), 3)
+        self.assertEqual(rpn_calculator("[3,4] norm"), 5)
+        self.assertEqual(rpn_calculator(parse_str_infix("mean(v) * 2"), {"v": [1, 3]}), 4)
+
+    def test_reduction_errors(self):
+        with self.assertRaises(TypeError):
+            rpn_calculator("5 sum")
+        with self.assertRaises(ValueError):
+            rpn_calculator("[] mean")
+
+    def test_elementwise_binary(self):
+        self.assertEqual(rpn_calculator("[1,2,3] [4,5,6] *"), [4, 10, 18])
+        self.assertEqual(rpn_calculator("[7,8,9] [2,3,4] //"), [3, 2, 2])
+        self.assertEqual(rpn_calculator("[7,8,9] [2,3,4] %"), [1, 2, 1])
+        self.assertEqual(rpn_calculator("[2,3] [3,2] ^"), [8, 9])
+        self.assertEqual(rpn_calculator("[2,3] 2 ^"), [4, 9])
+        self.assertEqual(rpn_calculator("[7,9] 2 //"), [3, 4])
+
+    def test_elementwise_errors(self):
+        with self.assertRaises(ValueError):
+            rpn_calculator("[1,2] [1,2,3] *")
+        with self.assertRaises(ZeroDivisionError):
+            rpn_calculator("[1,2] [1,0] //")
+
+    def test_elementwise_unary(self):
+        self.assertEqual(rpn_calculator("[4,9,16] sqrt"), [2, 3, 4])
+        self.assertEqual(rpn_calculator("[1,100] log"), [0, 2])
+        with self.assertRaises(ValueError):
+            rpn_calculator("[1,-1] ln")
+
+    def test_elementwise_power_respects_budget(self):
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("v w ^", {"v": [2, 9], "w": [2, 9 ** 9]})
+
+    def test_large_vectors(self):
+        v = [float(i) for i in range(10000)]
+        self.assertEqual(rpn_calculator("v sum", {"v": v}), sum(v))
+        self.assertEqual(rpn_calculator("v v dot", {"v": v}), sum(x * x for x in v))
+
+
+class TestMatrix(unittest.TestCase):
+    def test_literal(self):
+        m = rpn_calculator("[[1,2],[3,4]]")
+        self.assertIsInstance(m, Matrix)
+        self.assertEqual(m.shape, (2, 2))
+        self.assertEqual(m, [[1, 2], [3, 4]])
+        with self.assertRaises(ValueError):
+            rpn_calculator("[[1,2],[3]]")
+
+    def test_matmul_and_transpose(self):
+        self.assertEqual(rpn_calculator("[[1,2],[3,4]] [[5,6],[7,8]] matmul"), [[19, 22], [43, 50]])
+        self.assertEqual(rpn_calculator("[[1,2,3]] transpose"), [[1], [2], [3]])
+        self.assertEqual(rpn_calculator("[[1,2],[3,4]] [1,1] matmul"), [3, 7])
+        self.assertEqual(rpn_calculator("[1,1] [[1,2],[3,4]] matmul"), [4, 6])
+        with self.assertRaises(ValueError):
+            rpn_calculator("[[1,2],[3,4]] [1,2,3] matmul")
+        for expression in ("2 [[1,2],[3,4]] matmul", "[[1,2],[3,4]] 2 matmul"):
+            with self.assertRaises(TypeError):
+                rpn_calculator(expression)
+
+    def test_det_inv_solve(self):
+        self.assertEqual(rpn_calculator("[[1,2],[3,4]] det"), -2)
+        inverse = rpn_calculator("[[4,7],[2,6]] inv").tolist()
+        for row, expected in zip(inverse, [[0.6, -0.7], [-0.2, 0.4]]):
+            for x, y in zip(row, expected):
+                self.assertTrue(isclose(x, y, abs_tol=1e-12))
+        x = rpn_calculator("[[2,1],[1,3]] [3,5] solve")
+        self.assertTrue(isclose(x[0], 0.8) and isclose(x[1], 1.4))
+
+    def test_singular(self):
+        self.assertEqual(rpn_calculator("[[1,2],[2,4]] det"), 0)
+        with self.assertRaises(ValueError):
+            rpn_calculator("[[1,2],[2,4]] inv")
+        with self.assertRaises(ValueError):
+            rpn_calculator("[[1,2],[3,4],[5,6]] det")
+
+    def test_elementwise_and_errors(self):
+        self.assertEqual(rpn_calculator("[[1,2],[3,4]] [[1,1],[1,1]] +"), [[2, 3], [4, 5]])
+        self.assertEqual(rpn_calculator("[[1,2],[3,4]] 2 *"), [[2, 4], [6, 8]])
+        self.assertEqual(rpn_calculator("[[3,0],[0,4]] norm"), 5)
+        with self.assertRaises(TypeError):
+            rpn_calculator("[[1,2],[3,4]] 1 +")
+        with self.assertRaises(TypeError):
+            rpn_calculator("[1,2] det")
+
+    def test_infix_and_variables(self):
+        self.assertEqual(parse_str_infix("det([[1, 2], [3, 4]]) + 1"), "[[1,2],[3,4]] det 1 +")
+        self.assertEqual(rpn_calculator(parse_str_infix("matmul(A, [1, 0])"), {"A": Matrix([[1, 2], [3, 4]])}), [1, 3])
+        self.assertEqual(compile_rpn("A transpose").evaluate({"A": Matrix([[1, 2]])}), [[1], [2]])
+
+    def test_budget_counts_elements(self):
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("A det", {"A": Matrix([[1, 0], [0, 1]])}, EvaluationBudget(max_vector_length=3))
+
+
+class TestSparseVector(unittest.TestCase):
+    def test_literal_round_trip(self):
+        v = rpn_calculator("{1000000;3:1.5,17:-2}")
+        self.assertIsInstance(v, SparseVector)
+        self.assertEqual((len(v), v.indices, v.values), (1000000, [3, 17], [1.5, -2.0]))
+        self.assertEqual(rpn_calculator(repr(v)), v)
+        with self.assertRaises(ValueError):
+            rpn_calculator("{3;5:1}")
+
+    def test_sparse_arithmetic_stays_sparse(self):
+        result = rpn_calculator("{1000000;3:1,5:2} {1000000;3:-1,7:4} +")
+        self.assertEqual(result, SparseVector(1000000, {5: 2, 7: 4}))
+        self.assertEqual(rpn_calculator("{10;1:1} {10;1:1} -").indices, [])
+        self.assertEqual(rpn_calculator("{10;1:3} 2 *"), SparseVector(10, {1: 6}))
+        self.assertEqual(rpn_calculator("{10;1:3} neg"), SparseVector(10, {1: -3}))
+
+    def test_dot_abs_angle(self):
+        self.assertEqual(rpn_calculator("{1000000;0:3,999999:4} abs"), 5)
+        self.assertEqual(rpn_calculator("{1000000;2:3,9:1} {1000000;2:2,8:5} dot"), 6)
+        self.assertEqual(rpn_calculator("{4;1:2} [1,2,3,4] dot"), 4)
+        self.assertTrue(isclose(rpn_calculator("{3;0:1} {3;1:1} angle"), pi / 2))
+
+    def test_densify_when_needed(self):
+        self.assertEqual(rpn_calculator("{3;0:1} [1,1,1] +"), [2, 1, 1])
+        self.assertEqual(rpn_calculator("{2;1:0} cos"), [1, 1])
+        self.assertEqual(rpn_calculator("{3;1:-1} min"), -1)
+        self.assertEqual(rpn_calculator("{3;1:2} max"), 2)
+        self.assertEqual(rpn_calculator("{3;0:1} {3;1:1} cross"), [0, 0, 1])
+
+    def test_infix_and_loader(self):
+        self.assertEqual(rpn_calculator(parse_str_infix("norm({4;0:3} + {4;1:4})")), 5)
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "v.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("# признаки\n3 1.5\n17:2 20:1\n")
+            v = load_sparse_vector(path, size=100)
+            self.assertEqual(v, SparseVector(100, {3: 1.5, 17: 2, 20: 1}))
+            self.assertEqual(len(load_sparse_vector(path)), 21)
+
+
+class TestGradient(unittest.TestCase):
+    def assertGradient(self, expression, env, expected_value, expected):
+        value, partials = gradient(expression, env)
+        self.assertTrue(isclose(value, expected_value, rel_tol=1e-9))
+        self.assertEqual(set(partials), set(expected))
+        for name, derivative in expected.items():
+            self.assertTrue(isclose(partials[name], derivative, rel_tol=1e-9, abs_tol=1e-12), name)
+
+    def test_polynomial(self):
+        self.assertGradient("x^2 * y + 3 * x", {"x": 2, "y": 5}, 26, {"x": 23, "y": 4})
+        self.assertGradient("x y * neg", {"x": 2, "y": 5}, -10, {"x": -5, "y": -2})
+
+    def test_functions(self):
+        x = 0.7
+        self.assertGradient("sin(x) * cos(x)", {"x": x}, 0.5 * sin(2 * x),
+                            {"x": cos(2 * x)})
+        self.assertGradient("sqrt(x) + ln(x) + log(x)", {"x": 4.0}, 2 + log(4) + 0.6020599913,
+                            {"x": 0.25 + 0.25 + 1 / (4 * log(10))})
+        self.assertGradient("abs(x - 3)", {"x": 1}, 2, {"x": -1})
+
+    def test_variable_exponent(self):
+        value, partials = gradient("x ^ y", {"x": 2.0, "y": 3})
+        self.assertEqual(value, 8)
+        self.assertTrue(isclose(partials["x"], 12))
+        self.assertTrue(isclose(partials["y"], 8 * log(2)))
+        with self.assertRaises(ValueError):
+            gradient("x ^ y", {"x": -2.0, "y": 3})
+
+    def test_matches_finite_differences(self):
+        expression = "tan(a) * b^3 - a % 2 + b // 1"
+        env = {"a": 0.3, "b": 1.7}
+        _, partials = gradient(expression, env)
+        h = 1e-6
+        for name in env:
+            shifted_up, shifted_down = dict(env), dict(env)
+            shifted_up[name] += h
+            shifted_down[name] -= h
+            numeric = (rpn_calculator(parse_str_infix(expression), shifted_up)
+                       - rpn_calculator(parse_str_infix(expression), shifted_down)) / (2 * h)
+            self.assertTrue(isclose(partials[name], numeric, rel_tol=1e-4), name)
+
+    def test_selected_variables_and_constants(self):
+        value, partials = gradient("x * k + [1,2,3] sum", {"x": 2, "k": 4}, variables=["x"])
+        self.assertEqual((value, partials), (14, {"x": 4.0}))
+
+    def test_non_differentiable(self):
+        with self.assertRaises(TypeError):
+            gradient("x 2 5 powmod", {"x": 3})
+        with self.assertRaises(TypeError):
+            gradient("v x * sum", {"v": [1, 2], "x": 3})
+        with self.assertRaises(ValueError):
+            gradient("x + y", {"x": 1})
+
+
+class TestSolver(unittest.TestCase):
+    def test_bracketed_root(self):
+        result = find_root("x^2 - 2", "x", 0, 2)
+        self.assertTrue(result.converged)
+        self.assertEqual(result.method, "brent")
+        self.assertTrue(isclose(result.x, sqrt(2), rel_tol=1e-12))
+
+    def test_equation_and_environment(self):
+        result = find_root("sin(t) = a", "t", 0, 1.5, env={"a": 0.5})
+        self.assertTrue(isclose(result.x, pi / 6, rel_tol=1e-12))
+
+    def test_newton_from_start_point(self):
+        result = find_root("cos(x) - x", x0=1.0)
+        self.assertEqual(result.method, "newton")
+        self.assertTrue(isclose(result.x, 0.7390851332151607, rel_tol=1e-12))
+        self.assertLess(result.evaluations, 10)
+
+    def test_probes_skip_undefined_points(self):
+        result = find_root("ln(x) - 1", "x", -5, 5)
+        self.assertTrue(isclose(result.x, 2.718281828459045, rel_tol=1e-12))
+
+    def test_no_sign_change(self):
+        with self.assertRaises(ValueError):
+            find_root("x^2 + 1", "x", -1, 1)
+        with self.assertRaises(ValueError):
+            find_root("x - 1")
+
+    def test_budget_blow_up_is_clean_error(self):
+        env = {"a": 9, "b": 9 ** 9}
+        with self.assertRaises(BudgetExceededError):
+            find_root("x - a ^ b", x0=1.0, env=env)
+        with self.assertRaises(ValueError):
+            find_root("x - a ^ b", "x", 0, 2, env=env)
+        with self.assertRaises(BudgetExceededError):
+            run_solver_command("solve x - a ^ b for x near 1", env)
+        with self.assertRaises(BudgetExceededError):
+            find_root("x - 2", x0=1.0, budget=EvaluationBudget(max_operations=0))
+
+    def test_minimize(self):
+        result = minimize("(x - 1.3)^2 + 2", "x", -5, 5)
+        self.assertTrue(isclose(result.x, 1.3, abs_tol=1e-6))
+        self.assertTrue(isclose(result.value, 2))
+        self.assertEqual(minimize("x", "x", 0, 1).x, 0)
+
+    def test_commands(self):
+        self.assertIsNone(run_solver_command("x + 1"))
+        self.assertIsNone(run_solver_command("A b solve"))
+        line = "solve x^3 = 8 for x in 0..5"
+        result = run_solver_command(line)
+        self.assertTrue(isclose(result.x, 2, rel_tol=1e-12))
+        self.assertTrue(format_solver_result(line, result).startswith("x = 2,"))
+        self.assertTrue(isclose(run_solver_command("minimize (y + k)^2 for y in -10..10", {"k": 3}).x, -3,
+                                abs_tol=1e-6))
+        with self.assertRaises(ValueError):
+            run_solver_command("minimize x^2 for x near 1")
+
+
+class TestUserFunctions(unittest.TestCase):
+    def test_definition_syntax(self):
+        self.assertEqual(parse_function_definition("f(x, y) = sqrt(x^2 + y^2)"),
+                         ("f", ["x", "y"], "sqrt(x^2 + y^2)"))
+        self.assertEqual(parse_function_definition("z() = 7"), ("z", [], "7"))
+        self.assertIsNone(parse_function_definition("x = 5"))
+
+    def test_program_infix_and_rpn_calls(self):
+        env = evaluate_program(["hyp(x, y) = sqrt(x^2 + y^2)", "a = hyp(3, 4)", "b = 6 8 hyp", "a + b"])
+        self.assertEqual((env["a"], env["b"], env["_last"]), (5, 10, 15))
+        self.assertEqual(parse_str_infix("hyp(a, 2 * b) + 1"), "a 2 b * hyp 1 +")
+
+    def test_nested_functions_and_free_variables(self):
+        env = evaluate_program(["k = 3", "sq(x) = x * x", "scaled(x) = sq(x) * k", "r = scaled(2)"])
+        self.assertEqual(env["r"], 12)
+        self.assertTrue(env["sq"].pure)
+        self.assertFalse(env["scaled"].pure)
+
+    def test_memo_cache(self):
+        env = {}
+        square = define_function("sq(x) = x ^ 2", env, memo_size=2)
+        for value in (2, 3, 2, 4, 2):
+            rpn_calculator("v sq", dict(env, v=value))
+        self.assertEqual(square.cache_info(), {"hits": 2, "misses": 3, "size": 2, "max_size": 2})
+        self.assertEqual(square(2.0), 4.0)
+
+    def test_impure_functions_are_not_memoized(self):
+        env = {"k": 1}
+        shift = define_function("shift(x) = x + k", env)
+        self.assertEqual(shift(1), 2)
+        env["k"] = 10
+        self.assertEqual(shift(1), 11)
+        self.assertEqual(shift.cache_info()["max_size"], 0)
+
+    def test_redefinition_clears_transitive_callers(self):
+        env = {}
+        for line in ("f(x) = x + 1", "g(x) = f(x) * 2", "h(x) = g(x)"):
+            define_function(line, env)
+        self.assertEqual(rpn_calculator("1 h", env), 4)
+        define_function("f(x) = x + 100", env)
+        self.assertEqual(rpn_calculator("1 h", env), 202)
+        env["k"] = 5
+        define_function("f(x) = x + k", env)
+        self.assertFalse(env["h"].pure)
+        self.assertEqual(rpn_calculator("1 h", env), 12)
+        env["k"] = 6
+        self.assertEqual(rpn_calculator("1 h", env), 14)
+
+    def test_compiled_and_tiered_calls(self):
+        env = {}
+        define_function("f(a, b) = a * 10 + b", env)
+        compiled = compile_rpn(parse_str_infix("f(x, 2) + 1"), functions={"f": env["f"]})
+        self.assertEqual(compiled.evaluate(dict(env, x=3)), 33)
+        evaluator = TieredEvaluator(threshold=2)
+        results = [evaluator.evaluate("f(1, 2)", env) for _ in range(4)]
+        self.assertEqual(results, [12] * 4)
+        self.assertTrue(evaluator.is_compiled("f(1, 2)"))
+
+    def test_tiered_recompiles_after_definitions_and_honours_backend(self):
+        evaluator = TieredEvaluator(threshold=1)
+        env = {"k": 3}
+        self.assertEqual(evaluator.evaluate("k 2 *", env), 6)
+        self.assertTrue(evaluator.is_compiled("k 2 *"))
+        define_function("k() = 7", env)
+        self.assertEqual(evaluator.evaluate("k 2 *", env), 14)
+        define_function("k() = 8", env)
+        self.assertEqual(evaluator.evaluate("k 2 *", env), 16)
+        env["k"] = 5
+        self.assertEqual(evaluator.evaluate("k 2 *", env), rpn_calculator("k 2 *", env))
+        program = evaluate_program(["f(x) = x * 2", "a = f(0.1) + 0.1"], evaluator=TieredEvaluator(threshold=0),
+                                   backend=DecimalBackend())
+        self.assertEqual(program["a"], Decimal("0.3"))
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            define_function("sin(x) = x", {})
+        with self.assertRaises(ValueError):
+            define_function("f(x, x) = x", {})
+        with self.assertRaises(ValueError):
+            evaluate_program(["f(x) = f(x) + 1"])
+        with self.assertRaises(ValueError):
+            evaluate_program(["f(x, y) = x + y", "f(1)"])
+
+    def test_functions_in_solver_gradient_cells_and_incremental(self):
+        env = {"k": 3}
+        define_function("f(x) = x * x", env)
+        define_function("g(x) = f(x) * k", env)
+        root = run_solver_command("solve f(x) = 2 for x in 0..2", env)
+        self.assertAlmostEqual(root.x, sqrt(2))
+        self.assertAlmostEqual(find_root("f(x) - 2", x0=1.0, env=env).x, sqrt(2))
+        value, grad = gradient("g(x) * y", dict(env, x=2.0, y=5.0))
+        self.assertEqual(value, 60)
+        self.assertAlmostEqual(grad["x"], 60)
+        self.assertAlmostEqual(grad["y"], 12)
+        self.assertAlmostEqual(gradient("g(2) + 0 * k", env, ["k"])[1]["k"], 4)
+        sheet = CellSheet(env)
+        sheet.set_cell("A1", "f(4)")
+        self.assertEqual(sheet.values["A1"], 16)
+        program = IncrementalProgram()
+        self.assertEqual(program.run(["f(x) = x * 2", "a = f(3)"])["changed"]["a"], 6)
+        report = program.run(["f(x) = x * 10", "a = f(3)"])
+        self.assertEqual(report["changed"]["a"], 30)
+        self.assertIsNone(report["error"])
+
+
+class TestNumericBackends(unittest.TestCase):
+    def test_float_is_default(self):
+        self.assertEqual(rpn_calculator("0.1 0.2 +", backend=get_backend("float")), rpn_calculator("0.1 0.2 +"))
+        self.assertEqual(rpn_calculator("12345678901234567891 1 +"), 12345678901234567168)
+
+    def test_int_backend_is_exact(self):
+        backend = get_backend("int")
+        self.assertEqual(rpn_calculator("12345678901234567891 1 +", backend=backend), 12345678901234567892)
+        self.assertEqual(rpn_calculator("3 100 ^ 7 %", backend=backend), 3 ** 100 % 7)
+        self.assertIsInstance(rpn_calculator("7 2 //", backend=backend), int)
+        self.assertEqual(rpn_calculator("1.5 2 *", backend=backend), 3)
+        with self.assertRaises(BudgetExceededError):
+            rpn_calculator("10 1000000000 ^", backend=backend)
+
+    def test_decimal_backend(self):
+        backend = get_backend("decimal:50")
+        self.assertEqual(backend.precision, 50)
+        self.assertEqual(rpn_calculator("0.1 0.2 +", backend=backend), Decimal("0.3"))
+        root = rpn_calculator("2 sqrt", backend=backend)
+        self.assertEqual(str(root), "1.4142135623730950488016887242096980785696718753769")
+        self.assertEqual(rpn_calculator("x 3 *", {"x": 0.1}, backend=backend), Decimal("0.3"))
+        self.assertEqual(rpn_calculator("6 3 //", backend=backend), 2)
+
+    def test_decimal_backend_function_calls(self):
+        env = evaluate_program(["f(x) = x * 2", "a = f(3)", "b = f(0.1) + 0.1"], backend=DecimalBackend())
+        self.assertEqual(env["a"], 6)
+        self.assertEqual(env["b"], Decimal("0.3"))
+
+    def test_int_backend_function_calls_are_exact(self):
+        env = evaluate_program(["f(x) = x * x + 1", "a = f(12345678901234567891)"], backend=get_backend("int"))
+        self.assertEqual(env["a"], 12345678901234567891 ** 2 + 1)
+
+    def test_decimal_floor_semantics_match_float(self):
+        backend = DecimalBackend()
+        for a, b in ((-7, 2), (7, -2), (7, 2), (-7, -2)):
+            self.assertEqual(rpn_calculator(f"{a} {b} //", backend=backend), a // b)
+            self.assertEqual(rpn_calculator(f"{a} {b} %", backend=backend), a % b)
+
+    def test_decimal_errors_and_vectors(self):
+        backend = DecimalBackend()
+        with self.assertRaises(ZeroDivisionError):
+            rpn_calculator("1 0 //", backend=backend)
+        with self.assertRaises(ValueError):
+            rpn_calculator("-1 sqrt", backend=backend)
+        with self.assertRaises(ValueError):
+            rpn_calculator("y 1 +", backend=backend)
+        self.assertEqual(rpn_calculator("[1,2] 2 *", backend=backend), [2, 4])
+        self.assertEqual(rpn_calculator("3 4 5 powmod", backend=backend), 1)
+
+    def test_program_and_unknown_backend(self):
+        env = evaluate_program(["a = 0.1", "b = a + 0.2"], backend=get_backend("decimal"))
+        self.assertEqual(env["b"], Decimal("0.3"))
+        with self.assertRaises(ValueError):
+            get_backend("complex")
+
+
+class TestCanonicalForm(unittest.TestCase):
+    def test_whitespace_parentheses_and_order(self):
+        forms = {canonical_rpn(e) for e in ("a + b", "b+a", "((b)) + (a)", "a b +", "  b   a + ")}
+        self.assertEqual(forms, {"a b +"})
+        self.assertEqual(canonical_rpn("2 * sin(y)"), canonical_rpn("sin(y) * 2"))
+        self.assertEqual(canonical_rpn("dot(w, v)"), "v w dot")
+
+    def test_non_commutative_order_is_kept(self):
+        self.assertNotEqual(canonical_rpn("a - b"), canonical_rpn("b - a"))
+        self.assertNotEqual(canonical_rpn("a ^ b"), canonical_rpn("b ^ a"))
+
+    def test_literals_are_folded_and_normalized(self):
+        self.assertEqual(canonical_rpn("2 * 3 + x"), "6 x +")
+        self.assertEqual(canonical_rpn("x + 6.0"), "6 x +")
+        self.assertEqual(canonical_rpn("[1.0, 2] + v"), "[1,2] v +")
+        # Ошибочные литеральные подвыражения не сворачиваются
+        self.assertEqual(canonical_rpn("1 // 0 + x"), "1 0 // x +")
+
+    def test_user_function_arity(self):
+        env = {}
+        define_function("f(p, q) = p - q", env)
+        self.assertEqual(canonical_rpn("f(b, a) + 1", functions={"f": env["f"]}), "1 b a f +")
+
+    def test_evaluate_unique(self):
+        report = evaluate_unique(["a+b", "b + a", "(a)+(b)", "a*b", "a // 0", "a +"], {"a": 3, "b": 4})
+        self.assertEqual(report["results"], [7, 7, 7, 12, None, None])
+        self.assertEqual(set(report["errors"]), {4, 5})
+        self.assertEqual((report["total"], report["unique"]), (6, 3))
+        self.assertTrue(isclose(report["dedup_ratio"], 0.5))
+        self.assertEqual(evaluate_unique([])["dedup_ratio"], 0.0)
+
+    def test_variables_shadow_literal_names(self):
+        env = {"nan": 5, "inf": 2}
+        expressions = ["nan 1 +", "1 nan +", "inf 3 *"]
+        report = evaluate_unique(expressions, env)
+        self.assertEqual(report["results"], [rpn_calculator(e, env) for e in expressions])
+        self.assertEqual(report["results"], [6, 6, 6])
+        self.assertEqual(canonical_rpn("nan 1 +", variables=env), "1 nan +")
+
+    def test_evaluate_unique_with_functions(self):
+        env = {"a": 3, "b": 4}
+        define_function("f(p, q) = p - q", env)
+        report = evaluate_unique(["f(a, b) + 1", "1 + f(a,b)", "f(b, a)"], env)
+        self.assertEqual(report["results"], [0, 0, 1])
+        self.assertEqual(report["errors"], {})
+        self.assertEqual(report["unique"], 2)
+
+
+class TestHistoryIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = HistoryIndex()
+        self.ids = [self.index.add(text) for text in (
+            "speed = dist / time = 12.5", "sqrt(speed) = 3.5355", "area = pi * r^2 = 78.54", "2 + 2 = 4")]
+
+    def test_prefix_and_order(self):
+        first, second, third, fourth = self.ids
+        self.assertEqual(self.index.search("speed"), [second, first])
+        self.assertEqual(self.index.search("sp"), [second, first])
+        self.assertEqual(self.index.search("SQRT"), [second])
+        self.assertEqual(self.index.search("78"), [third])
+        self.assertEqual(self.index.search("12.5"), [first])
+        self.assertEqual(self.index.search("nothing"), [])
+        self.assertEqual(self.index.search(""), [fourth, third, second, first])
+
+    def test_all_terms_must_match(self):
+        self.assertEqual(self.index.search("speed dist"), [self.ids[0]])
+        self.assertEqual(self.index.search("speed area"), [])
+
+    def test_limit(self):
+        for i in range(100):
+            self.index.add(f"x{i} = {i}")
+        found = self.index.search("x", limit=5)
+        self.assertEqual(found, [self.index.last_id - i for i in range(5)])
+        self.assertEqual(len(self.index.search("x")), 100)
+
+    def test_remove_and_clear(self):
+        self.index.remove(self.ids[1])
+        self.assertEqual(self.index.search("speed"), [self.ids[0]])
+        self.assertEqual(self.index.search("sqrt"), [])
+        self.assertEqual(len(self.index), 3)
+        self.assertEqual(self.index.ids() - {self.ids[0]}, {self.ids[2], self.ids[3]})
+        self.index.clear()
+        self.assertEqual(self.index.search(""), [])
+        self.assertGreater(self.index.add("y = 1"), self.ids[-1])
+
+    def test_matches(self):
+        self.assertTrue(self.index.matches(self.ids[2], "ar pi"))
+        self.assertFalse(self.index.matches(self.ids[2], "speed"))
+        self.assertTrue(self.index.matches(self.ids[2], ""))
+
+
+class TestParseCache(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "cache.rpnc")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_warm_start_reads_file(self):
+        expressions = ["a + b * 2", "sin(x) ^ 2", "3 4 +", "[1, 2] dot v"]
+        with ParseCache(self.path) as cache:
+            cold = [cache.rpn(e) for e in expressions]
+            self.assertEqual(cache.misses, 4)
+            cache.save()
+        with ParseCache(self.path) as cache:
+            self.assertEqual([cache.rpn(e) for e in expressions], cold)
+            self.assertEqual((cache.hits, cache.misses, len(cache)), (4, 0, 4))
+            self.assertEqual(cache.compile("a + b * 2").evaluate({"a": 1, "b": 3}), 7)
+            cache.rpn("x - 1")
+            cache.save()
+        with ParseCache(self.path) as cache:
+            self.assertEqual(len(cache), 5)
+            self.assertEqual(cache.rpn("x - 1"), "x 1 -")
+
+    def test_other_engine_version_is_ignored(self):
+        with ParseCache(self.path, fingerprint=b"0" * 16) as cache:
+            cache.rpn("a + b")
+            cache.save()
+        with ParseCache(self.path) as cache:
+            self.assertTrue(cache.stale)
+            self.assertEqual(len(cache), 0)
+            self.assertEqual(cache.rpn("a + b"), "a b +")
+            cache.save()
+        with ParseCache(self.path) as cache:
+            self.assertFalse(cache.stale)
+            self.assertEqual(len(cache), 1)
+
+    def test_corrupted_file(self):
+        with open(self.path, "wb") as f:
+            f.write(b"RPNC garbage")
+        with ParseCache(self.path) as cache:
+            self.assertTrue(cache.stale)
+            self.assertEqual(cache.rpn("2 * y"), "2 y *")
+
+    def test_csv_pipeline_uses_cache(self):
+        source = os.path.join(self.directory.name, "in.csv")
+        target = os.path.join(self.directory.name, "out.csv")
+        with open(source, "w", encoding="utf-8") as f:
+            f.write("a,b\n1,2\n")
+        for _ in range(2):
+            with ParseCache(self.path) as cache:
+                evaluate_csv(source, target, ["c = a + b"], cache=cache)
+                cache.save()
+        self.assertEqual((cache.hits, cache.misses), (1, 0))
+        with open(target, encoding="utf-8") as f:
+            self.assertIn("1,2,3", f.read())
+
+    def test_incremental_program_uses_cache(self):
+        lines = ["a = 2", "b = a * 3", "a + b"]
+        for _ in range(2):
+            with ParseCache(self.path) as cache:
+                report = IncrementalProgram(cache).run(lines)
+                cache.save()
+        self.assertEqual(report["changed"]["_last"], 8)
+        self.assertEqual((cache.hits, cache.misses), (3, 0))
+
+
+class TestVariableSlots(unittest.TestCase):
+    def test_slots_and_tuple_environment(self):
+        compiled = compile_rpn(parse_str_infix("a * b + c - a"))
+        self.assertEqual(compiled.slots, ("a", "b", "c"))
+        self.assertEqual(compiled.bind({"c": 1, "b": 2, "a": 3, "unused": 0}), (3, 2, 1))
+        self.assertEqual(compiled.run_slots((3, 2, 1)), 4)
+        self.assertEqual(compiled.evaluate({"a": 1, "b": 2, "c": 3}), 4)
+
+    def test_unchanged_environment_reuses_result(self):
+        compiled = compile_rpn("x y * 1 +")
+        env = {"x": 2.5, "y": 4.0}
+        self.assertEqual(compiled.evaluate(env), 11)
+        self.assertIs(compiled.run(env), compiled.run(env))
+        env["x"] = 3.0
+        self.assertEqual(compiled.evaluate(env), 13)
+        # Векторы изменяемы, поэтому для них результат не запоминается
+        scaled = compile_rpn("x y *")
+        vector_env = {"x": [1.0, 2.0], "y": 2.0}
+        self.assertEqual(scaled.evaluate(vector_env), [2.0, 4.0])
+        vector_env["x"][0] = 10.0
+        self.assertEqual(scaled.evaluate(vector_env), [20.0, 4.0])
+
+    def test_function_slots(self):
+        env = {}
+        define_function("sq(t) = t * t", env)
+        compiled = compile_rpn("x sq 1 +", functions=env)
+        self.assertEqual(compiled.slots, ("x", "sq"))
+        self.assertEqual(compiled.evaluate({**env, "x": 3}), 10)
+        with self.assertRaises(TypeError):
+            compiled.evaluate({"x": 3})
+        with self.assertRaises(ValueError):
+            compiled.evaluate(env)
+
+    def test_literal_names_match_interpreter(self):
+        for expression in ("inf 1 +", "nan 2 *", "infinity neg", "x inf +"):
+            for env in ({"x": 1}, {"x": 1, "inf": 2, "nan": 3, "infinity": 4}):
+                expected = rpn_calculator(expression, env)
+                actual = compile_rpn(expression).evaluate(env)
+                self.assertEqual(repr(actual), repr(expected), (expression, env))
+        self.assertEqual(compile_rpn("inf 1 +").evaluate({"inf": 2}), 3)
+        self.assertEqual(gradient("x * inf", {"x": 1.0, "inf": 5.0}, ["x"])[1]["x"], 5)
+
+    def test_interpreter_prefers_variables(self):
+        self.assertEqual(rpn_calculator("x 2 *", {"x": 4}), 8)
+        with self.assertRaises(ValueError):
+            rpn_calculator("x 2 *", {"y": 4})
+        self.assertEqual(rpn_calculator_batch("x 1 +", {"x": [1, 2]}, 2), [2, 3])
+
+
+class TestSharedEnvironment(unittest.TestCase):
+    ENV = {"a": 2.5, "n": 7, "v": [1.0, 2.0, 3.0], "big": 2 ** 80}
+
+    def test_attach_reads_same_values(self):
+        with SharedEnvironment.create(self.ENV) as owner:
+            descriptor = owner.descriptor()
+            self.assertEqual(set(descriptor["scalars"]), {"a", "n"})
+            self.assertEqual(set(descriptor["vectors"]), {"v"})
+            with SharedEnvironment.attach(descriptor) as worker:
+                self.assertEqual(dict(worker), self.ENV)
+                self.assertIsInstance(worker["n"], int)
+                owner.set_scalar("a", 10)
+                self.assertEqual(worker["a"], 10.0)
+                self.assertEqual(rpn_calculator("a v *", worker), [10.0, 20.0, 30.0])
+                with worker.vector_view("v") as view:
+                    self.assertEqual(view.tolist(), [1.0, 2.0, 3.0])
+                    self.assertTrue(view.readonly)
+                with self.assertRaises(PermissionError):
+                    worker.set_scalar("a", 1)
+
+    def test_block_is_unlinked_on_close(self):
+        owner = SharedEnvironment.create({"x": 1.0})
+        name = owner.descriptor()["block"]
+        owner.close()
+        with self.assertRaises(FileNotFoundError):
+            SharedEnvironment.attach({"block": name, "scalars": {}, "vectors": {}, "other": {}})
+
+    def test_evaluate_parallel(self):
+        results = evaluate_parallel(["a v *", "n 2 ^", "sum(v) + a"], self.ENV, processes=2)
+        self.assertEqual(results, [[2.5, 5.0, 7.5], 49, 8.5])
+
+    def test_set_scalar_keeps_slot_type(self):
+        with SharedEnvironment.create(self.ENV) as owner:
+            with self.assertRaises(TypeError):
+                owner.set_scalar("n", 2.5)
+            owner.set_scalar("n", 9)
+            owner.set_scalar("a", 3)
+            self.assertEqual((owner["n"], owner["a"]), (9, 3.0))
+
+    def test_functions_are_rebound_to_shared_scope(self):
+        env = dict(self.ENV, padding=[0.0] * 100000)
+        define_function("sq(x) = x * x", env)
+        define_function("scaled(x) = sq(x) * a", env)
+        with SharedEnvironment.create(env) as owner:
+            descriptor = owner.descriptor()
+            self.assertLess(len(pickle.dumps(descriptor)), 2000)
+            with SharedEnvironment.attach(descriptor) as worker:
+                self.assertEqual(rpn_calculator("2 scaled", worker), 10)
+                owner.set_scalar("a", 1.0)
+                self.assertEqual(rpn_calculator("2 scaled", worker), 4)
+                self.assertTrue(worker["sq"].pure)
+        self.assertEqual(evaluate_parallel(["scaled(n)"], env, processes=1), [122.5])
+
+
+class TestResultSink(unittest.TestCase):
+    RESULTS = [1.5, 42, [1.0, 2.0], 2 ** 70, Decimal("0.1"), -7, [], SparseVector(3, {1: 5.0}), 0.25]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "results.rpnr")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, block_rows):
+        with ResultWriter(self.path, block_rows=block_rows) as sink:
+            for value in self.RESULTS[:4]:
+                sink.append(value)
+            sink.append_error("Деление на ноль")
+            for value in self.RESULTS[4:]:
+                sink.append(value)
+        return sink
+
+    def test_round_trip_across_blocks(self):
+        expected = [(value, None) for value in self.RESULTS]
+        expected.insert(4, (None, "Деление на ноль"))
+        expected[8] = ([0.0, 5.0, 0.0], None)
+        for block_rows in (1, 3, 1000):
+            self.assertEqual(self.write(block_rows).rows, 10)
+            self.assertEqual(list(ResultReader(self.path)), expected, block_rows)
+
+    def test_columns(self):
+        self.write(block_rows=4)
+        columns = ResultReader(self.path).columns()
+        self.assertEqual(len(columns["kinds"]), 10)
+        self.assertEqual(columns["errors"], {4: "Деление на ноль"})
+        self.assertEqual(columns["kinds"][2], VECTOR)
+        self.assertEqual(columns["kinds"][4], ERROR)
+        self.assertEqual(columns["floats"][0], 1.5)
+        self.assertEqual(columns["ints"][1], 42)
+        offsets, values = columns["vector_offsets"], columns["vector_values"]
+        self.assertEqual(values[offsets[8]:offsets[9]].tolist(), [0.0, 5.0, 0.0])
+        self.assertEqual(offsets[7], offsets[8])
+
+    def test_write_program_row_per_line(self):
+        lines = ["a = 2", "", "f(x) = x * a", "f(3)", "b = 1 // 0"]
+        with ResultWriter(self.path) as sink:
+            write_program(lines, sink)
+        self.assertEqual(sink.rows, 4)
+        self.assertEqual(list(ResultReader(self.path)),
+                         [(2, None), ("f(x) = x * a", None), (6, None), (None, "Деление на ноль")])
+        self.assertEqual(ResultReader(self.path).columns()["kinds"][1], FUNCTION)
+
+    def test_unsupported_and_corrupted(self):
+        with ResultWriter(self.path) as sink:
+            with self.assertRaises(TypeError):
+                sink.append(Matrix([[1.0]]))
+            with self.assertRaises(TypeError):
+                sink.append("text")
+            sink.append(1.0)
+        with open(self.path, "r+b") as f:
+            f.truncate(os.path.getsize(self.path) - 3)
+        with self.assertRaises(ValueError):
+            list(ResultReader(self.path))
+        with open(self.path, "wb") as f:
+            f.write(b"nope")
+        with self.assertRaises(ValueError):
+            ResultReader(self.path).columns()
+
+
+class TestLoadGenerator(unittest.TestCase):
+    def corpus_file(self, text):
+        handle = tempfile.NamedTemporaryFile("w", suffix=".txt", delete=False, encoding="utf-8")
+        with handle:
+            handle.write(text)
+        self.addCleanup(os.remove, handle.name)
+        return handle.name
+
+    def test_load_corpus_formats(self):
+        transcript = self.corpus_file(">> a = 3\na = 3\n>> a * 2\n= 6\n>> exit\nЗавершение работы.\n")
+        self.assertEqual(load_corpus(transcript), ["a = 3", "a * 2"])
+        history = self.corpus_file("x = a + b = 7\na * 2 = 6\ny = 3\nf(t) = t * t\n")
+        self.assertEqual(load_corpus(history), ["x = a + b", "a * 2", "y = 3", "f(t) = t * t"])
+        with self.assertRaises(ValueError):
+            load_corpus(self.corpus_file("\n\n"))
+
+    def test_histogram_percentiles(self):
+        histogram = LatencyHistogram()
+        for i in range(1, 101):
+            histogram.record(i * 1e-5)
+        self.assertEqual(histogram.percentile(50), 50e-5)
+        self.assertEqual(histogram.percentile(99), 99e-5)
+        self.assertEqual(histogram.percentile(100), 100e-5)
+        self.assertEqual(sum(count for _, count in histogram.buckets()), 100)
+
+    def test_closed_and_open_loop(self):
+        corpus = ["a = 2", "a ^ 10", "q +"]
+        report = run_load(corpus, InProcessTarget(), concurrency=3, requests=300)
+        self.assertEqual((report["requests"], report["errors"]), (300, 100))
+        self.assertLessEqual(report["p50"], report["p99"])
+        self.assertLessEqual(report["p99"], report["max"])
+        self.assertIn("p99", format_report(report))
+        report = run_load(corpus, InProcessTarget(), rate=2000, requests=60)
+        self.assertEqual(report["requests"], 60)
+        with self.assertRaises(ValueError):
+            run_load(corpus, InProcessTarget())
+
+    def test_tcp_server(self):
+        with CalculatorServer(("127.0.0.1", 0)) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            target = TcpTarget(*server.server_address)
+            try:
+                self.assertTrue(target("x = 4"))
+                self.assertTrue(target("x * 2"))
+                self.assertFalse(target("1 // 0"))
+                report = run_load(["x + 1"], target, concurrency=2, requests=20)
+                self.assertEqual((report["requests"], report["errors"]), (20, 0))
+            finally:
+                target.close()
+                server.shutdown()
+            self.assertEqual(server.context.snapshot()["x"], 4)
+
+    def test_function_definitions_in_replay(self):
+        target = InProcessTarget()
+        report = run_load(["k = 2", "f(x) = x * k", "y = f(5)"], target, requests=3)
+        self.assertEqual(report["errors"], 0)
+        self.assertEqual(target.context.snapshot()["y"], 10)
+        target.context.execute("k = 3")
+        self.assertEqual(target.context.execute("f(5)"), 15)
+
+    def test_server_survives_unexpected_errors(self):
+        class FaultyContext(EvaluationContext):
+            def execute(self, line):
+                if line == "boom":
+                    raise RuntimeError("сбой")
+                return super().execute(line)
+
+        with CalculatorServer(("127.0.0.1", 0), FaultyContext()) as server:
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+            target = TcpTarget(*server.server_address, timeout=5)
+            try:
+                self.assertFalse(target("boom"))
+                self.assertTrue(target("g(x) = x + 1"))
+                self.assertTrue(target("g(1)"))
+                connection = target._connection()
+                connection[0].shutdown(socket.SHUT_RDWR)
+                with self.assertRaises(OSError):
+                    target("1 + 1")
+                self.assertTrue(target("1 + 1"))
+                self.assertIsNot(target._connection(), connection)
+            finally:
+                target.close()
+                server.shutdown()
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,100 @@
+"""Тесты масштабирования: время работы должно расти не быстрее линейного.
+
+Для каждого пути замеряется время на нескольких размерах входа, по точкам
+в логарифмических осях подбирается наклон (показатель степени роста).
+По умолчанию размеры до 10^5 токенов; RPN_SCALING_FULL=1 добавляет 10^6.
+
+Запуск из корня проекта: python -m unittest tests.scaling_tests_rpn
+"""
+import math
+import os
+import time
+import unittest
+
+from src.rpn_calculator.calculator import rpn_calculator, evaluate_program
+from src.rpn_calculator.parser import parse_str_infix
+from src.rpn_calculator.vectors import parse_vector
+
+FULL = os.environ.get("RPN_SCALING_FULL", "") not in ("", "0")
+SIZES = (1000, 10000, 100000, 1000000) if FULL else (1000, 10000, 100000)
+SMALL_SIZES = (100, 1000, 10000, 100000) if FULL else (100, 1000, 10000)
+# Линейный рост даёт наклон около 1, квадратичный - около 2
+MAX_SLOPE = 1.35
+
+
+def measure(function, argument, repeat=3) -> float:
+    best = math.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def growth_exponent(sizes, seconds) -> float:
+    """Наклон прямой, приближающей log(время) от log(размера), методом наименьших квадратов."""
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(max(t, 1e-9)) for t in seconds]
+    mean_x, mean_y = sum(xs) / len(xs), sum(ys) / len(ys)
+    return (sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys))
+            / sum((x - mean_x) ** 2 for x in xs))
+
+
+class ScalingTestCase(unittest.TestCase):
+    def assertLinear(self, make_input, function, sizes=SIZES):
+        inputs = [make_input(n) for n in sizes]
+        seconds = [measure(function, value) for value in inputs]
+        slope = growth_exponent(sizes, seconds)
+        timings = ", ".join(f"{n}: {t * 1000:.1f} мс" for n, t in zip(sizes, seconds))
+        self.assertLess(slope, MAX_SLOPE, f"Рост хуже линейного (наклон {slope:.2f}): {timings}")
+
+
+class TestParserScaling(ScalingTestCase):
+    def test_long_flat_expression(self):
+        self.assertLinear(lambda n: " + ".join(f"x{i}" for i in range(n // 2)), parse_str_infix)
+
+    def test_mixed_operators(self):
+        self.assertLinear(lambda n: " * ".join(f"(a{i} - {i}.5)" for i in range(n // 6)), parse_str_infix)
+
+    def test_deep_parentheses(self):
+        self.assertLinear(lambda n: "(" * (n // 2) + "1" + ")" * (n // 2), parse_str_infix)
+
+    def test_deep_function_calls(self):
+        self.assertLinear(lambda n: "sin(" * (n // 3) + "x" + ")" * (n // 3), parse_str_infix)
+
+
+class TestEvaluatorScaling(ScalingTestCase):
+    def test_long_chain(self):
+        self.assertLinear(lambda n: "1 " + " ".join(["2 +"] * (n // 2)), rpn_calculator)
+
+    def test_deep_stack(self):
+        self.assertLinear(lambda n: " ".join(["1"] * (n // 2)) + " " + " ".join(["+"] * (n // 2 - 1)),
+                          rpn_calculator)
+
+    def test_many_variables(self):
+        def make_input(n):
+            env = {f"v{i}": i for i in range(n // 2)}
+            return " ".join(["v0"] + [f"v{i} +" for i in range(1, n // 2)]), env
+
+        self.assertLinear(make_input, lambda case: rpn_calculator(*case))
+
+
+class TestVectorAndProgramScaling(ScalingTestCase):
+    def test_parse_vector(self):
+        self.assertLinear(lambda n: "[" + ",".join(str(i) for i in range(n)) + "]", parse_vector)
+
+    def test_long_vector_operations(self):
+        def make_input(n):
+            return {"v": [float(i) for i in range(n)], "w": [1.0] * n}
+
+        self.assertLinear(make_input, lambda env: rpn_calculator("v w + v dot", env))
+
+    def test_long_program(self):
+        def make_input(n):
+            return ["v0 = 1"] + [f"v{i} = v{i - 1} + 1" for i in range(1, n)]
+
+        self.assertLinear(make_input, evaluate_program, sizes=SMALL_SIZES)
+
+
+if __name__ == "__main__":
+    unittest.main()